@@ -1,15 +1,21 @@
-from typing import Annotated
+import hmac
+import time
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import CurrentUser, token_cache, user_cache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/api/v1/auth/login", auto_error=False
+)
 ALGORITHM = "HS256"
 
 
@@ -21,24 +27,72 @@ def get_db():
         db.close()
 
 
-def get_current_user(
-    db: Annotated[Session, Depends(get_db)],
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_current_user(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     token: Annotated[str, Depends(oauth2_scheme)],
-) -> User:
+) -> CurrentUser:
+    """
+    Resolve the bearer token to a user snapshot. Verified tokens and user
+    snapshots are cached, so repeat calls skip both jwt.decode and the users
+    SELECT; the session is only used on a cache miss.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("user_id")
-        if user_id is None:
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+            user_id: int = payload.get("user_id")
+            if user_id is None:
+                raise credentials_exception
+        except JWTError:
+            raise credentials_exception
+        expires_in = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set(token, user_id, ttl=expires_in)
+
+    current_user = user_cache.get(user_id)
+    if current_user is None:
+        user = await db.get(User, user_id)
+        if user is None or user.deleted_at is not None:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        current_user = CurrentUser.from_user(user)
+        user_cache.set(user_id, current_user)
+    return current_user
+
+
+async def get_optional_current_user(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+) -> Optional[CurrentUser]:
+    """
+    The current user for endpoints that anonymous clients may call too;
+    None without a valid bearer token, so an expired one doesn't break
+    public reads.
+    """
+    if token is None:
+        return None
+    try:
+        return await get_current_user(db, token)
+    except HTTPException:
+        return None
+
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
+def require_internal(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    Gate for operator-only endpoints (internal stats, admin): the request
+    must send INTERNAL_API_TOKEN as X-Internal-Token. Closed to everyone
+    when no token is configured.
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not hmac.compare_digest(
+        (x_internal_token or "").encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
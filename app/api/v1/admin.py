@@ -0,0 +1,132 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
+
+from app import crud, schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.export import EXPORT_FORMATS, EXPORT_KINDS, MEDIA_TYPES, astream_export
+from app.core.response_cache import (
+    ARTICLE_LIST_KEY,
+    article_key,
+    comments_key,
+    response_cache,
+    user_key,
+)
+from app.db.session import async_engine
+from app.models.comment import Comment
+
+router = APIRouter()
+
+
+@router.get("/export/{kind}")
+async def export_data(
+    kind: str,
+    format: str = Query("ndjson", description="ndjson or csv"),
+    since: Optional[datetime] = Query(None, description="Created at or after"),
+    until: Optional[datetime] = Query(None, description="Created before"),
+):
+    """
+    Stream every article or comment as NDJSON or CSV. Rows are read in
+    batches through a server-side cursor and written out as they arrive.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+
+    # The request's session is closed before the body is sent, so the
+    # stream holds its own connection. The query starts here, before the
+    # response does, so a failure gets an error status, not a cut-off body.
+    conn = await async_engine.connect()
+    try:
+        chunks = await astream_export(
+            conn,
+            kind,
+            format,
+            since=since,
+            until=until,
+            batch_size=settings.EXPORT_BATCH_SIZE,
+        )
+    except Exception:
+        await conn.close()
+        raise
+
+    async def close():
+        # Safe to call twice: closing a closed connection does nothing
+        await chunks.aclose()
+        await conn.close()
+
+    async def body():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await close()
+
+    # The background task closes the connection too, for a body that never
+    # started (its finally doesn't run then) or was dropped unfinished
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+        background=BackgroundTask(close),
+    )
+
+
+@router.delete("/comments", response_model=schemas.CommentsDeleted)
+async def delete_comments(
+    author_id: Optional[int] = Query(None, description="Delete this user's comments"),
+    article_id: Optional[int] = Query(
+        None, description="Delete the comments on this article"
+    ),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Bulk-delete comments by author, by article, or both, e.g. to clear out
+    spam. Runs as one DELETE plus one counter update per table, whatever the
+    number of comments.
+    """
+    where = []
+    if author_id is not None:
+        where.append(Comment.author_id == author_id)
+    if article_id is not None:
+        where.append(Comment.article_id == article_id)
+    if not where:
+        raise HTTPException(status_code=400, detail="Pass author_id or article_id")
+
+    comments = await crud.async_comment.remove_where(db, *where)
+    if comments:
+        keys = {ARTICLE_LIST_KEY}
+        for comment in comments:
+            keys.update(
+                (
+                    article_key(comment.article_id),
+                    comments_key(comment.article_id),
+                    user_key(comment.author_id),
+                    user_key(comment.article.author_id),
+                )
+            )
+        await response_cache.invalidate(*keys)
+    return {"deleted": len(comments), "ids": [comment.id for comment in comments]}
+
+
+@router.delete("/users/{id}", response_model=schemas.UserResponse, status_code=202)
+async def delete_user(
+    id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Delete a user with everything they wrote. The account, its articles and
+    its comments are gone from every read once this returns; the rows are
+    purged in the background.
+    """
+    removed = await crud.async_user.remove(db, id=id, background_tasks=background_tasks)
+    if not removed:
+        raise HTTPException(status_code=404, detail="User not found")
+    return removed.user
@@ -1,6 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.v1 import articles, auth, comments, users
+from app.api import deps
+from app.api.v1 import admin, articles, auth, comments, internal, uploads, users
 
 api_router = APIRouter()
 
@@ -8,3 +9,17 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(articles.router, prefix="/articles", tags=["articles"])
 api_router.include_router(comments.router, prefix="/comments", tags=["comments"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(
+    internal.router,
+    prefix="/internal",
+    tags=["internal"],
+    dependencies=[Depends(deps.require_internal)],
+    include_in_schema=False,
+)
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(deps.require_internal)],
+)
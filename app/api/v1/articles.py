@@ -1,85 +1,310 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Set, Union
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
 from app.api import deps
-from app.models.article import Article
-from app.models.comment import Comment
-from app.models.user import User
+from app.core.auth_cache import CurrentUser
+from app.core.conditional import etag_matches, make_etag, not_modified
+from app.core.pagination import Page, PageParams
+from app.core.purge import purge_article, purge_in_background
+from app.core.response_cache import (
+    ARTICLE_LIST_KEY,
+    CachedResponse,
+    article_key,
+    comments_key,
+    respond,
+    response_cache,
+    user_key,
+)
+from app.core.responses import ORJSONResponse, dumps
+from app.crud.crud_article import (
+    CARD_SELECTABLE_FIELDS,
+    EMBEDDED_COMMENTS,
+    MAX_EMBEDDED_COMMENTS,
+    STATUSES,
+    filter_clauses,
+)
+from app.db.replicas import use_primary
 
 router = APIRouter()
 
+INCLUDABLE = ("comments",)
+
+CARD_ORDER = tuple(schemas.ArticleCard.model_fields)
+
+
+def _parse_list(value: Optional[str], allowed, name: str) -> Set[str]:
+    items = {item.strip() for item in (value or "").split(",") if item.strip()}
+    unknown = items - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {name}: {', '.join(sorted(unknown))}",
+        )
+    return items
+
+
+def _parse_tags(value: Optional[str]) -> List[str]:
+    return sorted({tag.strip() for tag in (value or "").split(",") if tag.strip()})
+
+
+def _status(value: str) -> str:
+    if value not in STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown status: {value}",
+        )
+    return value
+
+
+def _listable_status(
+    value: str, author_id: Optional[int], current_user: Optional[CurrentUser]
+) -> str:
+    # Drafts are private: only their author may list them, and only their own
+    status = _status(value)
+    if status == "draft" and (current_user is None or author_id != current_user.id):
+        raise HTTPException(
+            status_code=403,
+            detail="Drafts can only be listed by their author, with author_id",
+        )
+    return status
+
+
+def _card(row, fields: Set[str]) -> dict:
+    # In ArticleCard's field order, like a validated card
+    mapping = row._mapping
+    return {name: mapping[name] for name in CARD_ORDER if name in fields}
+
 
 @router.post("", response_model=schemas.ArticleResponse)
-def create_article(
+async def create_article(
     *,
     article_in: schemas.ArticleCreate,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: CurrentUser = Depends(deps.get_current_user),
 ):
     """
     Create new article
     """
-    article = crud.article.create(
+    article = await crud.async_article.create(
         db=db,
         obj_in=article_in,
         author_id=current_user.id,
     )
+    await response_cache.invalidate(ARTICLE_LIST_KEY, user_key(current_user.id))
     return article
 
 
-@router.get("", response_model=schemas.PaginatedResponse[schemas.ArticleResponse])
-def list_articles(
-    db: Session = Depends(deps.get_db),
-    page: int = 1,
-    size: int = 10,
+@router.get(
+    "",
+    response_model=Union[Page[schemas.ArticleResponse], Page[schemas.ArticleCard]],
+    response_model_exclude_unset=True,
+)
+async def list_articles(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    params: PageParams = Depends(),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated card fields, e.g. title,summary,author_name. "
+        "Returns slim ArticleCard items instead of full articles.",
+    ),
+    include: Optional[str] = Query(
+        None, description="Comma-separated relations to embed: comments"
+    ),
+    tags: Optional[str] = Query(
+        None, description="Comma-separated tags; articles must carry all of them"
+    ),
+    status: str = Query(
+        "published", description="draft or published; drafts only with your author_id"
+    ),
+    author_id: Optional[int] = Query(None),
+    current_user: Optional[CurrentUser] = Depends(deps.get_optional_current_user),
 ):
     """
-    Get list of articles with pagination
+    Get list of articles with pagination, newest first.
+    Pass `cursor` from a previous page's `next_cursor`/`prev_cursor` for keyset paging.
+    The first page of published articles is served from the response cache.
     """
-    skip = (page - 1) * size
+    status = _listable_status(status, author_id, current_user)
+    filters = filter_clauses(tags=_parse_tags(tags), status=status, author_id=author_id)
+    card_fields = None
+    if fields is not None:
+        card_fields = _parse_list(fields, CARD_SELECTABLE_FIELDS, "fields") | {"id"}
+    includes = _parse_list(include, INCLUDABLE, "include")
 
-    articles = (
-        db.query(Article)
-        .options(
-            joinedload(Article.author),
-            joinedload(Article.comments).joinedload(Comment.author),
+    async def load_page() -> dict:
+        if card_fields is not None:
+            page = await crud.async_article.list_cards(
+                db, fields=card_fields, params=params, filters=filters
+            )
+            page["items"] = [_card(row, card_fields) for row in page["items"]]
+            return page
+        return await crud.async_article.list_full(
+            db, include=includes, params=params, filters=filters
         )
-        .order_by(Article.created_at.desc())
-        .offset(skip)
-        .limit(size)
-        .all()
+
+    # The cache is shared by everyone, so an author's drafts stay out of it
+    if params.cursor is not None or params.page != 1 or status == "draft":
+        return ORJSONResponse(await load_page())
+
+    async def load() -> CachedResponse:
+        return CachedResponse(None, dumps(await load_page()))
+
+    # Page links are absolute, so the host is part of the variant
+    variant = str(request.url)
+    entry = await response_cache.get(ARTICLE_LIST_KEY, variant)
+    if entry is None:
+        # Cache entries outlive replica lag, so misses are filled from the primary
+        with use_primary():
+            entry = await response_cache.fetch(ARTICLE_LIST_KEY, variant, load)
+    return respond(request, "articles.list", entry)
+
+
+@router.get("/tags", response_model=List[schemas.TagFacet])
+async def list_tag_counts(
+    db: AsyncSession = Depends(deps.get_async_db),
+    status: str = Query(
+        "published", description="draft or published; drafts only with your author_id"
+    ),
+    prefix: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(50, ge=1, le=500),
+    author_id: Optional[int] = Query(None, description="Count one author's articles"),
+    current_user: Optional[CurrentUser] = Depends(deps.get_optional_current_user),
+):
+    """
+    Tags with the number of articles carrying them, most used first.
+    """
+    return await crud.async_article.tag_counts(
+        db,
+        status=_listable_status(status, author_id, current_user),
+        prefix=prefix,
+        limit=limit,
+        author_id=author_id,
     )
 
-    total = db.query(Article).count()
 
-    return {
-        "items": articles,
-        "total": total,
-        "page": page,
-        "size": size,
-    }
+@router.get("/search", response_model=Page[schemas.ArticleSearchHit])
+async def search_articles(
+    db: AsyncSession = Depends(deps.get_async_db),
+    params: PageParams = Depends(),
+    q: str = Query(
+        ...,
+        min_length=1,
+        max_length=200,
+        description='Search terms; supports "quoted phrases", OR and -exclusions',
+    ),
+):
+    """
+    Full-text search over published articles' title, summary and content,
+    best matches first.
+    Page with `next_cursor`; results carry highlighted snippets.
+    """
+    return await crud.async_article.search(
+        db, q=q, params=params, filters=filter_clauses(status="published")
+    )
 
 
-@router.get("/{id}", response_model=schemas.ArticleResponse)
-def get_article(
+@router.get(
+    "/{id}",
+    response_model=Union[schemas.ArticleResponse, schemas.ArticleCard],
+    response_model_exclude_unset=True,
+)
+async def get_article(
     id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated card fields; returns an ArticleCard"
+    ),
+    include: str = Query(
+        "comments", description="Comma-separated relations to embed: comments"
+    ),
+    comments_limit: int = Query(
+        EMBEDDED_COMMENTS,
+        ge=0,
+        le=MAX_EMBEDDED_COMMENTS,
+        description="How many of the newest comments to embed; comment_count "
+        "has the total",
+    ),
 ):
     """
-    Get article by ID
+    Get article by ID, from the response cache when possible. On a miss,
+    If-None-Match is answered with a 304 decided from the article's version
+    and its newest comment edit alone. Those don't cover the counters of the
+    embedded authors, so the ETag is weak: a 304 may keep a copy whose
+    author counters are behind.
     """
-    article = (
-        db.query(Article)
-        .options(
-            joinedload(Article.author),
-            joinedload(Article.comments).joinedload(Comment.author),
-        )
-        .filter(Article.id == id)
-        .first()
-    )
+    key, variant = article_key(id), request.url.query
+    entry = await response_cache.get(key, variant)
+    if entry is not None:
+        return respond(request, "articles.detail", entry)
+
+    card_fields = None
+    if fields is not None:
+        card_fields = _parse_list(fields, CARD_SELECTABLE_FIELDS, "fields") | {"id"}
+    includes = _parse_list(include, INCLUDABLE, "include")
+
+    # Cache entries outlive replica lag, so misses are filled from the primary
+    with use_primary():
+        version = await crud.async_article.version(db, id=id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Article not found")
+        etag = make_etag("article", id, variant, *version, weak=True)
+        if etag_matches(request, etag):
+            return not_modified("articles.detail", etag)
+
+        async def load() -> CachedResponse:
+            if card_fields is not None:
+                row = await crud.async_article.get_card(db, id=id, fields=card_fields)
+                if not row:
+                    raise HTTPException(status_code=404, detail="Article not found")
+                return CachedResponse(etag, dumps(_card(row, card_fields)))
+
+            article = await crud.async_article.get_full(
+                db, id=id, include=includes, comments_limit=comments_limit
+            )
+
+            if not article:
+                raise HTTPException(status_code=404, detail="Article not found")
+
+            return CachedResponse(etag, dumps(article))
 
-    if not article:
+        entry = await response_cache.fetch(key, variant, load)
+        return respond(request, "articles.detail", entry)
+
+
+@router.delete("/{id}", response_model=schemas.ArticleSummary)
+async def delete_article(
+    id: int,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: CurrentUser = Depends(deps.get_current_user),
+):
+    """
+    Delete an article. It is gone from every read as soon as this returns;
+    its comments, however many, are purged in the background.
+    """
+    article = await crud.async_article.get(db, id=id)
+    if not article or article.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Article not found")
 
-    return article
+    if article.author_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    removed = await crud.async_article.remove(db, id=id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    # Commenters' profiles list their comments on it, and their counts
+    await response_cache.invalidate(
+        article_key(id),
+        comments_key(id),
+        ARTICLE_LIST_KEY,
+        user_key(current_user.id),
+        *(user_key(user_id) for user_id in removed.commenter_ids),
+    )
+    background_tasks.add_task(purge_in_background, purge_article, id)
+    return removed.article
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import create_access_token, get_password_hash, verify_password
-from app.db.session import get_db
-from app.models.user import User
+from app import crud
+from app.api import deps
+from app.core.security import create_access_token
 from app.schemas.auth import TokenResponse, UserLogin
 from app.schemas.user import UserCreate, UserResponse
 
@@ -11,36 +11,30 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: AsyncSession = Depends(deps.get_async_db)):
     """Register a new user"""
-    if db.query(User).filter(User.email == user_in.email).first():
+    user = await crud.async_user.create(db, obj_in=user_in)
+    if not user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    user = User(
-        email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
-        full_name=user_in.full_name,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     user_in: UserLogin,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
 ):
     """
     Login for existing user.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await crud.async_user.get_by_email(db, email=user_in.email)
     if not user:
         raise HTTPException(status_code=400, detail="Email not registered")
 
-    if not verify_password(user_in.password, user.hashed_password):
+    if not await crud.async_user.check_password(
+        db, user=user, password=user_in.password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
 
     token = create_access_token({"user_id": user.id})
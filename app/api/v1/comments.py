@@ -1,73 +1,115 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, schemas
 from app.api import deps
-from app.models.comment import Comment
-from app.models.user import User
+from app.core.auth_cache import CurrentUser
+from app.core.conditional import etag_matches, make_etag, not_modified
+from app.core.pagination import Page, PageParams
+from app.core.response_cache import (
+    ARTICLE_LIST_KEY,
+    CachedResponse,
+    article_key,
+    comments_key,
+    respond,
+    response_cache,
+    user_key,
+)
+from app.core.responses import dumps
+from app.db.replicas import use_primary
 
 router = APIRouter()
 
 
-@router.get("/article/{article_id}", response_model=List[schemas.CommentResponse])
-def list_comments(
+@router.get("/article/{article_id}", response_model=Page[schemas.CommentResponse])
+async def list_comments(
     article_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    params: PageParams = Depends(),
 ):
     """
-    Get all comments for an article.
+    Get comments for an article, newest first, with pagination (pass
+    `next_cursor` back as `cursor` for the next page), from the
+    response cache when possible. Honors If-None-Match; adding or removing a
+    comment bumps the article's version, so the article's version row also
+    versions its comments. It doesn't version their authors' counters, so
+    the ETag is weak.
     """
-    article = crud.article.get(db, id=article_id)
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
+    # Page links are absolute, so the host is part of the variant
+    key, variant = comments_key(article_id), str(request.url)
+    entry = await response_cache.get(key, variant)
+    if entry is not None:
+        return respond(request, "comments.list", entry)
+
+    # Cache entries outlive replica lag, so misses are filled from the primary
+    with use_primary():
+        version = await crud.async_article.version(db, id=article_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="Article not found")
+        etag = make_etag("comments", article_id, request.url.query, *version, weak=True)
+        if etag_matches(request, etag):
+            return not_modified("comments.list", etag)
+
+        async def load() -> CachedResponse:
+            page = await crud.async_comment.get_by_article(
+                db, article_id=article_id, params=params
+            )
+            return CachedResponse(etag, dumps(page))
+
+        entry = await response_cache.fetch(key, variant, load)
+        return respond(request, "comments.list", entry)
+
 
-    comments = (
-        db.query(Comment)
-        .options(joinedload(Comment.author))
-        .filter(Comment.article_id == article_id)
-        .all()
+async def _invalidate_comment_reads(article, commenter_id: int) -> None:
+    # Comments show up in the article, its comment list, both users'
+    # profiles and, through comment_count, the front page
+    await response_cache.invalidate(
+        article_key(article.id),
+        comments_key(article.id),
+        ARTICLE_LIST_KEY,
+        user_key(commenter_id),
+        user_key(article.author_id),
     )
-    return comments
 
 
 @router.post("", response_model=schemas.CommentResponse)
-def create_comment(
+async def create_comment(
     comment_in: schemas.CommentCreate,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: CurrentUser = Depends(deps.get_current_user),
 ):
     """
     Create a new comment.
     """
-    article = crud.article.get(db, id=comment_in.article_id)
-    if not article:
+    comment = await crud.async_comment.create(
+        db, obj_in=comment_in, author_id=current_user.id
+    )
+    if not comment:
         raise HTTPException(status_code=404, detail="Article not found")
 
-    comment = crud.comment.create(db, obj_in=comment_in, author_id=current_user.id)
-    db.commit()
-
-    # Refresh to get the relationships loaded
-    db.refresh(comment)
+    await _invalidate_comment_reads(comment.article, current_user.id)
     return comment
 
 
 @router.delete("/{id}", response_model=schemas.CommentResponse)
-def delete_comment(
+async def delete_comment(
     id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: CurrentUser = Depends(deps.get_current_user),
 ):
     """
     Delete a comment.
     """
-    comment = crud.comment.get(db, id=id)
+    comment = await crud.async_comment.get(db, id=id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    comment = crud.comment.remove(db, id=id)
+    comment = await crud.async_comment.remove(db, id=id)
+    if not comment:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    await _invalidate_comment_reads(comment.article, comment.author_id)
     return comment
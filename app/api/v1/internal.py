@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+
+from app.core.avatars import avatar_processor
+from app.core.cache import cache_snapshot
+from app.core.response_cache import response_cache
+from app.core.security import password_hasher
+from app.db.pool import pool_snapshot
+from app.db.session import replicas
+
+router = APIRouter()
+
+
+@router.get("/stats")
+def get_stats():
+    """
+    Operational counters for the connection pools, read replicas, in-process
+    caches, the response cache and the password hashing and avatar pools
+    """
+    return {
+        "pools": pool_snapshot(),
+        "replicas": replicas.stats(),
+        "caches": cache_snapshot(),
+        "response_cache": response_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "avatar_processor": avatar_processor.stats(),
+    }
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.core.avatars import is_avatar_key, store_image, too_large
+from app.core.config import settings
+from app.core.storage import LocalStorage, storage, verify_signature
+
+router = APIRouter()
+
+
+@router.put("/{key:path}", status_code=status.HTTP_204_NO_CONTENT)
+async def put_upload(key: str, expires: int, signature: str, request: Request):
+    """
+    Target of presigned PUTs when storage is local. The signature stands in
+    for authentication; the body must hash to the key it was signed for.
+    """
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    if not verify_signature(key, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    if not is_avatar_key(key):
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+    if int(request.headers.get("content-length") or 0) > settings.AVATAR_MAX_BYTES:
+        raise too_large()
+
+    await store_image(request.stream(), expected_key=key)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
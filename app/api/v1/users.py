@@ -1,153 +1,286 @@
-import os
-import shutil
-import time
+import functools
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
 
+from app import crud
 from app.api import deps
-from app.models.article import Article
-from app.models.comment import Comment
+from app.core.auth_cache import CurrentUser, invalidate_user
+from app.core.avatars import (
+    EXTENSIONS,
+    avatar_key,
+    avatar_processor,
+    check_stored_image,
+    existing_variants,
+    is_avatar_key,
+    store_image,
+    too_large,
+    upload_chunks,
+)
+from app.core.conditional import etag_matches, make_etag, not_modified
+from app.core.config import settings
+from app.core.response_cache import (
+    CachedResponse,
+    render,
+    respond,
+    response_cache,
+    user_key,
+)
+from app.core.storage import storage
+from app.db.replicas import use_primary
+from app.db.session import AsyncSessionLocal
 from app.models.user import User
-from app.schemas.user import UserProfileDetail
+from app.schemas.user import (
+    AvatarConfirm,
+    AvatarUploadRequest,
+    AvatarUploadTicket,
+    UserProfileDetail,
+)
 
 router = APIRouter()
 
 
+async def _profile(db: AsyncSession, user_id: int) -> dict:
+    profile = await crud.async_user.profile(db, user_id=user_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return profile
+
+
+async def _cached_profile(request: Request, db: AsyncSession, user_id: int, route: str):
+    key = user_key(user_id)
+    entry = await response_cache.get(key, route)
+    if entry is not None:
+        return respond(request, route, entry)
+
+    # Cache entries outlive replica lag, so misses are filled from the primary
+    with use_primary():
+        # Answer If-None-Match from the profile's version row before loading it
+        version = await crud.async_user.profile_version(db, user_id=user_id)
+        if not version:
+            raise HTTPException(status_code=404, detail="User not found")
+        etag = make_etag(route, user_id, *version)
+        if etag_matches(request, etag):
+            return not_modified(route, etag)
+
+        async def load() -> CachedResponse:
+            profile = await _profile(db, user_id)
+            return CachedResponse(etag, render(UserProfileDetail, profile))
+
+        entry = await response_cache.fetch(key, route, load)
+        return respond(request, route, entry)
+
+
 @router.get("/me", response_model=UserProfileDetail)
-def get_current_user(
-    current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db),
+async def get_current_user(
+    request: Request,
+    current_user: CurrentUser = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
 ):
     """
     Get current user with profile details
     """
-    # Get recent activity just like in get_user_profile
-    recent_articles = (
-        db.query(Article)
-        .filter(Article.author_id == current_user.id)
-        .order_by(desc(Article.created_at))
-        .limit(5)
-        .all()
-    )
-
-    recent_comments = (
-        db.query(Comment)
-        .filter(Comment.author_id == current_user.id)
-        .order_by(desc(Comment.created_at))
-        .limit(5)
-        .all()
-    )
-
-    return {
-        "id": current_user.id,
-        "email": current_user.email,
-        "full_name": current_user.full_name,
-        "avatar_url": current_user.avatar_url,
-        "article_count": current_user.article_count,
-        "comment_count": current_user.comment_count,
-        "created_at": current_user.created_at,
-        "recent_articles": recent_articles,
-        "recent_comments": recent_comments,
-    }
+    return await _cached_profile(request, db, current_user.id, "users.me")
 
 
 @router.get("/{user_id}", response_model=UserProfileDetail)
-def get_user_profile(
+async def get_user_profile(
     user_id: int,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
 ):
     """
     Get user profile with recent activity
     """
-    # First get the user
-    user = db.query(User).filter(User.id == user_id).first()
+    return await _cached_profile(request, db, user_id, "users.profile")
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    # Get 5 most recent articles
-    recent_articles = (
-        db.query(Article)
-        .filter(Article.author_id == user_id)
-        .order_by(desc(Article.created_at))
-        .limit(5)
-        .all()
-    )
+def _check_owner(current_user: CurrentUser, user_id: int) -> None:
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to update other user's avatar"
+        )
 
-    # Get 5 most recent comments
-    recent_comments = (
-        db.query(Comment)
-        .filter(Comment.author_id == user_id)
-        .order_by(desc(Comment.created_at))
-        .limit(5)
-        .all()
-    )
 
-    # Create response with recent activity
+def _ready_avatar(variants: dict, base_url: str) -> dict:
+    urls = {size: storage.url(key, base_url) for size, key in variants.items()}
     return {
-        "id": user.id,
-        "email": user.email,
-        "full_name": user.full_name,
-        "avatar_url": user.avatar_url,
-        "article_count": user.article_count,
-        "comment_count": user.comment_count,
-        "created_at": user.created_at,
-        "recent_articles": recent_articles,
-        "recent_comments": recent_comments,
+        "avatar_status": "ready",
+        "avatar_variants": urls,
+        "avatar_url": urls[str(max(avatar_processor.sizes))],
     }
 
 
-@router.post("/{user_id}/avatar", response_model=UserProfileDetail)
+async def _finish_avatar(user_id: int, key: str, source_url: str, base_url: str):
+    """
+    Generate the avatar's variants and point the profile at them. Skipped if
+    the user has uploaded another avatar in the meantime.
+    """
+    try:
+        variants = await avatar_processor.resize(key)
+    except Exception:
+        values = {"avatar_status": "failed"}
+    else:
+        values = _ready_avatar(variants, base_url)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.avatar_url == source_url)
+            .values(**values)
+        )
+        await db.commit()
+    invalidate_user(user_id)
+    await response_cache.invalidate(user_key(user_id))
+
+
+async def _set_avatar(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession,
+    user_id: int,
+    key: str,
+) -> dict:
+    """
+    Point the user at a stored avatar. The original is served straight away
+    with avatar_status "pending" and resized variants follow in the
+    background, unless this image was uploaded before and they exist.
+    """
+    # Get the base URL from the request
+    base_url = str(request.base_url).rstrip("/")
+    source_url = storage.url(key, base_url)
+    variants = await existing_variants(key, avatar_processor.sizes)
+    if variants is not None:
+        values = _ready_avatar(variants, base_url)
+    else:
+        values = {
+            "avatar_url": source_url,
+            "avatar_status": "pending",
+            "avatar_variants": None,
+        }
+    await db.execute(update(User).where(User.id == user_id).values(**values))
+    await db.commit()
+    invalidate_user(user_id)
+    await response_cache.invalidate(user_key(user_id))
+    if variants is None:
+        background_tasks.add_task(_finish_avatar, user_id, key, source_url, base_url)
+
+    return await _profile(db, user_id)
+
+
+# Boundaries and part headers a multipart body carries around the file
+MULTIPART_OVERHEAD = 16 * 1024
+
+# The form is parsed in the endpoint, so it is documented by hand
+AVATAR_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@router.post(
+    "/{user_id}/avatar", response_model=UserProfileDetail, openapi_extra=AVATAR_FORM
+)
 async def upload_avatar(
     user_id: int,
-    file: UploadFile = File(...),
-    current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(deps.get_db),
-    request: Request = None,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
 ):
     """
-    Upload user avatar
+    Upload user avatar through the API, as the `file` field of a multipart
+    form. Prefer the upload-url/confirm pair, which keeps the file's bytes
+    off the API workers.
     """
-    print(f"Received avatar upload request for user {user_id}")  # Debug log
+    _check_owner(current_user, user_id)
 
-    # Check if the user is trying to update their own avatar
-    if current_user.id != user_id:
+    # A File() parameter would have the whole body spooled before any of
+    # this runs, so the form is only parsed once its declared size passes
+    length = request.headers.get("content-length", "")
+    if not length.isdigit():
         raise HTTPException(
-            status_code=403, detail="Not authorized to update other user's avatar"
+            status_code=status.HTTP_411_LENGTH_REQUIRED,
+            detail="Content-Length required",
         )
+    if int(length) > settings.AVATAR_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise too_large()
+
+    async with request.form(max_files=1, max_fields=1) as form:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=422, detail="Missing file field")
+        # store_image sniffs the bytes and enforces the exact cap
+        if not (file.content_type or "").startswith("image/"):
+            raise HTTPException(status_code=400, detail="File must be an image")
+        key = await store_image(upload_chunks(file))
+    return await _set_avatar(request, background_tasks, db, user_id, key)
+
+
+@router.post("/{user_id}/avatar/upload-url", response_model=AvatarUploadTicket)
+async def create_avatar_upload(
+    user_id: int,
+    upload_in: AvatarUploadRequest,
+    request: Request,
+    current_user: CurrentUser = Depends(deps.get_current_user),
+):
+    """
+    Presigned PUT for uploading an avatar straight to storage. The key is
+    the file's hash, so an image that is already stored needs no upload.
+    Confirm the upload afterwards.
+    """
+    _check_owner(current_user, user_id)
 
-    # Validate file type
-    print(f"File content type: {file.content_type}")  # Debug log
-    if not file.content_type.startswith("image/"):
+    extension = EXTENSIONS.get(upload_in.content_type)
+    if extension is None:
         raise HTTPException(status_code=400, detail="File must be an image")
+    if upload_in.size > settings.AVATAR_MAX_BYTES:
+        raise too_large()
 
-    try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = os.path.join("uploads", "avatars")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        # Save file with unique name and timestamp to prevent caching
-        timestamp = int(time.time())
-        file_extension = os.path.splitext(file.filename)[1].lower()
-        file_name = f"avatar_{user_id}_{timestamp}{file_extension}"
-        file_path = os.path.join(upload_dir, file_name)
-        print(f"Saving file to: {file_path}")  # Debug log
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Get the base URL from the request
-        base_url = str(request.base_url).rstrip("/")
-
-        # Update user's avatar_url in database with dynamic host
-        avatar_url = f"{base_url}/uploads/avatars/{file_name}"
-        print(f"Setting avatar URL to: {avatar_url}")  # Debug log
-        db.query(User).filter(User.id == user_id).update({"avatar_url": avatar_url})
-        db.commit()
-
-        return get_user_profile(user_id=user_id, db=db)
-    except Exception as e:
-        print(f"Error uploading avatar: {e}")  # Debug log
-        raise HTTPException(status_code=500, detail=str(e))
+    key = avatar_key(upload_in.sha256, extension)
+    if await anyio.to_thread.run_sync(storage.exists, key):
+        return {"key": key, "exists": True}
+    base_url = str(request.base_url).rstrip("/")
+    presigned = await anyio.to_thread.run_sync(
+        functools.partial(
+            storage.presign_put,
+            key,
+            content_type=upload_in.content_type,
+            sha256=upload_in.sha256,
+            base_url=base_url,
+        )
+    )
+    return {"key": key, **presigned}
+
+
+@router.post("/{user_id}/avatar/confirm", response_model=UserProfileDetail)
+async def confirm_avatar_upload(
+    user_id: int,
+    confirm_in: AvatarConfirm,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Make a presigned upload the user's avatar
+    """
+    _check_owner(current_user, user_id)
+    if not is_avatar_key(confirm_in.key):
+        raise HTTPException(status_code=400, detail="Invalid upload key")
+
+    await check_stored_image(confirm_in.key)
+    return await _set_avatar(request, background_tasks, db, user_id, confirm_in.key)
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    Detached snapshot of the authenticated user, safe to share between requests.
+    Counters are left out on purpose: they change on every post, so endpoints
+    that show them read the user row instead.
+    """
+
+    id: int
+    email: str
+    full_name: str
+    avatar_url: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            avatar_url=user.avatar_url,
+            created_at=user.created_at,
+        )
+
+
+# token -> user_id, never kept past the token's own expiry
+token_cache = TTLCache(
+    "auth_tokens", maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+# user_id -> CurrentUser
+user_cache = TTLCache(
+    "auth_users", maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Drop the cached snapshot after the user row changes. Other workers keep
+    theirs until AUTH_CACHE_TTL runs out.
+    """
+    user_cache.delete(user_id)
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Sequence
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+from app.core.storage import Storage, storage
+
+AVATAR_PREFIX = "avatars"
+
+# Avatars are stored under the SHA-256 of their bytes, and variants under
+# the same hash plus their size, so a name always refers to the same content
+BLOB_NAME = re.compile(r"^[0-9a-f]{64}(?:_\d+)?\.\w+$")
+AVATAR_KEY = re.compile(rf"^{AVATAR_PREFIX}/[0-9a-f]{{64}}\.\w+$")
+
+# Leading bytes of the formats we accept, and the extension each is stored as
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+SNIFF_BYTES = 12
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+EXTENSIONS = {content_type: ext for ext, content_type in CONTENT_TYPES.items()}
+
+
+def sniff_image(head: bytes) -> Optional[str]:
+    """
+    File extension for the image format `head` starts with, or None if it
+    isn't one we accept. The client's Content-Type is not trusted.
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def is_blob(name: str) -> bool:
+    return BLOB_NAME.match(name) is not None
+
+
+def avatar_key(sha256: str, extension: str) -> str:
+    return f"{AVATAR_PREFIX}/{sha256}{extension}"
+
+
+def is_avatar_key(key: str) -> bool:
+    return AVATAR_KEY.match(key) is not None
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Avatar must be at most {settings.AVATAR_MAX_BYTES} bytes",
+    )
+
+
+def _sniff_or_reject(head: bytes) -> str:
+    extension = sniff_image(head)
+    if extension is None:
+        raise HTTPException(status_code=400, detail="File must be an image")
+    return extension
+
+
+async def upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(settings.AVATAR_CHUNK_SIZE):
+        yield chunk
+
+
+async def store_image(
+    chunks: AsyncIterator[bytes], expected_key: Optional[str] = None
+) -> str:
+    """
+    Spool an incoming image to a temporary file as it arrives, then store it
+    under its content hash and return the key. Non-images are rejected on
+    the first bytes and oversized files as soon as they pass
+    AVATAR_MAX_BYTES. An identical image that is already stored is reused.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-")
+    os.close(fd)
+    digest = hashlib.sha256()
+    extension = None
+    head = b""
+    written = 0
+    try:
+        async with await anyio.open_file(path, "wb") as out:
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > settings.AVATAR_MAX_BYTES:
+                    raise too_large()
+                if extension is None:
+                    head += chunk
+                    if len(head) < SNIFF_BYTES:
+                        continue
+                    extension = _sniff_or_reject(head)
+                    chunk, head = head, b""
+                digest.update(chunk)
+                await out.write(chunk)
+            if extension is None:
+                extension = _sniff_or_reject(head)
+                digest.update(head)
+                await out.write(head)
+
+        key = avatar_key(digest.hexdigest(), extension)
+        if expected_key is not None and key != expected_key:
+            raise HTTPException(
+                status_code=400, detail="Upload does not match its checksum"
+            )
+        if await anyio.to_thread.run_sync(storage.exists, key):
+            # Refresh it so a concurrent GC run treats it as new
+            await anyio.to_thread.run_sync(storage.touch, key)
+        else:
+            await anyio.to_thread.run_sync(
+                storage.put_file, key, path, CONTENT_TYPES[extension]
+            )
+    finally:
+        await anyio.Path(path).unlink(missing_ok=True)
+    return key
+
+
+async def check_stored_image(key: str) -> None:
+    """
+    Validate an object a client uploaded straight to storage; anything
+    oversized or not an image is deleted again.
+    """
+    stored = await anyio.to_thread.run_sync(storage.stat, key)
+    if stored is None:
+        raise HTTPException(status_code=400, detail="Upload not found")
+    if stored.size > settings.AVATAR_MAX_BYTES:
+        await anyio.to_thread.run_sync(storage.delete, key)
+        raise too_large()
+    head = await anyio.to_thread.run_sync(storage.read_head, key, SNIFF_BYTES)
+    extension = sniff_image(head)
+    if extension is None or not key.endswith(extension):
+        await anyio.to_thread.run_sync(storage.delete, key)
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+
+def variant_keys(key: str, sizes: Sequence[int]) -> Dict[str, str]:
+    stem = os.path.splitext(key)[0]
+    return {str(size): f"{stem}_{size}.webp" for size in sizes}
+
+
+async def existing_variants(key: str, sizes: Sequence[int]) -> Optional[Dict[str, str]]:
+    """
+    The variants of `key` if an earlier upload of the same image already
+    generated all of them, else None.
+    """
+    variants = variant_keys(key, sizes)
+    for variant in variants.values():
+        if not await anyio.to_thread.run_sync(storage.exists, variant):
+            return None
+    for variant in variants.values():
+        await anyio.to_thread.run_sync(storage.touch, variant)
+    return variants
+
+
+def make_variants(storage: Storage, key: str, sizes: Sequence[int]) -> Dict[str, str]:
+    """
+    Store a square WebP thumbnail of `key` for each size, next to it. Runs
+    in the avatar worker processes.
+    """
+    from PIL import Image, ImageOps
+
+    variants = variant_keys(key, sizes)
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "source")
+        storage.download(key, source)
+        with Image.open(source) as image:
+            # Let JPEG decode at a reduced scale instead of full resolution
+            image.draft("RGB", (max(sizes), max(sizes)))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            for size in sizes:
+                path = os.path.join(workdir, f"{size}.webp")
+                thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                thumbnail.save(path, "WEBP", quality=85)
+                storage.put_file(variants[str(size)], path, "image/webp")
+    return variants
+
+
+class AvatarProcessor:
+    """
+    Resizes uploaded avatars in a separate process pool, so decoding and
+    resampling never run on the event loop or the request threadpool.
+    """
+
+    def __init__(self, workers: int, sizes: Sequence[int]):
+        self.workers = workers
+        self.sizes = tuple(sizes)
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent has an event loop and live DB pools
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def resize(self, key: str) -> Dict[str, str]:
+        """
+        Keys of the generated variants, by size.
+        """
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            variants = await loop.run_in_executor(
+                self._get_executor(), make_variants, storage, key, self.sizes
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return variants
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+avatar_processor = AvatarProcessor(
+    workers=settings.AVATAR_WORKERS, sizes=settings.AVATAR_SIZES
+)
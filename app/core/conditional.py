@@ -0,0 +1,42 @@
+import hashlib
+from typing import Any, Dict
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """
+    ETag over the row versions a response is built from. The app version is
+    mixed in so a schema change invalidates clients' copies. `weak` marks a
+    response whose parts don't cover every byte of it.
+    """
+    raw = repr((settings.VERSION,) + parts).encode()
+    etag = '"%s"' % hashlib.blake2b(raw, digest_size=16).hexdigest()
+    return f"W/{etag}" if weak else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = (candidate.strip() for candidate in header.split(","))
+    etag = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def cache_headers(route: str, etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": settings.CACHE_CONTROL.get(route, "no-cache"),
+    }
+
+
+def not_modified(route: str, etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(route, etag)
+    )
@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncResult
+
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.user import User
+
+EXPORT_COLUMNS = {
+    "articles": (
+        Article.id,
+        Article.title,
+        Article.summary,
+        Article.content,
+        Article.status,
+        Article.tags,
+        Article.author_id,
+        Article.comment_count,
+        Article.created_at,
+        Article.updated_at,
+    ),
+    "comments": (
+        Comment.id,
+        Comment.article_id,
+        Comment.author_id,
+        Comment.content,
+        Comment.created_at,
+        Comment.updated_at,
+    ),
+}
+# Removed articles and users are gone as far as exports are concerned, even
+# before they are purged
+EXPORT_FILTERS = {
+    "articles": (Article.deleted_at.is_(None),),
+    "comments": (
+        Comment.article.has(Article.deleted_at.is_(None)),
+        Comment.author.has(User.deleted_at.is_(None)),
+    ),
+}
+EXPORT_KINDS = tuple(EXPORT_COLUMNS)
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_statement(
+    kind: str, *, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> Select:
+    """
+    Plain column rows for `kind`, created in [since, until), in id order.
+    """
+    columns = EXPORT_COLUMNS[kind]
+    table = columns[0].class_
+    stmt = select(*columns).where(*EXPORT_FILTERS[kind]).order_by(table.id)
+    if since is not None:
+        stmt = stmt.where(table.created_at >= as_utc(since))
+    if until is not None:
+        stmt = stmt.where(table.created_at < as_utc(until))
+    return stmt
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    `value` as an aware UTC datetime; naive values are taken to be UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _csv_cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def encode_ndjson(columns: List[str], rows: Sequence) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(columns: List[str], rows: Sequence) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_cell(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+ENCODERS: Dict[str, Callable[[List[str], Sequence], str]] = {
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+}
+
+
+def _header(fmt: str, columns: List[str]) -> Optional[str]:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(columns)
+        return buffer.getvalue()
+    return None
+
+
+def iter_export(
+    conn: Connection,
+    kind: str,
+    fmt: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> Iterator[str]:
+    """
+    Encoded chunks of `batch_size` rows, read through a server-side cursor
+    so only one batch is ever held in memory.
+    """
+    stmt = export_statement(kind, since=since, until=until)
+    columns = list(stmt.selected_columns.keys())
+    encode = ENCODERS[fmt]
+    header = _header(fmt, columns)
+    if header:
+        yield header
+    result = conn.execution_options(yield_per=batch_size).execute(stmt)
+    for rows in result.partitions():
+        yield encode(columns, rows)
+
+
+async def astream_export(
+    conn: AsyncConnection,
+    kind: str,
+    fmt: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of `iter_export`. The query is started before this
+    returns the chunks, so a failing query raises here rather than midway
+    through a response that has already gone out with a 200.
+    """
+    stmt = export_statement(kind, since=since, until=until)
+    result = await conn.stream(stmt, execution_options={"yield_per": batch_size})
+    return _achunks(result, list(stmt.selected_columns.keys()), fmt)
+
+
+async def _achunks(
+    result: AsyncResult, columns: List[str], fmt: str
+) -> AsyncIterator[str]:
+    encode = ENCODERS[fmt]
+    header = _header(fmt, columns)
+    if header:
+        yield header
+    async for rows in result.partitions():
+        yield encode(columns, rows)
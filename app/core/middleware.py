@@ -0,0 +1,114 @@
+import logging
+import math
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.response_cache import bypass_cache
+from app.db.query_stats import QueryStats, track_queries
+from app.db.replicas import ReplicaSet, use_replica
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Unix time, in milliseconds, of the client's last successful write
+LAST_WRITE_COOKIE = "last_write"
+
+
+def query_headers(stats: QueryStats) -> dict:
+    duration = stats.duration * 1000
+    return {
+        "X-DB-Query-Count": str(stats.count),
+        "X-DB-Time-Ms": f"{duration:.1f}",
+        "X-DB-Repeated-Statements": str(len(stats.repeated())),
+        "Server-Timing": f'db;dur={duration:.1f};desc="{stats.count} queries"',
+    }
+
+
+class QueryStatsMiddleware:
+    """
+    Counts and times each request's SQL statements. Repeated statement
+    shapes are logged as likely N+1s; with DEBUG on, the totals are also
+    sent as response headers. Streamed responses only report what ran
+    before their headers went out.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    headers = MutableHeaders(scope=message)
+                    headers.update(query_headers(stats))
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        for statement, times in stats.repeated():
+            logger.warning(
+                "Possible N+1 in %s %s: %d executions of %s",
+                scope["method"],
+                scope["path"],
+                times,
+                " ".join(statement.split())[:200],
+            )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of GET and HEAD requests to a replica, and the rest to
+    the primary. A successful write sets a short-lived cookie that pins the
+    client for READ_YOUR_WRITES_WINDOW seconds: its reads go to the primary
+    and skip the response cache, so it reads its own writes even from
+    workers that didn't handle them. Pinning applies without replicas too,
+    since other workers' cached pages can be just as stale.
+    """
+
+    def __init__(self, app: ASGIApp, replicas: ReplicaSet):
+        self.app = app
+        self.replicas = replicas
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in SAFE_METHODS:
+            if self._recently_wrote(scope):
+                with use_replica(None), bypass_cache():
+                    await self.app(scope, receive, send)
+                return
+            await self.replicas.refresh()
+            with use_replica(self.replicas.pick()):
+                await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                max_age = math.ceil(settings.READ_YOUR_WRITES_WINDOW)
+                headers.append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={int(time.time() * 1000)}; "
+                    f"Max-Age={max_age}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    def _recently_wrote(self, scope: Scope) -> bool:
+        value = HTTPConnection(scope).cookies.get(LAST_WRITE_COOKIE, "")
+        if not value.isdigit():
+            return False
+        return time.time() * 1000 - int(value) < settings.READ_YOUR_WRITES_WINDOW * 1000
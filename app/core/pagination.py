@@ -1,36 +1,241 @@
-from typing import Generic, List, TypeVar
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar, Union
 
-from fastapi import Query
+from fastapi import HTTPException, Query, Request, status
 from pydantic import BaseModel
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 T = TypeVar("T")
+SortKey = Union[datetime, float]
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
 
 
 class PageParams:
     def __init__(
         self,
-        page: int = Query(1, ge=1, description="Page number"),
-        size: int = Query(10, ge=1, le=100, description="Items per page"),
+        request: Request,
+        page: int = Query(1, ge=1, description="Page number (offset mode)"),
+        size: int = Query(
+            DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Items per page"
+        ),
+        cursor: Optional[str] = Query(
+            None, description="Opaque cursor from a previous page (keyset mode)"
+        ),
     ):
+        self.request = request
         self.page = page
         self.size = size
         self.offset = (page - 1) * size
+        self.cursor = decode_cursor(cursor) if cursor else None
+
+
+class Cursor:
+    """
+    Position of a row in a keyset ordered by (key, id) descending, where `key`
+    is usually created_at but may be a numeric score such as a search rank.
+    `direction` is "next" for rows after the position and "prev" for rows before it.
+    """
+
+    def __init__(self, key: SortKey, id: int, direction: str = "next"):
+        self.key = key
+        self.id = id
+        self.direction = direction
+
+
+def encode_cursor(key: SortKey, id: int, direction: str) -> str:
+    data = {"i": id, "d": direction}
+    if isinstance(key, datetime):
+        data["c"] = key.isoformat()
+    else:
+        data["r"] = float(key)
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        if "c" in data:
+            key = datetime.fromisoformat(data["c"])
+        else:
+            key = float(data["r"])
+        return Cursor(key, int(data["i"]), direction)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
 
 
 class Page(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    # Counted for offset pages only; cursor pages leave them out rather than
+    # pay for a full COUNT on every step
+    total: Optional[int] = None
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    next: Optional[str] = None
+    prev: Optional[str] = None
+
+    model_config = {"from_attributes": True}
 
     @classmethod
-    def create(cls, items: List[T], total: int, params: PageParams):
-        pages = (total + params.size - 1) // params.size
+    def create(cls, items: List[T], total: Optional[int], params: PageParams):
         return cls(
             items=items,
             total=total,
             page=params.page,
             size=params.size,
-            pages=pages,
+            pages=_pages(total, params),
         )
+
+
+def apply_page(stmt: Select, params: PageParams, keys: Tuple[Any, Any]) -> Select:
+    """
+    Restrict `stmt` to the requested page.
+
+    `keys` is the (sort key, id) pair the listing is ordered by, normally
+    (created_at, id). With a cursor the query seeks past it with a row
+    comparison that a (created_at, id) index can answer directly instead of
+    skipping rows; one extra row is fetched so the caller can tell whether
+    another page exists.
+    """
+    key_col, id_col = keys
+    cursor = params.cursor
+
+    if cursor is None:
+        return (
+            stmt.order_by(key_col.desc(), id_col.desc())
+            .offset(params.offset)
+            .limit(params.size + 1)
+        )
+
+    position = tuple_(key_col, id_col)
+    if cursor.direction == "next":
+        seek = position < tuple_(cursor.key, cursor.id)
+        order = (key_col.desc(), id_col.desc())
+    else:
+        seek = position > tuple_(cursor.key, cursor.id)
+        order = (key_col.asc(), id_col.asc())
+
+    return stmt.where(seek).order_by(*order).limit(params.size + 1)
+
+
+def count_statement(stmt: Select) -> Select:
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def _pages(total: Optional[int], params: PageParams) -> Optional[int]:
+    if total is None:
+        return None
+    return (total + params.size - 1) // params.size
+
+
+def build_page(
+    rows: Sequence[Any],
+    total: Optional[int],
+    params: PageParams,
+    keys: Tuple[str, str],
+) -> dict:
+    """
+    Turn the rows fetched by `apply_page` into a page payload with cursors and links.
+
+    `keys` names the attributes holding (sort key, id) on each row; `total`
+    is None for cursor pages, which aren't counted.
+    """
+    key_attr, id_attr = keys
+    cursor = params.cursor
+    rows = list(rows)
+    has_more = len(rows) > params.size
+    rows = rows[: params.size]
+
+    if cursor is not None and cursor.direction == "prev":
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    elif cursor is not None:
+        has_next, has_prev = has_more, True
+    else:
+        has_next, has_prev = has_more, params.page > 1
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, key_attr), getattr(last, id_attr), "next"
+        )
+    if rows and has_prev:
+        first = rows[0]
+        prev_cursor = encode_cursor(
+            getattr(first, key_attr), getattr(first, id_attr), "prev"
+        )
+
+    return {
+        "items": rows,
+        "total": total,
+        "page": params.page,
+        "size": params.size,
+        "pages": _pages(total, params),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "next": _link(params, next_cursor),
+        "prev": _link(params, prev_cursor),
+    }
+
+
+def paginate(
+    db: Session, stmt: Select, params: PageParams, keys: Tuple[Any, Any]
+) -> dict:
+    """
+    Paginate `stmt`, ordered by the (sort key, id) pair in `keys`. Only
+    offset pages are counted: a COUNT scans every matching row, which would
+    undo what a cursor's index seek saves.
+    """
+    total = None
+    if params.cursor is None:
+        total = db.execute(count_statement(stmt)).scalar_one()
+    result = db.execute(apply_page(stmt, params, keys))
+    return build_page(_rows(result, stmt), total, params, _key_names(keys))
+
+
+async def apaginate(
+    db: AsyncSession, stmt: Select, params: PageParams, keys: Tuple[Any, Any]
+) -> dict:
+    """
+    Async counterpart of `paginate`.
+    """
+    total = None
+    if params.cursor is None:
+        total = (await db.execute(count_statement(stmt))).scalar_one()
+    result = await db.execute(apply_page(stmt, params, keys))
+    return build_page(_rows(result, stmt), total, params, _key_names(keys))
+
+
+def _rows(result: Any, stmt: Select) -> list:
+    # select(Model) yields one-element rows; unwrap them to the entities
+    descriptions = stmt.column_descriptions
+    if len(descriptions) == 1 and isinstance(descriptions[0]["expr"], type):
+        return list(result.scalars())
+    return list(result)
+
+
+def _key_names(keys: Tuple[Any, Any]) -> Tuple[str, str]:
+    return keys[0].key, keys[1].key
+
+
+def _link(params: PageParams, cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    url = params.request.url.remove_query_params("page")
+    return str(url.include_query_params(cursor=cursor, size=params.size))
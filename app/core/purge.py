@@ -0,0 +1,219 @@
+from typing import Callable, Optional, Set
+
+from sqlalchemy import ColumnElement, Update, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import (
+    ARTICLE_LIST_KEY,
+    article_key,
+    comments_key,
+    user_key,
+)
+from app.crud.crud_article import (
+    LIVE_ARTICLE,
+    commenters_update,
+    soft_delete_statement,
+    tag_deltas,
+    tag_deltas_upsert,
+)
+from app.crud.crud_user import LIVE_USER, RemovedUser
+from app.db.session import SessionLocal
+from app.models.article import Article
+from app.models.comment import Comment
+from app.models.user import User
+
+# Removing an article or a user happens in two steps. The soft delete sets
+# deleted_at and settles the counters in one short transaction, and reads
+# stop showing the rows from then on. The purge deletes the rows afterwards,
+# comments first, PURGE_BATCH_SIZE at a time with a commit after each batch,
+# so a thread with thousands of comments never turns into one long
+# transaction holding their locks. Counters only count live rows, so the
+# purge leaves them alone.
+
+
+def _user_statement(id: int) -> Update:
+    return (
+        update(User)
+        .where(User.id == id, LIVE_USER)
+        .values(deleted_at=func.now())
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+
+
+def _commented_statement(id: int) -> Update:
+    # Their comments leave the counts of the articles they are on
+    per_article = (
+        select(Comment.article_id, func.count(Comment.id).label("removed"))
+        .where(Comment.author_id == id)
+        .group_by(Comment.article_id)
+        .subquery()
+    )
+    return (
+        update(Article)
+        .where(Article.id == per_article.c.article_id, LIVE_ARTICLE)
+        .values(
+            comment_count=Article.comment_count - per_article.c.removed,
+            version=Article.version + 1,
+        )
+        .returning(Article.id, Article.author_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _removed_user(user, id, article_ids, commented, commenters) -> RemovedUser:
+    return RemovedUser(
+        user,
+        article_ids=sorted({*article_ids, *(row.id for row in commented)}),
+        user_ids=sorted({id, *commenters, *(row.author_id for row in commented)}),
+    )
+
+
+async def remove_user(db: AsyncSession, *, id: int) -> Optional[RemovedUser]:
+    """
+    Soft-delete a user with their articles, and take their comments and
+    articles off every counter, in one transaction; None if the user isn't
+    live. Runs a fixed number of set-based statements, however much the user
+    wrote.
+    """
+    user = (await db.scalars(_user_statement(id))).first()
+    if user is None:
+        return None
+    commented = (await db.execute(_commented_statement(id))).all()
+
+    # Their articles go as if removed one by one, in three statements
+    articles = list(await db.scalars(soft_delete_statement(Article.author_id == id)))
+    article_ids = [article.id for article in articles]
+    for stmt in tag_deltas_upsert(tag_deltas(articles, -1)):
+        await db.execute(stmt)
+    commenters = []
+    if article_ids:
+        commenters = list(
+            await db.scalars(
+                commenters_update(
+                    Comment.article_id.in_(article_ids), Comment.author_id != id
+                )
+            )
+        )
+    await db.commit()
+    return _removed_user(user, id, article_ids, commented, commenters)
+
+
+def remove_user_sync(db: Session, *, id: int) -> Optional[RemovedUser]:
+    """
+    `remove_user` on a sync session, for scripts.
+    """
+    user = db.scalars(_user_statement(id)).first()
+    if user is None:
+        return None
+    # Keep the returned row readable past the commit and the purge
+    db.expunge(user)
+    commented = db.execute(_commented_statement(id)).all()
+    articles = list(db.scalars(soft_delete_statement(Article.author_id == id)))
+    article_ids = [article.id for article in articles]
+    for stmt in tag_deltas_upsert(tag_deltas(articles, -1)):
+        db.execute(stmt)
+    commenters = []
+    if article_ids:
+        commenters = list(
+            db.scalars(
+                commenters_update(
+                    Comment.article_id.in_(article_ids), Comment.author_id != id
+                )
+            )
+        )
+    db.commit()
+    return _removed_user(user, id, article_ids, commented, commenters)
+
+
+def removed_user_keys(removed: RemovedUser) -> Set[str]:
+    """
+    Response cache keys of everything that showed something of the user's.
+    """
+    keys = {ARTICLE_LIST_KEY, *(user_key(user_id) for user_id in removed.user_ids)}
+    for article_id in removed.article_ids:
+        keys.update((article_key(article_id), comments_key(article_id)))
+    return keys
+
+
+def _delete_comments(db: Session, *where: ColumnElement, batch_size: int) -> int:
+    deleted = 0
+    while True:
+        batch = select(Comment.id).where(*where).limit(batch_size)
+        result = db.execute(
+            delete(Comment)
+            .where(Comment.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def purge_article(db: Session, id: int, batch_size: Optional[int] = None) -> int:
+    """
+    Delete a soft-deleted article's comments in batches, then the article.
+    Returns the number of comments deleted; live articles are left alone.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    removed = db.scalar(
+        select(Article.id).where(Article.id == id, Article.deleted_at.isnot(None))
+    )
+    if removed is None:
+        return 0
+    deleted = _delete_comments(db, Comment.article_id == id, batch_size=batch_size)
+    # Comments can't be added to a removed article, and the database
+    # cascades to any the batches missed
+    db.execute(delete(Article).where(Article.id == id))
+    db.commit()
+    return deleted
+
+
+def purge_user(db: Session, id: int, batch_size: Optional[int] = None) -> int:
+    """
+    Delete a soft-deleted user's comments in batches, then their articles
+    as `purge_article` does, then the user. Returns the number of comments
+    deleted; live users are left alone.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    removed = db.scalar(
+        select(User.id).where(User.id == id, User.deleted_at.isnot(None))
+    )
+    if removed is None:
+        return 0
+    deleted = _delete_comments(db, Comment.author_id == id, batch_size=batch_size)
+    article_ids = db.scalars(select(Article.id).where(Article.author_id == id)).all()
+    for article_id in article_ids:
+        deleted += purge_article(db, article_id, batch_size)
+    db.execute(delete(User).where(User.id == id))
+    db.commit()
+    return deleted
+
+
+def purge_removed(db: Session, batch_size: Optional[int] = None) -> dict:
+    """
+    Purge every soft-deleted user and article still in the database, e.g.
+    after a background purge was cut short by a restart.
+    """
+    user_ids = db.scalars(select(User.id).where(User.deleted_at.isnot(None))).all()
+    comments = sum(purge_user(db, user_id, batch_size) for user_id in user_ids)
+    article_ids = db.scalars(
+        select(Article.id).where(Article.deleted_at.isnot(None))
+    ).all()
+    comments += sum(
+        purge_article(db, article_id, batch_size) for article_id in article_ids
+    )
+    return {"users": len(user_ids), "articles": len(article_ids), "comments": comments}
+
+
+def purge_in_background(purge: Callable[[Session, int], int], id: int) -> None:
+    """
+    Run `purge_article` or `purge_user` on a session of its own. Meant for
+    BackgroundTasks: the function is sync, so FastAPI runs it in its
+    threadpool and the batches don't hold up the event loop.
+    """
+    with SessionLocal() as db:
+        purge(db, id)
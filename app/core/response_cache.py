@@ -0,0 +1,303 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.cache import TTLCache
+from app.core.conditional import cache_headers, etag_matches, not_modified
+from app.core.config import settings
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    body: bytes
+
+    def dump(self) -> bytes:
+        return (self.etag or "").encode() + b"\n" + self.body
+
+    @classmethod
+    def load(cls, raw: bytes) -> "CachedResponse":
+        etag, body = raw.split(b"\n", 1)
+        return cls(etag.decode() or None, body)
+
+
+class LoadCancelled(Exception):
+    """
+    Handed to the requests waiting on a load whose own request was
+    cancelled; they retry, and one of them takes the load over.
+    """
+
+
+class CacheBackend:
+    """
+    Shared store behind the in-process tier. Each key holds a hash of
+    variants (one per query string), so invalidating a key drops them all.
+    """
+
+    async def get(self, key: str, variant: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, variant: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+
+class LocalBackend(CacheBackend):
+    """
+    In-memory stand-in for a shared store, for tests and single-process
+    deployments.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float, max_variants: int):
+        self.max_variants = max_variants
+        self._data = TTLCache("response_shared", maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str, variant: str) -> Optional[bytes]:
+        return (self._data.get(key) or {}).get(variant)
+
+    async def set(self, key: str, variant: str, value: bytes, ttl: float) -> None:
+        variants = self._data.get(key) or {}
+        if variant in variants or len(variants) < self.max_variants:
+            self._data.set(key, {**variants, variant: value}, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.delete(key)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis hashes shared by every worker. Needs the `redis` package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "RESPONSE_CACHE_URL points at Redis but the redis package "
+                "is not installed"
+            )
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str, variant: str) -> Optional[bytes]:
+        return await self._client.hget(key, variant)
+
+    async def set(self, key: str, variant: str, value: bytes, ttl: float) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, variant, value)
+            # The first variant starts the clock; later ones don't extend it
+            pipe.expire(key, max(int(ttl), 1), nx=True)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+
+def backend_from_url(url: str) -> CacheBackend:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url == "memory://":
+        return LocalBackend(
+            maxsize=settings.RESPONSE_CACHE_SIZE,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_variants=settings.RESPONSE_CACHE_MAX_VARIANTS,
+        )
+    raise ValueError(f"Unsupported RESPONSE_CACHE_URL: {url}")
+
+
+# Set for requests that must see their client's own recent writes. A write
+# only clears the local tier of the worker that made it, and a memory://
+# shared tier is per process too, so other workers may still hold pages from
+# before it; such requests neither read nor fill the cache.
+cache_bypassed: ContextVar[bool] = ContextVar("cache_bypassed", default=False)
+
+
+@contextmanager
+def bypass_cache() -> Iterator[None]:
+    token = cache_bypassed.set(True)
+    try:
+        yield
+    finally:
+        cache_bypassed.reset(token)
+
+
+class ResponseCache:
+    """
+    Read-through cache of rendered JSON responses. Lookups try the
+    in-process LRU first and the shared backend second. Concurrent misses
+    for the same key and variant in this process share a single load.
+    Writers call `invalidate` with the keys their change affects.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        ttl: float,
+        local_size: int,
+        local_ttl: float,
+        max_variants: int,
+        enabled: bool = True,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self.enabled = enabled
+        self.local = TTLCache("response_local", maxsize=local_size, ttl=local_ttl)
+        self.loads = 0
+        self.coalesced = 0
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Loads that were running when their key was invalidated; their
+        # result may predate the write, so it is returned but not stored
+        self._stale: Set[Tuple[str, str]] = set()
+
+    async def get(self, key: str, variant: str) -> Optional[CachedResponse]:
+        if not self.enabled or cache_bypassed.get():
+            return None
+        entry = (self.local.get(key) or {}).get(variant)
+        if entry is not None:
+            return entry
+        raw = await self.backend.get(key, variant)
+        if raw is None:
+            return None
+        entry = CachedResponse.load(raw)
+        self._remember(key, variant, entry)
+        return entry
+
+    async def fetch(
+        self,
+        key: str,
+        variant: str,
+        loader: Callable[[], Awaitable[CachedResponse]],
+    ) -> CachedResponse:
+        """
+        Run `loader` and store its result, unless a load for the same key and
+        variant is already running, in which case wait for that one. If that
+        load's request is cancelled, the first waiter runs its own loader and
+        the rest wait on it instead.
+        """
+        if not self.enabled or cache_bypassed.get():
+            return await loader()
+        flight = (key, variant)
+        while flight in self._inflight:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(self._inflight[flight])
+            except LoadCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[flight] = future
+        try:
+            self.loads += 1
+            entry = await loader()
+            if flight not in self._stale:
+                await self.backend.set(key, variant, entry.dump(), self.ttl)
+                self._remember(key, variant, entry)
+        except asyncio.CancelledError:
+            # Not future.cancel(): that would cancel the waiters' requests too
+            future.set_exception(LoadCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't log it as unhandled
+            raise
+        else:
+            future.set_result(entry)
+            return entry
+        finally:
+            del self._inflight[flight]
+            self._stale.discard(flight)
+
+    async def invalidate(self, *keys: str) -> None:
+        if not self.enabled:
+            return
+        for key in keys:
+            self.local.delete(key)
+        self._stale.update(flight for flight in self._inflight if flight[0] in keys)
+        await self.backend.delete(*keys)
+
+    def _remember(self, key: str, variant: str, entry: CachedResponse) -> None:
+        variants = self.local.get(key) or {}
+        if variant in variants or len(variants) < self.max_variants:
+            self.local.set(key, {**variants, variant: entry})
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+# Cache keys, one per resource; query-string variants live under each key
+ARTICLE_LIST_KEY = "articles:list"
+
+
+def article_key(article_id: int) -> str:
+    return f"article:{article_id}"
+
+
+def comments_key(article_id: int) -> str:
+    return f"comments:{article_id}"
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+_adapters: Dict[object, TypeAdapter] = {}
+
+
+def render(model, data, **options) -> bytes:
+    """
+    Validate `data` (ORM objects or dicts) against `model` and encode it to
+    JSON, the same as FastAPI does for a response_model.
+    """
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.dump_json(
+        adapter.validate_python(data, from_attributes=True), **options
+    )
+
+
+def respond(request: Request, route: str, entry: CachedResponse) -> Response:
+    if entry.etag is None:
+        return Response(content=entry.body, media_type="application/json")
+    if etag_matches(request, entry.etag):
+        return not_modified(route, entry.etag)
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers=cache_headers(route, entry.etag),
+    )
+
+
+response_cache = ResponseCache(
+    backend_from_url(settings.RESPONSE_CACHE_URL),
+    ttl=settings.RESPONSE_CACHE_TTL,
+    local_size=settings.RESPONSE_CACHE_LOCAL_SIZE,
+    local_ttl=settings.RESPONSE_CACHE_LOCAL_TTL,
+    max_variants=settings.RESPONSE_CACHE_MAX_VARIANTS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
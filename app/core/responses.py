@@ -0,0 +1,26 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+# "Z" for UTC like Pydantic, and int keys (e.g. avatar sizes) as strings
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode dicts, lists and the row DTOs in app.schemas.rows to JSON in one
+    pass, without validating them against a schema first.
+    """
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response for content that is already in its response shape.
+    Returning it from an endpoint skips FastAPI's response_model
+    validation and jsonable_encoder; the response_model still documents it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,39 @@
+import os
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+
+from app.core.avatars import is_blob
+from app.core.conditional import cache_headers
+
+
+class UploadFiles(StaticFiles):
+    """
+    StaticFiles for /uploads. Content-addressed files never change under
+    their name, so the name doubles as a strong ETag and clients may keep
+    them without revalidating. Other files are served as usual.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope,
+        status_code: int = 200,
+    ) -> Response:
+        name = os.path.basename(full_path)
+        if not is_blob(name):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        etag = '"%s"' % os.path.splitext(name)[0]
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers=cache_headers("uploads.blob", etag),
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,304 @@
+import base64
+import hmac
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, Iterator, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from app.core.config import settings
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    modified: float  # unix time
+
+
+class Storage:
+    """
+    Where uploaded blobs live, addressed by keys such as
+    "avatars/<sha256>.png". Methods block; call them from a thread when on
+    the event loop. Instances are picklable so the avatar worker processes
+    can use them directly.
+    """
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def read_head(self, key: str, length: int) -> bytes:
+        raise NotImplementedError
+
+    def download(self, key: str, path: str) -> None:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        """
+        Store the local file at `path` under `key`. The file is consumed.
+        """
+        raise NotImplementedError
+
+    def touch(self, key: str) -> None:
+        """
+        Bump the object's modification time, so garbage collection treats it
+        as freshly uploaded.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        raise NotImplementedError
+
+    def url(self, key: str, base_url: str) -> str:
+        raise NotImplementedError
+
+    def presign_put(
+        self, key: str, *, content_type: str, sha256: str, base_url: str
+    ) -> Dict[str, object]:
+        """
+        URL and headers with which a client may PUT the object for `key`
+        itself, valid for STORAGE_PRESIGN_EXPIRES seconds.
+        """
+        raise NotImplementedError
+
+
+def _sign(key: str, expires: int) -> str:
+    message = f"{key}:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, "sha256").hexdigest()
+
+
+def verify_signature(key: str, expires: int, signature: str) -> bool:
+    return expires >= time.time() and hmac.compare_digest(
+        _sign(key, expires), signature
+    )
+
+
+class LocalStorage(Storage):
+    """
+    Files under `root`, served by the /uploads mount. Presigned PUTs go to
+    the API's own /uploads endpoint, since there is no separate store.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            result = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, result.st_size, result.st_mtime)
+
+    def read_head(self, key: str, length: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read(length)
+
+    def download(self, key: str, path: str) -> None:
+        shutil.copyfile(self._path(key), path)
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Move next to the target first (possibly across filesystems), then
+        # rename, so readers never see a partly written file
+        partial = os.path.join(os.path.dirname(target), f".upload-{uuid.uuid4().hex}")
+        shutil.move(path, partial)
+        os.replace(partial, target)
+
+    def touch(self, key: str) -> None:
+        os.utime(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        directory = self._path(prefix)
+        if not os.path.isdir(directory):
+            return
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                stat = entry.stat()
+                key = f"{prefix.rstrip('/')}/{entry.name}"
+                yield StoredObject(key, stat.st_size, stat.st_mtime)
+
+    def url(self, key: str, base_url: str) -> str:
+        return f"{base_url}/{self.root}/{key}"
+
+    def presign_put(
+        self, key: str, *, content_type: str, sha256: str, base_url: str
+    ) -> Dict[str, object]:
+        expires = int(time.time()) + settings.STORAGE_PRESIGN_EXPIRES
+        query = urlencode({"expires": expires, "signature": _sign(key, expires)})
+        return {
+            "url": f"{base_url}{settings.API_V1_STR}/uploads/{key}?{query}",
+            "headers": {"Content-Type": content_type},
+        }
+
+
+class S3Storage(Storage):
+    """
+    An S3 bucket, or any S3-compatible store (MinIO, moto_server) when
+    `endpoint_url` is set. Credentials come from the usual AWS environment
+    variables or config files. Needs the `boto3` package.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        public_url: Optional[str] = None,
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        if public_url is None:
+            public_url = (
+                f"{endpoint_url.rstrip('/')}/{bucket}"
+                if endpoint_url
+                else f"https://{bucket}.s3.amazonaws.com"
+            )
+        self.public_url = public_url.rstrip("/")
+        self._client = None
+
+    def __getstate__(self):
+        # boto3 clients can't be pickled; each process makes its own
+        return {**self.__dict__, "_client": None}
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3
+                from botocore.config import Config
+            except ImportError:
+                raise RuntimeError(
+                    "STORAGE_BACKEND is s3 but the boto3 package is not installed"
+                )
+            # SigV4, so presign_put's checksum is one of the signed headers
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region,
+                config=Config(signature_version="s3v4"),
+            )
+        return self._client
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(
+            key, head["ContentLength"], head["LastModified"].timestamp()
+        )
+
+    def read_head(self, key: str, length: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes=0-{length - 1}"
+        )
+        return response["Body"].read()
+
+    def download(self, key: str, path: str) -> None:
+        self.client.download_file(self.bucket, key, path)
+
+    def put_file(self, key: str, path: str, content_type: str) -> None:
+        self.client.upload_file(
+            path,
+            self.bucket,
+            key,
+            ExtraArgs={
+                "ContentType": content_type,
+                "CacheControl": settings.CACHE_CONTROL["uploads.blob"],
+            },
+        )
+        os.remove(path)
+
+    def touch(self, key: str) -> None:
+        # A server-side copy onto itself is the only way to bump LastModified
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType", "binary/octet-stream"),
+            CacheControl=head.get("CacheControl", ""),
+            Metadata=head.get("Metadata", {}),
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    item["Key"], item["Size"], item["LastModified"].timestamp()
+                )
+
+    def url(self, key: str, base_url: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def presign_put(
+        self, key: str, *, content_type: str, sha256: str, base_url: str
+    ) -> Dict[str, object]:
+        # The checksum is signed into the URL, so S3 itself rejects a body
+        # that doesn't hash to the key
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        cache_control = settings.CACHE_CONTROL["uploads.blob"]
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "CacheControl": cache_control,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=settings.STORAGE_PRESIGN_EXPIRES,
+        )
+        return {
+            "url": url,
+            "headers": {
+                "Content-Type": content_type,
+                "Cache-Control": cache_control,
+                "x-amz-checksum-sha256": checksum,
+            },
+        }
+
+
+def storage_from_settings() -> Storage:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.STORAGE_S3_BUCKET:
+            raise ValueError("STORAGE_BACKEND is s3 but STORAGE_S3_BUCKET is unset")
+        return S3Storage(
+            settings.STORAGE_S3_BUCKET,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+            public_url=settings.STORAGE_S3_PUBLIC_URL,
+        )
+    raise ValueError(f"Unsupported STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+storage = storage_from_settings()
@@ -1,5 +1,12 @@
-from .crud_article import article
-from .crud_comment import comment
-from .crud_user import user
+from .crud_article import article, async_article
+from .crud_comment import async_comment, comment
+from .crud_user import async_user, user
 
-__all__ = ["article", "comment", "user"]
+__all__ = [
+    "article",
+    "async_article",
+    "async_comment",
+    "async_user",
+    "comment",
+    "user",
+]
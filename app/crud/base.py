@@ -1,7 +1,27 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import (
+    ColumnElement,
+    Executable,
+    delete,
+    insert,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.base_class import Base
@@ -10,6 +30,66 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Writes commit once, at the end of the CRUD method that makes them, and
+# load the rows they return with INSERT/UPDATE ... RETURNING rather than a
+# refresh after the commit. The session keeps the returned objects loaded
+# (expire_on_commit=False), so responses need no further round trips.
+
+
+def insert_statement(model: Type[ModelType], values: Dict[str, Any]) -> Executable:
+    return insert(model).values(**values).returning(model)
+
+
+def insert_many_statement(model: Type[ModelType]) -> Executable:
+    """
+    INSERT ... RETURNING to execute with a list of rows; returns the new
+    objects in the order of the rows.
+    """
+    return insert(model).returning(model, sort_by_parameter_order=True)
+
+
+def update_statement(
+    model: Type[ModelType], update_data: Dict[str, Any], *where: ColumnElement
+) -> Optional[Executable]:
+    """
+    UPDATE ... RETURNING of the model's columns that are in `update_data`,
+    and only those, on the rows matching `where`. Reloads the session's
+    copies of the rows in place; None if there is nothing to set.
+    """
+    columns = inspect(model).column_attrs
+    values = {key: value for key, value in update_data.items() if key in columns}
+    if not values:
+        return None
+    return (
+        update(model)
+        .where(*_required(where))
+        .values(**values)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+
+
+def delete_statement(model: Type[ModelType], *where: ColumnElement) -> Executable:
+    return delete(model).where(*_required(where)).returning(model)
+
+
+def _required(where: Sequence[ColumnElement]) -> Sequence[ColumnElement]:
+    # A bulk statement without conditions would hit every row in the table
+    if not where:
+        raise ValueError("Bulk updates and deletes need at least one condition")
+    return where
+
+
+def _update_data(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(obj_in, dict):
+        return obj_in
+    return obj_in.model_dump(exclude_unset=True)
+
+
+# The bulk methods (create_many, update_where, remove_where) don't know about
+# counters kept on other tables; CRUD classes whose rows feed counters
+# override them to keep them in step, as crud.article and crud.comment do.
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -31,12 +111,24 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     def create(self, db: Session, *, obj_in: CreateSchemaType, **kwargs) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, **kwargs)  # type: ignore
-        db.add(db_obj)
+        stmt = insert_statement(self.model, {**obj_in_data, **kwargs})
+        db_obj = db.scalars(stmt).one()
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[CreateSchemaType], **kwargs
+    ) -> List[ModelType]:
+        """
+        Insert `objs_in` in one statement, with `kwargs` set on every row.
+        """
+        if not objs_in:
+            return []
+        rows = [{**jsonable_encoder(obj_in), **kwargs} for obj_in in objs_in]
+        db_objs = list(db.scalars(insert_many_statement(self.model), rows))
+        db.commit()
+        return db_objs
+
     def update(
         self,
         db: Session,
@@ -44,21 +136,122 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        stmt = update_statement(
+            self.model, _update_data(obj_in), self.model.id == db_obj.id
+        )
+        if stmt is not None:
+            db_obj = db.scalars(stmt).one()
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
+    def update_where(
+        self,
+        db: Session,
+        *where: ColumnElement,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> List[ModelType]:
+        """
+        Set the fields in `obj_in` on every row matching `where`, in one
+        statement, and return the updated rows.
+        """
+        stmt = update_statement(self.model, _update_data(obj_in), *where)
+        if stmt is None:
+            return []
+        db_objs = list(db.scalars(stmt))
+        db.commit()
+        return db_objs
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
         return obj
+
+    def remove_where(self, db: Session, *where: ColumnElement) -> List[ModelType]:
+        """
+        Delete every row matching `where` in one statement and return them.
+        Unlike `remove`, ORM cascades don't run; the database's ON DELETE
+        rules do.
+        """
+        db_objs = list(db.scalars(delete_statement(self.model, *where)))
+        db.commit()
+        return db_objs
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        Async counterpart of `CRUDBase`, used by the API routers.
+        **Parameters**
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars())
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType, **kwargs
+    ) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        stmt = insert_statement(self.model, {**obj_in_data, **kwargs})
+        db_obj = (await db.scalars(stmt)).one()
+        await db.commit()
+        return db_obj
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[CreateSchemaType], **kwargs
+    ) -> List[ModelType]:
+        if not objs_in:
+            return []
+        rows = [{**jsonable_encoder(obj_in), **kwargs} for obj_in in objs_in]
+        db_objs = list(await db.scalars(insert_many_statement(self.model), rows))
+        await db.commit()
+        return db_objs
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        stmt = update_statement(
+            self.model, _update_data(obj_in), self.model.id == db_obj.id
+        )
+        if stmt is not None:
+            db_obj = (await db.scalars(stmt)).one()
+        await db.commit()
+        return db_obj
+
+    async def update_where(
+        self,
+        db: AsyncSession,
+        *where: ColumnElement,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> List[ModelType]:
+        stmt = update_statement(self.model, _update_data(obj_in), *where)
+        if stmt is None:
+            return []
+        db_objs = list(await db.scalars(stmt))
+        await db.commit()
+        return db_objs
+
+    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
+        return obj
+
+    async def remove_where(
+        self, db: AsyncSession, *where: ColumnElement
+    ) -> List[ModelType]:
+        db_objs = list(await db.scalars(delete_statement(self.model, *where)))
+        await db.commit()
+        return db_objs
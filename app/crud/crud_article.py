@@ -1,35 +1,793 @@
-from typing import List
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import (
+    ColumnElement,
+    Executable,
+    Float,
+    Select,
+    Update,
+    case,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.crud.base import CRUDBase
-from app.models.article import Article
+from app.core.pagination import PageParams, apaginate, paginate
+from app.crud.base import (
+    AsyncCRUDBase,
+    CRUDBase,
+    _required,
+    insert_many_statement,
+    insert_statement,
+    update_statement,
+)
+from app.crud.crud_comment import comment_row, select_latest
+from app.crud.crud_user import AUTHOR_COLUMNS, author_row, counter_update
+from app.models.article import SEARCH_CONFIG, Article
+from app.models.comment import Comment
+from app.models.tag_count import TagCount
+from app.models.user import User
 from app.schemas.article import ArticleCreate, ArticleUpdate
+from app.schemas.rows import ArticleRow
+
+STATUSES = ("draft", "published")
+
+# Comments embedded in an article by default; the rest are paged through
+# /comments/article/{id}. `comment_count` carries the total.
+EMBEDDED_COMMENTS = 10
+MAX_EMBEDDED_COMMENTS = 100
+
+# Fields a card listing returns when `fields=` is not narrowed further
+CARD_FIELDS = (
+    "id",
+    "title",
+    "summary",
+    "tags",
+    "status",
+    "author_id",
+    "author_name",
+    "comment_count",
+    "created_at",
+)
+CARD_SELECTABLE_FIELDS = CARD_FIELDS + ("content",)
+
+KEYSET = (Article.created_at, Article.id)
+
+# Soft-deleted articles are left out of every read; see `CRUDArticle.remove`
+LIVE_ARTICLE = Article.deleted_at.is_(None)
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15"
+SNIPPET_OPTIONS = HEADLINE_OPTIONS + ", MaxFragments=2"
+
+
+def filter_clauses(
+    *,
+    tags: Sequence[str] = (),
+    status: Optional[str] = None,
+    author_id: Optional[int] = None,
+) -> list:
+    """
+    WHERE clauses for the listing facets. Tags use array containment (@>),
+    so an article must carry every requested tag; the GIN index on tags
+    answers it.
+    """
+    clauses = []
+    if tags:
+        clauses.append(Article.tags.contains(list(tags)))
+    if status is not None:
+        clauses.append(Article.status == status)
+    if author_id is not None:
+        clauses.append(Article.author_id == author_id)
+    return clauses
+
+
+# Columns of a full article response, in ArticleResponse order
+ARTICLE_COLUMNS = (
+    Article.title,
+    Article.content,
+    Article.summary,
+    Article.tags,
+    Article.status,
+    Article.id,
+    Article.author_id,
+    Article.comment_count,
+    Article.created_at,
+)
+
+
+def select_full() -> Select:
+    """
+    Articles with their author, as plain rows for `article_row`. Comments
+    are never loaded here; see `embed_latest_comments`.
+    """
+    return (
+        select(*ARTICLE_COLUMNS, *AUTHOR_COLUMNS)
+        .join(User, User.id == Article.author_id)
+        .where(LIVE_ARTICLE)
+    )
+
+
+def article_row(row) -> ArticleRow:
+    return ArticleRow(
+        title=row.title,
+        content=row.content,
+        summary=row.summary,
+        # The column is nullable; rows written around the API may hold NULL
+        tags=row.tags or [],
+        status=row.status,
+        id=row.id,
+        author_id=row.author_id,
+        author=author_row(row),
+        comment_count=row.comment_count,
+        created_at=row.created_at,
+    )
+
+
+async def embed_latest_comments(
+    db: AsyncSession, articles: Sequence[ArticleRow], limit: int = EMBEDDED_COMMENTS
+) -> None:
+    """
+    Fill each article's `comments` with only its newest `limit` comments, in
+    one extra SELECT.
+    """
+    latest = defaultdict(list)
+    ids = [article.id for article in articles]
+    if ids and limit > 0:
+        for row in await db.execute(select_latest(ids, limit)):
+            latest[row.article_id].append(comment_row(row))
+    for article in articles:
+        article.comments = latest[article.id]
+
+
+def select_cards(fields: Set[str]) -> Select:
+    """
+    Plain column rows for the requested card `fields`. `id` and `created_at`
+    are always selected because pagination cursors are built from them.
+    """
+    columns = [Article.id, Article.created_at]
+    for name in CARD_SELECTABLE_FIELDS:
+        if name not in fields or name in ("id", "created_at"):
+            continue
+        if name == "author_name":
+            columns.append(User.full_name.label("author_name"))
+        else:
+            columns.append(getattr(Article, name))
+
+    stmt = select(*columns).where(LIVE_ARTICLE)
+    if "author_name" in fields:
+        stmt = stmt.join(User, User.id == Article.author_id)
+    return stmt
+
+
+def search_query(q: str):
+    # websearch syntax: quoted phrases, OR, and -excluded terms; never errors
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def select_search(q: str) -> Select:
+    """
+    Articles whose stored search vector matches `q`, with their rank. The @@
+    match is answered by the GIN index on search_vector.
+    """
+    query = search_query(q)
+    rank = func.ts_rank_cd(Article.search_vector, query, type_=Float).label("rank")
+    return (
+        select(
+            Article.id,
+            Article.title,
+            Article.summary,
+            Article.author_id,
+            User.full_name.label("author_name"),
+            Article.created_at,
+            rank,
+        )
+        .join(User, User.id == Article.author_id)
+        .where(LIVE_ARTICLE, Article.search_vector.bool_op("@@")(query))
+    )
+
+
+def _escape_html(column):
+    return func.replace(
+        func.replace(func.replace(column, "&", "&amp;"), "<", "&lt;"), ">", "&gt;"
+    )
+
+
+def select_headlines(q: str, ids: List[int]) -> Select:
+    """
+    Highlighted title and content snippets for `ids`. ts_headline re-parses
+    the text, so it only runs for the rows on the current page. The text is
+    HTML-escaped first so `<mark>` is the only markup in the output.
+    """
+    query = search_query(q)
+    return select(
+        Article.id,
+        func.ts_headline(
+            SEARCH_CONFIG, _escape_html(Article.title), query, HEADLINE_OPTIONS
+        ).label("title_highlight"),
+        func.ts_headline(
+            SEARCH_CONFIG, _escape_html(Article.content), query, SNIPPET_OPTIONS
+        ).label("snippet"),
+    ).where(Article.id.in_(ids))
+
+
+def tag_count_updates(
+    tags: Optional[Sequence[str]], status: Optional[str], delta: int
+) -> List[Executable]:
+    """
+    Upsert moving the (tag, status) counts for `tags` by `delta`. Tags are
+    sorted so concurrent writers lock tag_counts rows in the same order.
+    """
+    if status is None:
+        return []
+    return tag_deltas_upsert({(tag, status): delta for tag in set(tags or ())})
+
+
+def tag_deltas_upsert(deltas: Dict[Tuple[str, str], int]) -> List[Executable]:
+    """
+    Upsert moving each (tag, status) count by its delta, in one statement
+    however many articles the deltas add up.
+    """
+    if not deltas:
+        return []
+    stmt = insert(TagCount).values(
+        [
+            {"tag": tag, "status": status, "article_count": delta}
+            for (tag, status), delta in sorted(deltas.items())
+        ]
+    )
+    return [
+        stmt.on_conflict_do_update(
+            index_elements=[TagCount.tag, TagCount.status],
+            set_={
+                "article_count": TagCount.article_count + stmt.excluded.article_count
+            },
+        )
+    ]
+
+
+def tag_deltas(articles: Iterable[Article], delta: int) -> Counter:
+    """
+    (tag, status) count deltas for adding (`delta` 1) or taking away (-1)
+    each of `articles` as it stands.
+    """
+    deltas = Counter()
+    for article in articles:
+        if article.status is not None:
+            for tag in set(article.tags or ()):
+                deltas[tag, article.status] += delta
+    return deltas
+
+
+def article_count_update(per_author: Counter) -> Update:
+    """
+    Statement moving each author's article_count by their delta in
+    `per_author`, in one statement however many authors there are.
+    """
+    return (
+        update(User)
+        .where(User.id.in_(sorted(per_author)))
+        .values(article_count=User.article_count + case(per_author, value=User.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bulk_updated_counter_updates(
+    articles: Sequence[Article], update_data: Dict[str, Any]
+) -> List[Executable]:
+    """
+    Statements moving the tag and author counters from `articles` as they
+    are to `articles` with `update_data` applied, one per table.
+    """
+    tags_changed = "tags" in update_data or "status" in update_data
+    deltas = tag_deltas(articles, -1) if tags_changed else Counter()
+    per_author = Counter()
+    for article in articles:
+        if tags_changed:
+            status = update_data.get("status", article.status)
+            if status is not None:
+                for tag in set(update_data.get("tags", article.tags) or ()):
+                    deltas[tag, status] += 1
+        author_id = update_data.get("author_id", article.author_id)
+        if author_id != article.author_id:
+            per_author[article.author_id] -= 1
+            per_author[author_id] += 1
+    statements = tag_deltas_upsert(
+        {key: delta for key, delta in deltas.items() if delta}
+    )
+    if per_author:
+        statements.append(article_count_update(per_author))
+    return statements
+
+
+def bulk_removed_counter_updates(articles: Sequence[Article]) -> List[Executable]:
+    """
+    `removed_counter_updates` for many articles, one statement per table.
+    """
+    per_author = Counter()
+    for article in articles:
+        per_author[article.author_id] -= 1
+    return [
+        commenters_update(Comment.article_id.in_([article.id for article in articles])),
+        article_count_update(per_author),
+        *tag_deltas_upsert(tag_deltas(articles, -1)),
+    ]
+
+
+def select_commenters(article_ids: Sequence[int]) -> Select:
+    return (
+        select(Comment.article_id, Comment.author_id)
+        .where(Comment.article_id.in_(article_ids))
+        .distinct()
+    )
+
+
+def updated_counter_updates(
+    article: Article, update_data: Dict[str, Any]
+) -> List[Executable]:
+    tags = update_data.get("tags", article.tags)
+    status = update_data.get("status", article.status)
+    if (sorted(set(tags or ())), status) == (
+        sorted(set(article.tags or ())),
+        article.status,
+    ):
+        return []
+    return [
+        *tag_count_updates(article.tags, article.status, -1),
+        *tag_count_updates(tags, status, 1),
+    ]
+
+
+def soft_delete_statement(*where) -> Update:
+    """
+    Mark the live articles matching `where` deleted, returning them. Bumps
+    their versions so cached copies and ETags go stale.
+    """
+    return (
+        update(Article)
+        .where(*where, LIVE_ARTICLE)
+        .values(deleted_at=func.now(), version=Article.version + 1)
+        .returning(Article)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+def commenters_update(*where) -> Update:
+    """
+    Take the comments matching `where` off their authors' comment counts, in
+    one statement, returning the ids of the authors.
+    """
+    per_author = (
+        select(Comment.author_id, func.count(Comment.id).label("removed"))
+        .where(*where)
+        .group_by(Comment.author_id)
+        .subquery()
+    )
+    return (
+        update(User)
+        .where(User.id == per_author.c.author_id)
+        .values(comment_count=User.comment_count - per_author.c.removed)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class RemovedArticle(NamedTuple):
+    article: Article
+    # Users whose comments went with it
+    commenter_ids: List[int]
+
+
+def removed_counter_updates(article: Article) -> List[Executable]:
+    """
+    Statements taking a removed article off the counters. The first takes
+    its comments off their authors' counts and returns the authors' ids.
+    """
+    return [
+        commenters_update(Comment.article_id == article.id),
+        update(User)
+        .where(User.id == article.author_id)
+        .values(article_count=User.article_count - 1),
+        *tag_count_updates(article.tags, article.status, -1),
+    ]
+
+
+def _attach(article: Article, author: User) -> Article:
+    # A new article has no comments; set without marking it dirty
+    set_committed_value(article, "author", author)
+    set_committed_value(article, "comments", [])
+    return article
+
+
+def _update_data(obj_in: Union[ArticleUpdate, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(obj_in, dict):
+        return obj_in
+    return obj_in.model_dump(exclude_unset=True)
+
+
+def touched(update_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Every edit bumps the version, even one that changes nothing
+    return {
+        **update_data,
+        "version": Article.version + 1,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def select_version(id: int) -> Select:
+    """
+    What the article's representations depend on: its version plus the
+    newest comment edit. Cheap enough to run before every detail request.
+    """
+    last_comment_at = (
+        select(func.max(Comment.updated_at))
+        .where(Comment.article_id == Article.id)
+        .scalar_subquery()
+    )
+    return select(Article.version, last_comment_at.label("last_comment_at")).where(
+        Article.id == id, LIVE_ARTICLE
+    )
+
+
+def select_tag_counts(*, status: str, prefix: Optional[str], limit: int) -> Select:
+    stmt = select(TagCount.tag, TagCount.article_count.label("count")).where(
+        TagCount.status == status, TagCount.article_count > 0
+    )
+    if prefix:
+        stmt = stmt.where(TagCount.tag.startswith(prefix, autoescape=True))
+    return stmt.order_by(TagCount.article_count.desc(), TagCount.tag).limit(limit)
+
+
+def select_author_tag_counts(
+    *, author_id: int, status: str, prefix: Optional[str], limit: int
+) -> Select:
+    """
+    Tag counts over one author's articles. tag_counts only keeps site-wide
+    totals, so these are counted from the author's articles directly.
+    """
+    tags = (
+        select(Article.id, func.unnest(Article.tags).label("tag"))
+        .where(Article.author_id == author_id, Article.status == status, LIVE_ARTICLE)
+        .subquery()
+    )
+    count = func.count(tags.c.id.distinct())
+    stmt = select(tags.c.tag, count.label("count")).group_by(tags.c.tag)
+    if prefix:
+        stmt = stmt.where(tags.c.tag.startswith(prefix, autoescape=True))
+    return stmt.order_by(count.desc(), tags.c.tag).limit(limit)
 
 
 class CRUDArticle(CRUDBase[Article, ArticleCreate, ArticleUpdate]):
     def create(self, db: Session, *, obj_in: ArticleCreate, author_id: int) -> Article:
-        article = super().create(db, obj_in=obj_in, author_id=author_id)
+        values = {**jsonable_encoder(obj_in), "author_id": author_id}
+        article = db.scalars(insert_statement(Article, values)).one()
+        author = db.scalars(counter_update(author_id, article_count=1)).one()
+        for stmt in tag_count_updates(article.tags, article.status, 1):
+            db.execute(stmt)
         db.commit()
-        return article
+        return _attach(article, author)
 
-    def remove(self, db: Session, *, id: int) -> Article:
-        article = db.query(self.model).get(id)
-        if article:
-            db.delete(article)
-            db.commit()
-        return article
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[ArticleCreate], author_id: int
+    ) -> List[Article]:
+        """
+        Insert `objs_in` in one statement, and count them on their author and
+        tags in the same transaction.
+        """
+        if not objs_in:
+            return []
+        rows = [
+            {**jsonable_encoder(obj_in), "author_id": author_id} for obj_in in objs_in
+        ]
+        articles = list(db.scalars(insert_many_statement(Article), rows))
+        update_author = counter_update(author_id, article_count=len(articles))
+        author = db.scalars(update_author).one()
+        for stmt in tag_deltas_upsert(tag_deltas(articles, 1)):
+            db.execute(stmt)
+        db.commit()
+        return [_attach(article, author) for article in articles]
 
-    def get_by_author(
-        self, db: Session, *, author_id: int, skip: int = 0, limit: int = 100
+    def update_where(
+        self,
+        db: Session,
+        *where: ColumnElement,
+        obj_in: Union[ArticleUpdate, Dict[str, Any]],
     ) -> List[Article]:
-        return (
-            db.query(self.model)
-            .filter(Article.author_id == author_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        """
+        Set the fields in `obj_in` on every live article matching `where`,
+        and move the tag and author counters with them. See
+        `AsyncCRUDArticle.update_where`.
+        """
+        update_data = _update_data(obj_in)
+        stmt = select(Article).where(*_required(where), LIVE_ARTICLE).with_for_update()
+        articles = list(db.scalars(stmt))
+        if not articles:
+            db.rollback()
+            return []
+        for stmt in bulk_updated_counter_updates(articles, update_data):
+            db.execute(stmt)
+        ids = [article.id for article in articles]
+        stmt = update_statement(Article, touched(update_data), Article.id.in_(ids))
+        updated = list(db.scalars(stmt))
+        db.commit()
+        return updated
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Article,
+        obj_in: Union[ArticleUpdate, Dict[str, Any]],
+    ) -> Article:
+        update_data = _update_data(obj_in)
+        for stmt in updated_counter_updates(db_obj, update_data):
+            db.execute(stmt)
+        return super().update(db, db_obj=db_obj, obj_in=touched(update_data))
+
+    def remove(self, db: Session, *, id: int) -> Optional[RemovedArticle]:
+        """
+        Soft-delete an article, or return None if it isn't live. See
+        `AsyncCRUDArticle.remove`.
+        """
+        article = db.scalars(soft_delete_statement(Article.id == id)).first()
+        if article is None:
+            return None
+        update_commenters, *updates = removed_counter_updates(article)
+        commenter_ids = list(db.scalars(update_commenters))
+        for stmt in updates:
+            db.execute(stmt)
+        db.commit()
+        return RemovedArticle(article, commenter_ids)
+
+    def remove_where(self, db: Session, *where: ColumnElement) -> List[RemovedArticle]:
+        """
+        Soft-delete the live articles matching `where`. See
+        `AsyncCRUDArticle.remove_where`.
+        """
+        stmt = soft_delete_statement(*_required(where))
+        articles = list(db.scalars(stmt))
+        if not articles:
+            db.rollback()
+            return []
+        ids = [article.id for article in articles]
+        commenters = defaultdict(list)
+        for row in db.execute(select_commenters(ids)):
+            commenters[row.article_id].append(row.author_id)
+        for stmt in bulk_removed_counter_updates(articles):
+            db.execute(stmt)
+        db.commit()
+        return [RemovedArticle(article, commenters[article.id]) for article in articles]
+
+    def get_by_author(self, db: Session, *, author_id: int, params: PageParams) -> dict:
+        stmt = select(Article).where(Article.author_id == author_id, LIVE_ARTICLE)
+        return paginate(db, stmt, params, KEYSET)
+
+
+class AsyncCRUDArticle(AsyncCRUDBase[Article, ArticleCreate, ArticleUpdate]):
+    async def create(
+        self, db: AsyncSession, *, obj_in: ArticleCreate, author_id: int
+    ) -> Article:
+        """
+        Insert the article and bump the author's and tags' counters in one
+        transaction; the article and author come back from RETURNING.
+        """
+        values = {**jsonable_encoder(obj_in), "author_id": author_id}
+        article = (await db.scalars(insert_statement(Article, values))).one()
+        author = (await db.scalars(counter_update(author_id, article_count=1))).one()
+        for stmt in tag_count_updates(article.tags, article.status, 1):
+            await db.execute(stmt)
+        await db.commit()
+        return _attach(article, author)
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[ArticleCreate], author_id: int
+    ) -> List[Article]:
+        """
+        Insert `objs_in` in one statement, and count them on their author and
+        tags in the same transaction.
+        """
+        if not objs_in:
+            return []
+        rows = [
+            {**jsonable_encoder(obj_in), "author_id": author_id} for obj_in in objs_in
+        ]
+        articles = list(await db.scalars(insert_many_statement(Article), rows))
+        update_author = counter_update(author_id, article_count=len(articles))
+        author = (await db.scalars(update_author)).one()
+        for stmt in tag_deltas_upsert(tag_deltas(articles, 1)):
+            await db.execute(stmt)
+        await db.commit()
+        return [_attach(article, author) for article in articles]
+
+    async def update_where(
+        self,
+        db: AsyncSession,
+        *where: ColumnElement,
+        obj_in: Union[ArticleUpdate, Dict[str, Any]],
+    ) -> List[Article]:
+        """
+        Set the fields in `obj_in` on every live article matching `where`,
+        and move the tag and author counters with them, in a fixed number of
+        statements. The articles are locked first, so the counters move from
+        the values the update replaces.
+        """
+        update_data = _update_data(obj_in)
+        stmt = select(Article).where(*_required(where), LIVE_ARTICLE).with_for_update()
+        articles = list(await db.scalars(stmt))
+        if not articles:
+            await db.rollback()
+            return []
+        for stmt in bulk_updated_counter_updates(articles, update_data):
+            await db.execute(stmt)
+        ids = [article.id for article in articles]
+        stmt = update_statement(Article, touched(update_data), Article.id.in_(ids))
+        updated = list(await db.scalars(stmt))
+        await db.commit()
+        return updated
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Article,
+        obj_in: Union[ArticleUpdate, Dict[str, Any]],
+    ) -> Article:
+        update_data = _update_data(obj_in)
+        for stmt in updated_counter_updates(db_obj, update_data):
+            await db.execute(stmt)
+        return await super().update(db, db_obj=db_obj, obj_in=touched(update_data))
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[RemovedArticle]:
+        """
+        Soft-delete an article, or return None if it isn't live. It drops out
+        of reads and counters at once, in a transaction that doesn't touch
+        its comments, however many there are; app.core.purge deletes the
+        rows later, in batches.
+        """
+        article = (await db.scalars(soft_delete_statement(Article.id == id))).first()
+        if article is None:
+            return None
+        update_commenters, *updates = removed_counter_updates(article)
+        commenter_ids = list(await db.scalars(update_commenters))
+        for stmt in updates:
+            await db.execute(stmt)
+        await db.commit()
+        return RemovedArticle(article, commenter_ids)
+
+    async def remove_where(
+        self, db: AsyncSession, *where: ColumnElement
+    ) -> List[RemovedArticle]:
+        """
+        Soft-delete the live articles matching `where`, e.g. all of a
+        spammer's, and take them off the counters, in a fixed number of
+        statements. As with `remove`, app.core.purge deletes the rows later.
+        """
+        stmt = soft_delete_statement(*_required(where))
+        articles = list(await db.scalars(stmt))
+        if not articles:
+            await db.rollback()
+            return []
+        ids = [article.id for article in articles]
+        commenters = defaultdict(list)
+        for row in await db.execute(select_commenters(ids)):
+            commenters[row.article_id].append(row.author_id)
+        for stmt in bulk_removed_counter_updates(articles):
+            await db.execute(stmt)
+        await db.commit()
+        return [RemovedArticle(article, commenters[article.id]) for article in articles]
+
+    async def version(self, db: AsyncSession, *, id: int):
+        """
+        (version, last_comment_at) for the article, or None if it doesn't exist.
+        """
+        return (await db.execute(select_version(id))).first()
+
+    async def get_full(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        include: Set[str],
+        comments_limit: int = EMBEDDED_COMMENTS,
+    ) -> Optional[ArticleRow]:
+        row = (await db.execute(select_full().where(Article.id == id))).first()
+        article = article_row(row) if row else None
+        if article and "comments" in include:
+            await embed_latest_comments(db, [article], comments_limit)
+        return article
+
+    async def get_card(self, db: AsyncSession, *, id: int, fields: Set[str]):
+        result = await db.execute(select_cards(fields).where(Article.id == id))
+        return result.first()
+
+    async def list_full(
+        self,
+        db: AsyncSession,
+        *,
+        include: Set[str],
+        params: PageParams,
+        filters: Sequence = (),
+    ) -> dict:
+        page = await apaginate(db, select_full().where(*filters), params, KEYSET)
+        page["items"] = [article_row(row) for row in page["items"]]
+        if "comments" in include:
+            await embed_latest_comments(db, page["items"])
+        return page
+
+    async def list_cards(
+        self,
+        db: AsyncSession,
+        *,
+        fields: Set[str],
+        params: PageParams,
+        filters: Sequence = (),
+    ) -> dict:
+        stmt = select_cards(fields).where(*filters)
+        return await apaginate(db, stmt, params, KEYSET)
+
+    async def tag_counts(
+        self,
+        db: AsyncSession,
+        *,
+        status: str = "published",
+        prefix: Optional[str] = None,
+        limit: int = 50,
+        author_id: Optional[int] = None,
+    ) -> list:
+        if author_id is not None:
+            stmt = select_author_tag_counts(
+                author_id=author_id, status=status, prefix=prefix, limit=limit
+            )
+        else:
+            stmt = select_tag_counts(status=status, prefix=prefix, limit=limit)
+        return list(await db.execute(stmt))
+
+    async def get_by_author(
+        self, db: AsyncSession, *, author_id: int, params: PageParams
+    ) -> dict:
+        stmt = select(Article).where(Article.author_id == author_id, LIVE_ARTICLE)
+        return await apaginate(db, stmt, params, KEYSET)
+
+    async def search(
+        self, db: AsyncSession, *, q: str, params: PageParams, filters: Sequence = ()
+    ) -> dict:
+        """
+        Ranked full-text search, keyset paginated on (rank, id).
+        """
+        stmt = select_search(q).where(*filters)
+        keys = (stmt.selected_columns.rank, Article.id)
+        page = await apaginate(db, stmt, params, keys)
+        rows = page["items"]
+        if rows:
+            result = await db.execute(select_headlines(q, [row.id for row in rows]))
+            headlines = {row.id: row for row in result}
+            page["items"] = [
+                {
+                    **row._mapping,
+                    "title_highlight": headlines[row.id].title_highlight,
+                    "snippet": headlines[row.id].snippet,
+                }
+                for row in rows
+            ]
+        return page
 
 
 article = CRUDArticle(Article)
+async_article = AsyncCRUDArticle(Article)
@@ -1,35 +1,356 @@
-from typing import List
+from collections import Counter
+from typing import List, Optional, Sequence
 
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import ColumnElement, Select, Update, case, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.crud.base import CRUDBase
+from app.core.pagination import PageParams, apaginate, paginate
+from app.crud.base import (
+    AsyncCRUDBase,
+    CRUDBase,
+    delete_statement,
+    insert_many_statement,
+    insert_statement,
+)
+from app.crud.crud_user import AUTHOR_COLUMNS, LIVE_USER, author_row, counter_update
+from app.models.article import Article
 from app.models.comment import Comment
+from app.models.user import User
 from app.schemas.comment import CommentCreate, CommentUpdate
+from app.schemas.rows import CommentRow
+
+KEYSET = (Comment.created_at, Comment.id)
+
+# Comments that still count: those of removed articles and users came off the
+# counters when they were removed, and wait there for app.core.purge
+LIVE_ARTICLE = Article.deleted_at.is_(None)
+COUNTED = (Comment.article.has(LIVE_ARTICLE), Comment.author.has(LIVE_USER))
+
+COMMENT_COLUMNS = (
+    Comment.content,
+    Comment.article_id,
+    Comment.id,
+    Comment.created_at,
+    Comment.updated_at,
+)
+
+
+def select_rows() -> Select:
+    """
+    Comment columns with their author's, as plain rows for `comment_row`.
+    """
+    return (
+        select(*COMMENT_COLUMNS, *AUTHOR_COLUMNS)
+        .join(User, User.id == Comment.author_id)
+        .where(LIVE_USER)
+    )
+
+
+def comment_row(row) -> CommentRow:
+    return CommentRow(
+        content=row.content,
+        article_id=row.article_id,
+        id=row.id,
+        author=author_row(row),
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def select_by_article(article_id: int) -> Select:
+    return select_rows().where(Comment.article_id == article_id)
+
+
+def select_latest(article_ids: Sequence[int], limit: int) -> Select:
+    """
+    The newest `limit` comments of each article, with their authors. Each
+    article's comments are read with a LATERAL top-N scan of the
+    (article_id, created_at, id) index, so long threads cost no more than
+    short ones.
+    """
+    newest_first = (Comment.created_at.desc(), Comment.id.desc())
+    if len(article_ids) == 1:
+        return select_by_article(article_ids[0]).order_by(*newest_first).limit(limit)
+
+    articles = select(Article.id).where(Article.id.in_(article_ids)).subquery()
+    latest = (
+        select(Comment.id)
+        .where(Comment.article_id == articles.c.id)
+        .order_by(*newest_first)
+        .limit(limit)
+        .correlate(articles)
+        .lateral()
+    )
+    return (
+        select(*COMMENT_COLUMNS, *AUTHOR_COLUMNS)
+        .select_from(articles)
+        .join(latest, true())
+        .join(Comment, Comment.id == latest.c.id)
+        .join(User, User.id == Comment.author_id)
+        # Until they are purged, removed users' comments still take up
+        # places in the top N
+        .where(LIVE_USER)
+        .order_by(Comment.article_id, *newest_first)
+    )
+
+
+def counter_updates(*, article_id: int, author_id: int, delta: int) -> List[Update]:
+    """
+    Statements moving the article's and the author's comment counters by
+    `delta`, and bumping the article's version. Callers run them in the same
+    transaction as the comment row. They return the article and the author
+    as updated, or no article if it doesn't exist or has been removed.
+    """
+    return [
+        update(Article)
+        .where(Article.id == article_id, LIVE_ARTICLE)
+        .values(
+            comment_count=Article.comment_count + delta,
+            version=Article.version + 1,
+        )
+        .returning(Article)
+        .execution_options(populate_existing=True),
+        counter_update(author_id, comment_count=delta),
+    ]
+
+
+def select_live_articles(article_ids: Sequence[int]) -> Select:
+    """
+    Ids of the articles in `article_ids` that can take comments, locked until
+    the transaction ends, so they can't be removed before the comments count.
+    """
+    return (
+        select(Article.id)
+        .where(Article.id.in_(sorted(set(article_ids))), LIVE_ARTICLE)
+        .with_for_update()
+    )
+
+
+def bulk_counter_updates(comments: Sequence[Comment], delta: int) -> List[Update]:
+    """
+    Statements moving the counters by `delta` for each of `comments`, added
+    or deleted in bulk: one per table, however many rows are involved. The
+    first returns the articles.
+    """
+    per_article, per_author = Counter(), Counter()
+    for comment in comments:
+        per_article[comment.article_id] += delta
+        per_author[comment.author_id] += delta
+    return [
+        update(Article)
+        .where(Article.id.in_(sorted(per_article)))
+        .values(
+            comment_count=Article.comment_count + case(per_article, value=Article.id),
+            version=Article.version + 1,
+        )
+        .returning(Article)
+        .execution_options(synchronize_session=False, populate_existing=True),
+        update(User)
+        .where(User.id.in_(sorted(per_author)))
+        .values(comment_count=User.comment_count + case(per_author, value=User.id))
+        .execution_options(synchronize_session=False),
+    ]
+
+
+def _attach(comment: Comment, article: Article, author: User) -> Comment:
+    # Loaded from the counter updates' RETURNING, so set without marking
+    # the comment dirty
+    set_committed_value(comment, "article", article)
+    set_committed_value(comment, "author", author)
+    return comment
 
 
 class CRUDComment(CRUDBase[Comment, CommentCreate, CommentUpdate]):
-    def create(self, db: Session, *, obj_in: CommentCreate, author_id: int) -> Comment:
-        comment = super().create(db, obj_in=obj_in, author_id=author_id)
+    def create(
+        self, db: Session, *, obj_in: CommentCreate, author_id: int
+    ) -> Optional[Comment]:
+        """
+        Add a comment, or return None if its article doesn't exist or has
+        been removed.
+        """
+        update_article, update_author = counter_updates(
+            article_id=obj_in.article_id, author_id=author_id, delta=1
+        )
+        article = db.scalars(update_article).first()
+        if article is None:
+            db.rollback()
+            return None
+        values = {**jsonable_encoder(obj_in), "author_id": author_id}
+        comment = db.scalars(insert_statement(Comment, values)).one()
+        author = db.scalars(update_author).one()
         db.commit()
-        return comment
+        return _attach(comment, article, author)
+
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[CommentCreate], author_id: int
+    ) -> List[Comment]:
+        """
+        Add `objs_in` in one statement, and count them in the same transaction.
+        Comments on articles that don't exist or have been removed are left
+        out, as `create` refuses them.
+        """
+        if not objs_in:
+            return []
+        stmt = select_live_articles([obj_in.article_id for obj_in in objs_in])
+        live = set(db.scalars(stmt))
+        rows = [
+            {**jsonable_encoder(obj_in), "author_id": author_id}
+            for obj_in in objs_in
+            if obj_in.article_id in live
+        ]
+        if not rows:
+            db.rollback()
+            return []
+        comments = list(db.scalars(insert_many_statement(Comment), rows))
+        for stmt in bulk_counter_updates(comments, 1):
+            db.execute(stmt)
+        db.commit()
+        return comments
 
-    def remove(self, db: Session, *, id: int) -> Comment:
-        comment = db.query(self.model).get(id)
+    def remove(self, db: Session, *, id: int) -> Optional[Comment]:
+        comment = db.get(self.model, id)
         if comment:
+            update_article, update_author = counter_updates(
+                article_id=comment.article_id, author_id=comment.author_id, delta=-1
+            )
+            article = db.scalars(update_article).first()
+            if article is None:
+                # Removed with its article, and purged with it
+                db.rollback()
+                return None
+            author = db.scalars(update_author).one()
             db.delete(comment)
             db.commit()
+            _attach(comment, article, author)
         return comment
 
+    def remove_where(self, db: Session, *where: ColumnElement) -> List[Comment]:
+        """
+        Delete the comments matching `where`, e.g. all of a spammer's, and
+        take them off the counters in the same transaction. Each comment
+        comes back with its article as updated. Comments that no longer
+        count, on removed articles or by removed users, are left to the
+        purge.
+        """
+        comments = list(db.scalars(delete_statement(Comment, *where, *COUNTED)))
+        if comments:
+            update_articles, update_authors = bulk_counter_updates(comments, -1)
+            articles = {article.id: article for article in db.scalars(update_articles)}
+            db.execute(update_authors)
+            for comment in comments:
+                set_committed_value(comment, "article", articles[comment.article_id])
+        db.commit()
+        return comments
+
     def get_by_article(
-        self, db: Session, *, article_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Comment]:
-        return (
-            db.query(self.model)
-            .filter(Comment.article_id == article_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        self, db: Session, *, article_id: int, params: PageParams
+    ) -> dict:
+        page = paginate(db, select_by_article(article_id), params, KEYSET)
+        page["items"] = [comment_row(row) for row in page["items"]]
+        return page
+
+
+class AsyncCRUDComment(AsyncCRUDBase[Comment, CommentCreate, CommentUpdate]):
+    async def create(
+        self, db: AsyncSession, *, obj_in: CommentCreate, author_id: int
+    ) -> Optional[Comment]:
+        """
+        Add a comment, or return None if its article doesn't exist. The
+        article and author come back from the counter updates, so there is
+        no existence check up front and no refresh afterwards.
+        """
+        update_article, update_author = counter_updates(
+            article_id=obj_in.article_id, author_id=author_id, delta=1
         )
+        article = (await db.scalars(update_article)).first()
+        if article is None:
+            await db.rollback()
+            return None
+        values = {**jsonable_encoder(obj_in), "author_id": author_id}
+        comment = (await db.scalars(insert_statement(Comment, values))).one()
+        author = (await db.scalars(update_author)).one()
+        await db.commit()
+        return _attach(comment, article, author)
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[CommentCreate], author_id: int
+    ) -> List[Comment]:
+        """
+        Add `objs_in` in one statement, and count them in the same transaction.
+        Comments on articles that don't exist or have been removed are left
+        out, as `create` refuses them.
+        """
+        if not objs_in:
+            return []
+        stmt = select_live_articles([obj_in.article_id for obj_in in objs_in])
+        live = set(await db.scalars(stmt))
+        rows = [
+            {**jsonable_encoder(obj_in), "author_id": author_id}
+            for obj_in in objs_in
+            if obj_in.article_id in live
+        ]
+        if not rows:
+            await db.rollback()
+            return []
+        comments = list(await db.scalars(insert_many_statement(Comment), rows))
+        for stmt in bulk_counter_updates(comments, 1):
+            await db.execute(stmt)
+        await db.commit()
+        return comments
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Comment]:
+        """
+        Delete a comment, returning it with its article and author as updated,
+        or None if it doesn't exist or went with its article.
+        """
+        comment = await db.get(self.model, id)
+        if comment:
+            update_article, update_author = counter_updates(
+                article_id=comment.article_id, author_id=comment.author_id, delta=-1
+            )
+            article = (await db.scalars(update_article)).first()
+            if article is None:
+                # Removed with its article, and purged with it
+                await db.rollback()
+                return None
+            author = (await db.scalars(update_author)).one()
+            await db.delete(comment)
+            await db.commit()
+            _attach(comment, article, author)
+        return comment
+
+    async def remove_where(
+        self, db: AsyncSession, *where: ColumnElement
+    ) -> List[Comment]:
+        """
+        Delete the comments matching `where`, e.g. all of a spammer's, and
+        take them off the counters in the same transaction. Each comment
+        comes back with its article as updated. Comments that no longer
+        count, on removed articles or by removed users, are left to the
+        purge.
+        """
+        comments = list(await db.scalars(delete_statement(Comment, *where, *COUNTED)))
+        if comments:
+            update_articles, update_authors = bulk_counter_updates(comments, -1)
+            articles = {
+                article.id: article for article in await db.scalars(update_articles)
+            }
+            await db.execute(update_authors)
+            for comment in comments:
+                set_committed_value(comment, "article", articles[comment.article_id])
+        await db.commit()
+        return comments
+
+    async def get_by_article(
+        self, db: AsyncSession, *, article_id: int, params: PageParams
+    ) -> dict:
+        page = await apaginate(db, select_by_article(article_id), params, KEYSET)
+        page["items"] = [comment_row(row) for row in page["items"]]
+        return page
 
 
 comment = CRUDComment(Comment)
+async_comment = AsyncCRUDComment(Comment)
@@ -1,26 +1,219 @@
-from typing import Optional
+from itertools import chain
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
+from fastapi import BackgroundTasks
+from sqlalchemy import (
+    JSON,
+    ColumnElement,
+    Insert,
+    Select,
+    Subquery,
+    Update,
+    func,
+    literal_column,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.auth_cache import invalidate_user
+from app.core.response_cache import response_cache
+from app.core.security import get_password_hash, password_hasher, verify_password
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.article import Article
+from app.models.comment import Comment
 from app.models.user import User
+from app.schemas.rows import AuthorRow
 from app.schemas.user import UserCreate, UserUpdate
 
+# Articles and comments shown on a profile
+RECENT_ACTIVITY_LIMIT = 5
+
+# Soft-deleted users, and the comments they wrote, are left out of reads;
+# see app.core.purge.remove_user
+LIVE_USER = User.deleted_at.is_(None)
+
+
+class RemovedUser(NamedTuple):
+    user: User
+    # Articles and profiles that showed something of the user's
+    article_ids: List[int]
+    user_ids: List[int]
+
+
+# User columns selected alongside an article or comment as its author,
+# labelled so they can't clash with the parent row's own columns
+AUTHOR_COLUMNS = tuple(
+    column.label(f"author__{column.key}")
+    for column in (
+        User.id,
+        User.email,
+        User.full_name,
+        User.article_count,
+        User.comment_count,
+        User.created_at,
+    )
+)
+
+
+def author_row(row) -> AuthorRow:
+    return AuthorRow(
+        id=row.author__id,
+        email=row.author__email,
+        full_name=row.author__full_name,
+        article_count=row.author__article_count,
+        comment_count=row.author__comment_count,
+        created_at=row.author__created_at,
+    )
+
+
+def counter_update(user_id: int, **deltas: int) -> Update:
+    """
+    Statement moving the user's article/comment counters by `deltas` that
+    returns the user, so writes get their author back with the new counts.
+    """
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values({key: getattr(User, key) + delta for key, delta in deltas.items()})
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+
+
+def insert_new_user(values: dict) -> Insert:
+    """
+    INSERT ... RETURNING that skips an email that is already registered,
+    returning no row for it, so registering needs no SELECT first.
+    """
+    return (
+        insert(User)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+
+
+def select_profile_version(user_id: int) -> Select:
+    """
+    Everything a profile response depends on, reduced to a few scalars: the
+    user's own fields, the ids and versions of the recent articles (which
+    change when their comments do) and the newest edit among their comments.
+    """
+    recent = (
+        select(Article.id, Article.version)
+        .where(Article.author_id == user_id, Article.deleted_at.is_(None))
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(RECENT_ACTIVITY_LIMIT)
+        .subquery()
+    )
+    return select(
+        User.email,
+        User.full_name,
+        User.avatar_url,
+        User.avatar_status,
+        User.article_count,
+        User.comment_count,
+        select(func.max(recent.c.id)).scalar_subquery(),
+        select(func.sum(recent.c.version)).scalar_subquery(),
+        select(func.max(Comment.updated_at))
+        .where(Comment.author_id == user_id)
+        .scalar_subquery(),
+    ).where(User.id == user_id, LIVE_USER)
+
+
+def _json_rows(rows: Subquery):
+    """
+    The rows of `rows` as a JSON array of objects, newest first.
+    """
+    row = func.json_build_object(
+        *chain.from_iterable(
+            (literal_column(f"'{column.name}'"), column) for column in rows.c
+        )
+    )
+    ordered = aggregate_order_by(row, rows.c.created_at.desc(), rows.c.id.desc())
+    return type_coerce(
+        select(
+            func.coalesce(func.json_agg(ordered), literal_column("'[]'::json"))
+        ).scalar_subquery(),
+        JSON,
+    )
+
+
+def select_profile(user_id: int) -> Select:
+    """
+    A user's profile in one round trip: the user row, with the recent
+    articles and comments aggregated into JSON columns alongside it. Each
+    side reads at most RECENT_ACTIVITY_LIMIT rows off its (author_id,
+    created_at, id) index.
+    """
+    recent_articles = (
+        select(
+            Article.id,
+            Article.title,
+            Article.summary,
+            Article.tags,
+            Article.status,
+            Article.comment_count,
+            Article.created_at,
+        )
+        .where(Article.author_id == user_id, Article.deleted_at.is_(None))
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(RECENT_ACTIVITY_LIMIT)
+        .subquery()
+    )
+    recent_comments = (
+        select(
+            Comment.id,
+            Comment.article_id,
+            Comment.content,
+            Comment.created_at,
+            Comment.updated_at,
+        )
+        .where(
+            Comment.author_id == user_id,
+            Comment.article.has(Article.deleted_at.is_(None)),
+        )
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(RECENT_ACTIVITY_LIMIT)
+        .subquery()
+    )
+    return select(
+        User.id,
+        User.email,
+        User.full_name,
+        User.avatar_url,
+        User.avatar_status,
+        User.avatar_variants,
+        User.article_count,
+        User.comment_count,
+        User.created_at,
+        _json_rows(recent_articles).label("recent_articles"),
+        _json_rows(recent_comments).label("recent_comments"),
+    ).where(User.id == user_id, LIVE_USER)
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+        return db.query(User).filter(User.email == email, LIVE_USER).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
+    def create(self, db: Session, *, obj_in: UserCreate) -> Optional[User]:
+        """
+        Register a user, or return None if the email is already taken.
+        """
+        stmt = insert_new_user(
+            {
+                "email": obj_in.email,
+                "hashed_password": get_password_hash(obj_in.password),
+                "full_name": obj_in.full_name,
+            }
         )
-        db.add(db_obj)
+        db_obj = db.scalars(stmt).first()
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
@@ -31,5 +224,171 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         return user
 
+    def remove(self, db: Session, *, id: int) -> Optional[RemovedUser]:
+        """
+        Soft-delete a user with everything they wrote, then purge the rows
+        in batches before returning; None if the user isn't live. For
+        scripts: the API's cached responses run out within
+        RESPONSE_CACHE_TTL.
+        """
+        # app.core.purge builds on the article CRUD, which imports this module
+        from app.core.purge import purge_user, remove_user_sync
+
+        removed = remove_user_sync(db, id=id)
+        if removed is None:
+            return None
+        invalidate_user(id)
+        purge_user(db, id)
+        return removed
+
+    def remove_where(self, db: Session, *where: ColumnElement) -> List[RemovedUser]:
+        """
+        `remove` every live user matching `where`.
+        """
+        ids = db.scalars(select(User.id).where(*where, LIVE_USER)).all()
+        removed = []
+        for id in ids:
+            user = self.remove(db, id=id)
+            if user is not None:
+                removed.append(user)
+        return removed
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email, LIVE_USER))
+        return result.scalars().first()
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> Optional[User]:
+        """
+        Register a user, or return None if the email is already taken.
+        """
+        stmt = insert_new_user(
+            {
+                "email": obj_in.email,
+                "hashed_password": await password_hasher.hash(obj_in.password),
+                "full_name": obj_in.full_name,
+            }
+        )
+        db_obj = (await db.scalars(stmt)).first()
+        await db.commit()
+        return db_obj
+
+    async def authenticate(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        if not await self.check_password(db, user=user, password=password):
+            return None
+        return user
+
+    async def check_password(
+        self, db: AsyncSession, *, user: User, password: str
+    ) -> bool:
+        """
+        Verify `password` and upgrade the stored hash if its scheme or cost is
+        outdated.
+        """
+        valid, new_hash = await password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if valid and new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+        return valid
+
+    async def profile_version(self, db: AsyncSession, *, user_id: int):
+        """
+        Version row for the user's profile, or None if the user doesn't exist.
+        """
+        return (await db.execute(select_profile_version(user_id))).first()
+
+    async def profile(self, db: AsyncSession, *, user_id: int) -> Optional[dict]:
+        """
+        Profile response data for `user_id`, or None if the user doesn't exist.
+        """
+        row = (await db.execute(select_profile(user_id))).first()
+        if row is None:
+            return None
+        profile = dict(row._mapping)
+        # Every recent comment is the user's own
+        author = {
+            key: profile[key]
+            for key in (
+                "id",
+                "email",
+                "full_name",
+                "article_count",
+                "comment_count",
+                "created_at",
+            )
+        }
+        for comment in profile["recent_comments"]:
+            comment["author"] = author
+        return profile
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+    ) -> User:
+        user = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        invalidate_user(user.id)
+        return user
+
+    async def remove(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        background_tasks: Optional[BackgroundTasks] = None,
+    ) -> Optional[RemovedUser]:
+        """
+        Soft-delete a user with everything they wrote, see
+        app.core.purge.remove_user, and drop them from the auth and response
+        caches; None if the user isn't live. The rows are purged in
+        `background_tasks` if given, otherwise before this returns.
+        """
+        # app.core.purge builds on the article CRUD, which imports this module
+        from app.core.purge import (
+            purge_in_background,
+            purge_user,
+            remove_user,
+            removed_user_keys,
+        )
+
+        removed = await remove_user(db, id=id)
+        if removed is None:
+            return None
+        invalidate_user(id)
+        await response_cache.invalidate(*removed_user_keys(removed))
+        if background_tasks is not None:
+            background_tasks.add_task(purge_in_background, purge_user, id)
+        else:
+            await run_in_threadpool(purge_in_background, purge_user, id)
+        return removed
+
+    async def remove_where(
+        self,
+        db: AsyncSession,
+        *where: ColumnElement,
+        background_tasks: Optional[BackgroundTasks] = None,
+    ) -> List[RemovedUser]:
+        """
+        `remove` every live user matching `where`.
+        """
+        ids = (await db.scalars(select(User.id).where(*where, LIVE_USER))).all()
+        removed = []
+        for id in ids:
+            user = await self.remove(db, id=id, background_tasks=background_tasks)
+            if user is not None:
+                removed.append(user)
+        return removed
+
 
 user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
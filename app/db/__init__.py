@@ -1,4 +1,4 @@
 from .base_class import Base
-from .session import SessionLocal, engine
+from .session import AsyncSessionLocal, SessionLocal, async_engine, engine
 
-__all__ = ["Base", "SessionLocal", "engine"]
+__all__ = ["AsyncSessionLocal", "Base", "SessionLocal", "async_engine", "engine"]
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Number of recent checkout waits kept for percentile estimates
+WAIT_SAMPLES = 1024
+
+
+class PoolStats:
+    """
+    Counters and gauges for one connection pool, readable from the internal
+    stats endpoint.
+    """
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self._waits.append(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_checkout(self, pool: Pool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            waits = sorted(self._waits)
+            waited = len(waits)
+            return {
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": max(self.peak_overflow, 0),
+                "wait_ms": {
+                    "avg": (
+                        _ms(self.total_wait / self.checkouts) if self.checkouts else 0.0
+                    ),
+                    "p50": _ms(waits[waited // 2]) if waits else 0.0,
+                    "p95": _ms(waits[int(waited * 0.95)]) if waits else 0.0,
+                    "max": _ms(self.max_wait),
+                },
+            }
+
+
+class _TimedCheckoutMixin:
+    """
+    Times how long callers wait for a pooled connection, including waits for
+    another request to check one back in.
+    """
+
+    stats: PoolStats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_timeout()
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+def instrument(engine: Engine, name: str) -> PoolStats:
+    """
+    Attach a `PoolStats` to `engine`'s pool and register it under `name`.
+    For async engines pass `async_engine.sync_engine`.
+    """
+    stats = PoolStats(name, engine)
+    engine.pool.stats = stats
+    pool_stats[name] = stats
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.record_checkout(engine.pool)
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        stats.record_checkin()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.record_connect()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.record_invalidation()
+
+    return stats
+
+
+def pool_snapshot() -> dict:
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+
+class QueryStats:
+    """
+    Statements executed within one scope, usually a request. Identical SQL
+    text means an identical statement shape, since parameters are bound
+    separately; a shape repeated many times is the signature of an N+1.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += seconds
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Statement shapes executed at least `threshold` times (default
+        QUERY_REPEAT_THRESHOLD), most repeated first.
+        """
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        with self._lock:
+            return [
+                (statement, times)
+                for statement, times in self.statements.most_common()
+                if times >= threshold
+            ]
+
+    def describe(self) -> str:
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f}ms"]
+        for statement, times in self.statements.most_common():
+            lines.append(f"  {times}x {' '.join(statement.split())[:200]}")
+        return "\n".join(lines)
+
+
+# Stats for the request being served, set by QueryStatsMiddleware. Holds a
+# mutable object so statements run in copied contexts (threadpool endpoints,
+# greenlets of the async engine) still land in it.
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+# Open capture_queries() blocks, which see every statement on any thread
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Count and time `engine`'s statements into the current request's stats
+    and any open captures. For async engines pass `async_engine.sync_engine`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        seconds = time.perf_counter() - context._query_started
+        stats = current_stats.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+        for capture in tuple(_captures):
+            capture.record(statement, seconds)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Collect the statements run in the current context into fresh stats.
+    """
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """
+    Collect every statement run while the block is open, whichever thread
+    runs it; for tests driving the app through TestClient.
+    """
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(budget: int) -> Iterator[QueryStats]:
+    """
+    Fail with the statements run if the block runs more than `budget`
+    queries or repeats a statement shape QUERY_REPEAT_THRESHOLD times.
+    """
+    with capture_queries() as stats:
+        yield stats
+    if stats.count > budget:
+        raise AssertionError(f"Query budget of {budget} exceeded: {stats.describe()}")
+    if stats.repeated():
+        raise AssertionError(f"Repeated statements: {stats.describe()}")
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Delete, Insert, Update, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds a replica is behind its primary. Zero when nothing is waiting to
+# be replayed, and on a database that isn't a standby at all (e.g. a second
+# local database standing in for a replica in tests).
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.lag: Optional[float] = None  # None: unreachable or never checked
+        self.checked_at = 0.0
+        self.reads = 0
+
+    @property
+    def usable(self) -> bool:
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary and how far each is behind. Lag is measured
+    lazily: the first request after REPLICA_LAG_CHECK_INTERVAL re-checks all
+    replicas, and requests meanwhile use the last known values. Replicas that
+    lag more than REPLICA_MAX_LAG, or can't be reached, are skipped until a
+    later check finds them caught up.
+    """
+
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self.fallbacks = 0  # reads sent to the primary with no usable replica
+        self._checking: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> None:
+        if not self.replicas:
+            return
+        due = time.monotonic() - settings.REPLICA_LAG_CHECK_INTERVAL
+        if min(replica.checked_at for replica in self.replicas) > due:
+            return
+        # Concurrent requests share one check
+        if self._checking is None or self._checking.done():
+            self._checking = asyncio.ensure_future(self._check_all())
+        await asyncio.shield(self._checking)
+
+    async def _check_all(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(settings.REPLICA_LAG_CHECK_TIMEOUT):
+                async with replica.engine.connect() as conn:
+                    lag = float(await conn.scalar(LAG_SQL))
+        except Exception as e:
+            if replica.lag is not None:
+                logger.warning("Replica %s unreachable: %s", replica.name, e)
+            lag = None
+        else:
+            if lag > settings.REPLICA_MAX_LAG:
+                logger.warning("Replica %s is %.1fs behind", replica.name, lag)
+        replica.lag = lag
+        replica.checked_at = time.monotonic()
+
+    def pick(self) -> Optional[Replica]:
+        """
+        A usable replica at random, or None to read from the primary.
+        """
+        usable = [replica for replica in self.replicas if replica.usable]
+        if not usable:
+            if self.replicas:
+                self.fallbacks += 1
+            return None
+        replica = random.choice(usable)
+        replica.reads += 1
+        return replica
+
+    def stats(self) -> dict:
+        return {
+            "fallbacks": self.fallbacks,
+            "replicas": {
+                replica.name: {
+                    "lag": replica.lag,
+                    "usable": replica.usable,
+                    "reads": replica.reads,
+                }
+                for replica in self.replicas
+            },
+        }
+
+
+# Replica that the current request's reads go to; None means the primary.
+# Set per request by ReplicaRoutingMiddleware, so one request sees a single
+# replica's snapshot rather than a mix.
+read_replica: ContextVar[Optional[Replica]] = ContextVar("read_replica", default=None)
+
+
+@contextmanager
+def use_replica(replica: Optional[Replica]) -> Iterator[None]:
+    token = read_replica.set(replica)
+    try:
+        yield
+    finally:
+        read_replica.reset(token)
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """
+    Send the block's reads to the primary, e.g. to fill a shared cache that
+    must not hold data older than its last invalidation.
+    """
+    with use_replica(None):
+        yield
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the request's replica, if it has one, and
+    flushes and DML to the primary bound to the session.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        replica = read_replica.get()
+        if (
+            replica is None
+            or self._flushing
+            or isinstance(clause, (Insert, Update, Delete))
+        ):
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return replica.engine.sync_engine
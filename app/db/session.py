@@ -1,11 +1,78 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument
+from app.db.query_stats import instrument_queries
+from app.db.replicas import Replica, ReplicaSet, RoutingSession
 
-engine = create_engine(settings.DATABASE_URL)
+
+def async_database_url(url: str) -> str:
+    """
+    Swap the sync Postgres driver in `url` for asyncpg.
+    """
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Sync engine for scripts and tooling
+engine = create_engine(
+    settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options()
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_options(),
+)
+
+# Read replicas for the API; see app.db.replicas
+replicas = ReplicaSet(
+    [
+        Replica(
+            f"replica{number}",
+            create_async_engine(
+                async_database_url(url),
+                poolclass=InstrumentedAsyncQueuePool,
+                **pool_options(),
+            ),
+        )
+        for number, url in enumerate(settings.DATABASE_REPLICA_URLS, start=1)
+    ]
+)
+
+# Writes go to async_engine, reads to the request's replica if it has one
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+instrument(engine, "sync")
+instrument(async_engine.sync_engine, "async")
+instrument_queries(engine)
+instrument_queries(async_engine.sync_engine)
+for replica in replicas.replicas:
+    instrument(replica.engine.sync_engine, replica.name)
+    instrument_queries(replica.engine.sync_engine)
+
 
 def get_db():
     db = SessionLocal()
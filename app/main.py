@@ -1,18 +1,34 @@
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.api.v1.api import api_router
+from app.core.avatars import avatar_processor
+from app.core.config import settings
+from app.core.middleware import QueryStatsMiddleware, ReplicaRoutingMiddleware
+from app.core.security import password_hasher
+from app.core.static_files import UploadFiles
+from app.db.session import replicas
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    password_hasher.shutdown()
+    avatar_processor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Create uploads directory if it doesn't exist
-os.makedirs("uploads/avatars", exist_ok=True)
+os.makedirs(os.path.join(settings.STORAGE_LOCAL_ROOT, "avatars"), exist_ok=True)
 
 # Mount the uploads directory
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount(
+    "/uploads", UploadFiles(directory=settings.STORAGE_LOCAL_ROOT), name="uploads"
+)
 
 # CORS middleware configuration with more allowed origins
 origins = [
@@ -31,4 +47,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ReplicaRoutingMiddleware, replicas=replicas)
+
 app.include_router(api_router, prefix="/api/v1")
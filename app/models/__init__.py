@@ -1,5 +1,6 @@
 from .article import Article
 from .comment import Comment
+from .tag_count import TagCount
 from .user import User
 
-__all__ = ["Article", "Comment", "User"]
+__all__ = ["Article", "Comment", "TagCount", "User"]
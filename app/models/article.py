@@ -1,22 +1,78 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.db.base_class import Base
 
+# Text search configuration used for both the stored vector and queries
+SEARCH_CONFIG = "english"
+
+# Title matches rank above summary matches, which rank above body matches
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(summary, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'C')"
+)
+
 
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        # The public listing only shows published articles
+        Index(
+            "ix_articles_published_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'published'"),
+        ),
+        Index("ix_articles_author_id_created_at_id", "author_id", "created_at", "id"),
+        # Tag containment (tags @> ARRAY[...])
+        Index("ix_articles_tags", "tags", postgresql_using="gin"),
+        Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        # Soft-deleted articles still waiting to be purged
+        Index(
+            "ix_articles_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(String(500))
     status = Column(String(20), default="draft")
+    # Counted per tag in tag_counts by crud.article
     tags = Column(ARRAY(String), default=[])
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    # Bumped by crud.article on edits and by crud.comment when comments are
+    # added or removed; ETags are derived from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by crud.comment on create/delete; see scripts/fix_counts.py
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set by crud.article.remove: the article is hidden from then on, and
+    # purged with its comments in the background; see app.core.purge
+    deleted_at = Column(DateTime(timezone=True))
+    # Generated by Postgres whenever a row is written; deferred so listings
+    # don't drag it along
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
+    )
 
     # Foreign Keys
     author_id = Column(
@@ -25,10 +81,11 @@ class Article(Base):
 
     # Relationships
     author = relationship("User", back_populates="articles")
+    # The database deletes comments with their article (ON DELETE CASCADE),
+    # so they are never loaded just to be deleted
     comments = relationship(
-        "Comment", back_populates="article", cascade="all, delete-orphan"
+        "Comment",
+        back_populates="article",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
-
-    @property
-    def comment_count(self):
-        return len(self.comments)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, Text, func
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -6,11 +6,19 @@ from app.db.base_class import Base
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # An article's comments, newest first, seeking on (created_at, id)
+        Index("ix_comments_article_id_created_at_id", "article_id", "created_at", "id"),
+        # A user's comments, newest first (profile pages)
+        Index("ix_comments_author_id_created_at_id", "author_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), default=func.now(), onupdate=func.now()
+    )
 
     # Foreign Keys
     article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"))
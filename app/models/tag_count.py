@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.base_class import Base
+
+
+class TagCount(Base):
+    """
+    Number of articles carrying each tag, per article status. Maintained by
+    crud.article alongside the article row; see scripts/fix_counts.py.
+    """
+
+    __tablename__ = "tag_counts"
+
+    tag = Column(String, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    article_count = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, func, text
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -6,25 +6,43 @@ from app.db.base_class import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Soft-deleted users still waiting to be purged
+        Index(
+            "ix_users_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     full_name = Column(String)
     avatar_url = Column(String, nullable=True)
-    created_at = Column(DateTime, default=func.now())
+    # "pending" while variants are generated, then "ready" or "failed"
+    avatar_status = Column(String, nullable=True)
+    avatar_variants = Column(JSON, nullable=True)  # size (px) -> url
+    # Maintained by crud.article/crud.comment; see scripts/fix_counts.py
+    article_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), default=func.now())
+    # Set by app.core.purge.remove_user: the account and everything it
+    # wrote are hidden from then on, and purged in the background
+    deleted_at = Column(DateTime(timezone=True))
+
+    # Articles and comments are deleted with their user by the database
+    # (ON DELETE CASCADE), so they are never loaded just to be deleted
 
     articles = relationship(
-        "Article", back_populates="author", cascade="all, delete-orphan"
+        "Article",
+        back_populates="author",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     comments = relationship(
-        "Comment", back_populates="author", cascade="all, delete-orphan"
+        "Comment",
+        back_populates="author",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
-
-    @property
-    def article_count(self):
-        return len(self.articles)
-
-    @property
-    def comment_count(self):
-        return len(self.comments)
@@ -1,19 +1,44 @@
-from .article import ArticleCreate, ArticleResponse, ArticleUpdate
+from .article import (
+    ArticleCard,
+    ArticleCreate,
+    ArticleResponse,
+    ArticleSearchHit,
+    ArticleSummary,
+    ArticleUpdate,
+    TagFacet,
+)
 from .base import ArticleBase, PaginatedResponse, UserBase
-from .comment import CommentCreate, CommentResponse, CommentUpdate
-from .user import UserCreate, UserProfileDetail, UserUpdate
+from .comment import CommentCreate, CommentResponse, CommentsDeleted, CommentUpdate
+from .user import (
+    AvatarConfirm,
+    AvatarUploadRequest,
+    AvatarUploadTicket,
+    UserCreate,
+    UserProfileDetail,
+    UserResponse,
+    UserUpdate,
+)
 
 __all__ = [
     "ArticleBase",
+    "ArticleCard",
     "ArticleCreate",
     "ArticleResponse",
+    "ArticleSearchHit",
+    "ArticleSummary",
     "ArticleUpdate",
+    "AvatarConfirm",
+    "AvatarUploadRequest",
+    "AvatarUploadTicket",
     "CommentCreate",
     "CommentResponse",
+    "CommentsDeleted",
     "CommentUpdate",
     "UserBase",
     "UserCreate",
     "UserProfileDetail",
+    "UserResponse",
     "UserUpdate",
     "PaginatedResponse",
+    "TagFacet",
 ]
@@ -1,5 +1,7 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+
+from pydantic import BaseModel
 
 from app.schemas.base import ArticleBase, UserBase
 from app.schemas.comment import CommentResponse
@@ -22,3 +24,64 @@ class ArticleResponse(ArticleBase):
     comments: List[CommentResponse] = []
 
     model_config = {"from_attributes": True}
+
+
+class ArticleCard(BaseModel):
+    """
+    Slim article projection for listings. Only `id` is always present, the
+    other fields are returned when selected with `fields=`.
+    """
+
+    id: int
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    content: Optional[str] = None
+    tags: Optional[List[str]] = None
+    status: Optional[str] = None
+    author_id: Optional[int] = None
+    author_name: Optional[str] = None
+    comment_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class ArticleSummary(BaseModel):
+    """
+    Article as listed on a profile: no content, comments or author.
+    """
+
+    id: int
+    title: str
+    summary: Optional[str] = None
+    tags: List[str] = []
+    status: str
+    comment_count: int
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ArticleSearchHit(BaseModel):
+    """
+    Search result with `<mark>`-highlighted title and content snippets.
+    """
+
+    id: int
+    title: str
+    summary: Optional[str] = None
+    author_id: int
+    author_name: Optional[str] = None
+    created_at: datetime
+    rank: float
+    title_highlight: str
+    snippet: str
+
+    model_config = {"from_attributes": True}
+
+
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+    model_config = {"from_attributes": True}
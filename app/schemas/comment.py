@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List
 
 from pydantic import BaseModel
 
@@ -30,3 +31,8 @@ class CommentResponse(CommentBase):
 # For use in other schemas without circular imports
 class CommentInResponse(CommentResponse):
     pass
+
+
+class CommentsDeleted(BaseModel):
+    deleted: int
+    ids: List[int]
@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+# Read-side DTOs built straight from Core result rows by the CRUD layer and
+# serialized as-is by orjson. Each mirrors a response schema field for field,
+# in the same order, so the JSON is the same as the validated schema's.
+
+
+@dataclass(slots=True)
+class AuthorRow:
+    """
+    schemas.UserBase
+    """
+
+    id: int
+    email: str
+    full_name: str
+    article_count: int
+    comment_count: int
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class CommentRow:
+    """
+    schemas.CommentResponse
+    """
+
+    content: str
+    article_id: int
+    id: int
+    author: AuthorRow
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(slots=True)
+class ArticleRow:
+    """
+    schemas.ArticleResponse
+    """
+
+    title: str
+    content: str
+    summary: Optional[str]
+    tags: List[str]
+    status: str
+    id: int
+    author_id: int
+    author: AuthorRow
+    comment_count: int
+    created_at: datetime
+    comments: List[CommentRow] = field(default_factory=list)
@@ -1,9 +1,9 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
-from app.schemas.article import ArticleResponse
+from app.schemas.article import ArticleSummary
 from app.schemas.base import UserBase
 
 
@@ -25,15 +25,36 @@ class UserResponse(UserBase):
     created_at: datetime
 
 
+class AvatarUploadRequest(BaseModel):
+    sha256: str = Field(pattern=r"^[0-9a-f]{64}$")  # hex digest of the file
+    content_type: str
+    size: int = Field(gt=0)
+
+
+class AvatarUploadTicket(BaseModel):
+    key: str
+    # Already stored: skip the PUT and confirm straight away
+    exists: bool = False
+    method: str = "PUT"
+    url: Optional[str] = None
+    headers: Dict[str, str] = {}
+
+
+class AvatarConfirm(BaseModel):
+    key: str
+
+
 class UserProfileDetail(UserBase):
     id: int
     email: str
     full_name: str
     avatar_url: str | None = None
+    avatar_status: str | None = None
+    avatar_variants: Dict[str, str] | None = None
     article_count: int
     comment_count: int
     created_at: datetime
-    recent_articles: List[ArticleResponse]
+    recent_articles: List[ArticleSummary]
     recent_comments: List["CommentResponse"]  # Forward reference
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,2 @@
+# Endpoint benchmarks: `generate` seeds a synthetic forum, `run` measures
+# endpoints against it and `compare` diffs two runs' JSON reports
@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+
+# (label, path into a scenario result, True if higher is better)
+METRICS = [
+    ("req/s", ("throughput_rps",), True),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("queries", ("queries_per_request", "mean"), False),
+]
+
+
+def metric(result: dict, path: tuple):
+    for key in path:
+        if not isinstance(result, dict) or result.get(key) is None:
+            return None
+        result = result[key]
+    return result
+
+
+def change(before, after, higher_is_better: bool) -> str:
+    if before is None or after is None:
+        return ""
+    if not before:
+        return "" if before == after else "new"
+    percent = (after - before) / before * 100
+    if not percent:
+        return "same"
+    better = percent > 0 if higher_is_better else percent < 0
+    return f"{percent:+.1f}% {'better' if better else 'worse'}"
+
+
+def compare(baseline: dict, candidate: dict, out=sys.stdout) -> None:
+    for label, report in (("baseline", baseline), ("candidate", candidate)):
+        print(
+            f"{label}: {report.get('commit') or '?'} at {report['started_at']}, "
+            f"{report['dataset']}",
+            file=out,
+        )
+    for name, after in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        print(f"\n{name}", file=out)
+        if before is None:
+            print("  (not in baseline)", file=out)
+            continue
+        for label, path, higher_is_better in METRICS:
+            old, new = metric(before, path), metric(after, path)
+            print(
+                f"  {label:<8} {'-' if old is None else old:>10} -> "
+                f"{'-' if new is None else new:>10}  "
+                f"{change(old, new, higher_is_better)}",
+                file=out,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare two benchmarks/run.py reports scenario by scenario"
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    compare(baseline, candidate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import random
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+from app.core.security import get_password_hash
+from scripts.import_data import import_rows
+from scripts.setup_db import reset_database
+
+# Every generated user can log in with this password
+BENCH_PASSWORD = "benchmark"
+
+# (users, articles, mean comments per article)
+SCALES = {
+    "tiny": (100, 1_000, 5),
+    "small": (1_000, 10_000, 5),
+    "medium": (20_000, 200_000, 5),
+    "large": (200_000, 2_000_000, 5),
+}
+
+# Zipf exponent for how often each user writes; a handful of prolific
+# authors and commenters, and a long tail who post once or twice
+AUTHOR_SKEW = 1.1
+# Pareto shape for comments per article; most articles get a few, a few get
+# thousands
+COMMENT_SKEW = 1.2
+MAX_COMMENTS_PER_ARTICLE = 50_000
+PUBLISHED_SHARE = 0.9
+HISTORY_DAYS = 3 * 365
+
+WORDS = (
+    "api async backend bug cache client cluster commit config container "
+    "cursor data database debug deploy design docker error event feature "
+    "fix frontend function index issue latency library lock log memory "
+    "merge metric model network node pattern performance pipeline pool "
+    "postgres process python query queue race release request response "
+    "review schema server service session shard socket sql stack storage "
+    "stream test thread throughput timeout trace transaction type update "
+    "user value version worker write the a of to and in is it for on with "
+    "that this we how why when what should can our my your about using"
+).split()
+
+TAGS = [
+    "python", "postgres", "fastapi", "sqlalchemy", "performance", "async",
+    "testing", "docker", "security", "frontend", "react", "devops", "caching",
+    "databases", "api-design", "career", "beginners", "showcase", "help",
+    "discussion", "linux", "networking", "rust", "go", "javascript",
+    "typescript", "kubernetes", "ci", "observability", "architecture",
+]  # fmt: skip
+
+
+def zipf_cum_weights(n: int, skew: float) -> list:
+    return list(accumulate(1 / rank**skew for rank in range(1, n + 1)))
+
+
+class Forum:
+    """
+    Plan for a synthetic forum, reproducible from `seed`. Who wrote what and
+    when is decided up front in compact arrays; rows are generated lazily,
+    so millions of them never sit in memory.
+    """
+
+    def __init__(self, users: int, articles: int, comments_per_article: float, seed):
+        self.users = users
+        self.articles = articles
+        self.comments_per_article = comments_per_article
+        self.seed = seed
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+        rng = random.Random(f"{seed}:plan")
+        # Activity rank -> user id, so the prolific users aren't just the
+        # oldest ones
+        self.ranked_users = list(range(1, users + 1))
+        rng.shuffle(self.ranked_users)
+        self.user_weights = zipf_cum_weights(users, AUTHOR_SKEW)
+        self.tag_weights = zipf_cum_weights(len(TAGS), AUTHOR_SKEW)
+
+        self.article_authors = array(
+            "i",
+            rng.choices(self.ranked_users, cum_weights=self.user_weights, k=articles),
+        )
+        # Seconds before now; older articles have had longer to collect
+        # comments, which comment timestamps respect
+        horizon = HISTORY_DAYS * 86400
+        self.article_ages = array(
+            "d", (rng.random() * horizon for _ in range(articles))
+        )
+        scale = comments_per_article * (COMMENT_SKEW - 1) / COMMENT_SKEW
+        self.comment_counts = array(
+            "i",
+            (
+                min(
+                    int(scale * rng.paretovariate(COMMENT_SKEW)),
+                    MAX_COMMENTS_PER_ARTICLE,
+                )
+                for _ in range(articles)
+            ),
+        )
+
+    @property
+    def comments(self) -> int:
+        return sum(self.comment_counts)
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        return " ".join(rng.choices(WORDS, k=max(words, 1)))
+
+    def _timestamp(self, age: float) -> datetime:
+        return self.now - timedelta(seconds=int(age))
+
+    def user_rows(self):
+        rng = random.Random(f"{self.seed}:users")
+        hashed_password = get_password_hash(BENCH_PASSWORD)
+        horizon = HISTORY_DAYS * 86400
+        for user_id in range(1, self.users + 1):
+            yield {
+                "id": user_id,
+                "email": f"bench{user_id}@example.com",
+                "full_name": f"Bench User {user_id}",
+                "hashed_password": hashed_password,
+                "created_at": self._timestamp(horizon + rng.random() * 86400),
+            }
+
+    def article_rows(self):
+        rng = random.Random(f"{self.seed}:articles")
+        for index in range(self.articles):
+            tags = rng.choices(TAGS, cum_weights=self.tag_weights, k=rng.randint(0, 4))
+            yield {
+                "id": index + 1,
+                "author_id": self.article_authors[index],
+                "title": self._text(rng, rng.randint(3, 10)).capitalize(),
+                "summary": self._text(rng, rng.randint(10, 30)),
+                # Log-normal: median around 150 words, occasionally thousands
+                "content": self._text(rng, int(rng.lognormvariate(5, 0.8))),
+                "status": "published" if rng.random() < PUBLISHED_SHARE else "draft",
+                "tags": sorted(set(tags)),
+                "created_at": self._timestamp(self.article_ages[index]),
+            }
+
+    def comment_rows(self):
+        rng = random.Random(f"{self.seed}:comments")
+        comment_id = 0
+        for index in range(self.articles):
+            age = self.article_ages[index]
+            authors = rng.choices(
+                self.ranked_users,
+                cum_weights=self.user_weights,
+                k=self.comment_counts[index],
+            )
+            for author_id in authors:
+                comment_id += 1
+                yield {
+                    "id": comment_id,
+                    "article_id": index + 1,
+                    "author_id": author_id,
+                    "content": self._text(rng, int(rng.lognormvariate(3, 0.7))),
+                    "created_at": self._timestamp(age * rng.random()),
+                }
+
+
+def generate(forum: Forum, reset=False, batch_size=10000, workers=4):
+    if reset:
+        reset_database()
+    print(
+        f"Generating {forum.users} users, {forum.articles} articles and "
+        f"{forum.comments} comments (seed {forum.seed})",
+        file=sys.stderr,
+    )
+    rows = {
+        "users": forum.user_rows(),
+        "articles": forum.article_rows(),
+        "comments": forum.comment_rows(),
+    }
+    import_rows(rows, batch_size, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fill the database with a synthetic forum whose activity "
+        "is skewed like a real one. The same seed and sizes give the same data, "
+        "dated relative to when it is generated. "
+        f"All users have the password '{BENCH_PASSWORD}'."
+    )
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int, help="override the scale's user count")
+    parser.add_argument(
+        "--articles", type=int, help="override the scale's article count"
+    )
+    parser.add_argument(
+        "--comments-per-article",
+        type=float,
+        help="override the scale's mean comments per article",
+    )
+    parser.add_argument("--seed", default="0")
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="drop and recreate all tables first (scripts/setup_db.py)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10000, help="rows per COPY statement"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="parallel COPY connections"
+    )
+    args = parser.parse_args()
+
+    users, articles, comments_per_article = SCALES[args.scale]
+    forum = Forum(
+        args.users or users,
+        args.articles or articles,
+        args.comments_per_article or comments_per_article,
+        args.seed,
+    )
+    generate(forum, args.reset, args.batch_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+import httpx
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from benchmarks.generate import BENCH_PASSWORD
+
+API = "/api/v1"
+
+# Ids sampled from the database to aim requests at. Traffic follows
+# activity: articles are picked in proportion to their comments and users
+# to their posts, so hot rows are hit far more often than cold ones.
+TARGET_QUERIES = {
+    "articles": """
+        SELECT id, comment_count + 1 FROM articles
+        WHERE status = 'published' ORDER BY random() LIMIT :limit
+    """,
+    "users": """
+        SELECT id, article_count + comment_count + 1 FROM users
+        ORDER BY random() LIMIT :limit
+    """,
+    "tags": """
+        SELECT tag, article_count FROM tag_counts
+        WHERE status = 'published' AND article_count > 0
+        ORDER BY article_count DESC LIMIT :limit
+    """,
+}
+
+
+class Targets(NamedTuple):
+    ids: Dict[str, list]
+    weights: Dict[str, list]
+    page_size: int
+
+    def pick(self, rng: random.Random, kind: str):
+        return rng.choices(self.ids[kind], weights=self.weights[kind])[0]
+
+
+def load_targets(sample: int, page_size: int) -> Targets:
+    ids, weights = {}, {}
+    db = SessionLocal()
+    try:
+        for kind, query in TARGET_QUERIES.items():
+            rows = db.execute(text(query), {"limit": sample}).all()
+            if not rows:
+                raise SystemExit(
+                    f"No {kind} to benchmark against; run benchmarks/generate.py"
+                )
+            ids[kind] = [row[0] for row in rows]
+            weights[kind] = [row[1] for row in rows]
+    finally:
+        db.close()
+    return Targets(ids, weights, page_size)
+
+
+def dataset_size() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        return {
+            table: db.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in ("users", "articles", "comments")
+        }
+    finally:
+        db.close()
+
+
+class Call(NamedTuple):
+    method: str
+    url: str
+    json: Optional[dict] = None
+
+
+def list_articles(targets: Targets, rng: random.Random) -> str:
+    # The unfiltered first page is mostly served from the response cache;
+    # tag and author filters spread requests over many more variants
+    url = f"{API}/articles?size={targets.page_size}"
+    choice = rng.random()
+    if choice < 0.4:
+        return url
+    if choice < 0.7:
+        return f"{url}&tags={targets.pick(rng, 'tags')}"
+    return f"{url}&author_id={targets.pick(rng, 'users')}"
+
+
+def get_article(targets: Targets, rng: random.Random) -> str:
+    return f"{API}/articles/{targets.pick(rng, 'articles')}"
+
+
+def list_comments(targets: Targets, rng: random.Random) -> str:
+    article_id = targets.pick(rng, "articles")
+    return f"{API}/comments/article/{article_id}?size={targets.page_size}"
+
+
+def get_user_profile(targets: Targets, rng: random.Random) -> str:
+    return f"{API}/users/{targets.pick(rng, 'users')}"
+
+
+def create_comment(targets: Targets, rng: random.Random) -> Call:
+    article_id = targets.pick(rng, "articles")
+    return Call(
+        "POST", f"{API}/comments", {"content": "Benchmark", "article_id": article_id}
+    )
+
+
+def create_article(targets: Targets, rng: random.Random) -> Call:
+    article = {
+        "title": "Benchmark",
+        "content": "Benchmark",
+        "tags": [targets.pick(rng, "tags") for _ in range(2)],
+        "status": "published",
+    }
+    return Call("POST", f"{API}/articles", article)
+
+
+def register(targets: Targets, rng: random.Random) -> Call:
+    user = {
+        "email": f"bench-{uuid.uuid4().hex}@example.com",
+        "password": BENCH_PASSWORD,
+        "full_name": "Benchmark",
+    }
+    return Call("POST", f"{API}/auth/register", user)
+
+
+Scenario = Callable[[Targets, random.Random], Union[str, Call]]
+
+# Scenarios return a URL to GET, or a Call
+SCENARIOS: Dict[str, Scenario] = {
+    "list_articles": list_articles,
+    "get_article": get_article,
+    "list_comments": list_comments,
+    "get_user_profile": get_user_profile,
+}
+
+# Writes add rows to the database, so they only run when asked for. The
+# article and comment ones post as a generated user.
+WRITE_SCENARIOS: Dict[str, Scenario] = {
+    "create_comment": create_comment,
+    "create_article": create_article,
+    "register": register,
+}
+
+
+def send(client: httpx.AsyncClient, call: Union[str, Call]):
+    if isinstance(call, str):
+        return client.get(call)
+    return client.request(call.method, call.url, json=call.json)
+
+
+async def log_in(client: httpx.AsyncClient, targets: Targets, rng: random.Random):
+    user_id = targets.pick(rng, "users")
+    response = await client.post(
+        f"{API}/auth/login",
+        json={"email": f"bench{user_id}@example.com", "password": BENCH_PASSWORD},
+    )
+    if response.status_code != 200:
+        raise SystemExit(
+            "Couldn't log in as a generated user to run write scenarios; "
+            "run benchmarks/generate.py"
+        )
+    token = response.json()["access_token"]
+    client.headers["Authorization"] = f"Bearer {token}"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of already sorted `values`.
+    """
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def summarize(
+    latencies: List[float], queries: List[int], errors: int, elapsed: float
+) -> dict:
+    latencies = sorted(latencies)
+    completed = len(latencies)
+    return {
+        "requests": completed,
+        "errors": errors,
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / completed * 1000, 3) if completed else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        # Only known when the server sends X-DB-Query-Count (DEBUG on)
+        "queries_per_request": (
+            {
+                "mean": round(sum(queries) / len(queries), 2),
+                "max": max(queries),
+            }
+            if queries
+            else None
+        ),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    targets: Targets,
+    rng: random.Random,
+    *,
+    requests: int,
+    warmup: int,
+    concurrency: int,
+) -> dict:
+    for _ in range(warmup):
+        await send(client, scenario(targets, rng))
+
+    calls = iter([scenario(targets, rng) for _ in range(requests)])
+    latencies, queries = [], []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for call in calls:
+            start = time.perf_counter()
+            response = await send(client, call)
+            latency = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(latency)
+            if "x-db-query-count" in response.headers:
+                queries.append(int(response.headers["x-db-query-count"]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, queries, errors, time.perf_counter() - start)
+
+
+def make_client(base_url: Optional[str], response_cache: bool) -> httpx.AsyncClient:
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+
+    # In-process: no network in the way, and query counts are always known
+    from app.core.config import settings
+    from app.core.response_cache import response_cache as cache
+    from app.main import app
+
+    settings.DEBUG = True
+    cache.enabled = response_cache
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    targets = load_targets(args.sample, args.page_size)
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "target": args.base_url or "in-process",
+        "options": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "page_size": args.page_size,
+            "response_cache": not args.no_cache if not args.base_url else None,
+            "seed": args.seed,
+        },
+        "dataset": dataset_size(),
+        "scenarios": {},
+    }
+    scenarios = {**SCENARIOS, **WRITE_SCENARIOS}
+    async with make_client(args.base_url, not args.no_cache) as client:
+        if set(args.scenarios) & set(WRITE_SCENARIOS):
+            await log_in(client, targets, rng)
+        for name in args.scenarios:
+            print(f"Running {name}...", file=sys.stderr)
+            report["scenarios"][name] = await run_scenario(
+                client,
+                scenarios[name],
+                targets,
+                rng,
+                requests=args.requests,
+                warmup=args.warmup,
+                concurrency=args.concurrency,
+            )
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{'scenario':<18} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} "
+        f"{'queries':>8} {'errors':>7}",
+        file=sys.stderr,
+    )
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        queries = result["queries_per_request"]
+        print(
+            f"{name:<18} {result['throughput_rps']:>9} {latency['p50']:>9} "
+            f"{latency['p95']:>9} {latency['p99']:>9} "
+            f"{queries['mean'] if queries else '-':>8} {result['errors']:>7}",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure endpoint latency, throughput and queries per "
+        "request against the current database, e.g. one filled by "
+        "benchmarks/generate.py. Writes a JSON report for benchmarks/compare.py."
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help=f"any of {', '.join(SCENARIOS)} (default: all of these) or of the "
+        f"write scenarios {', '.join(WRITE_SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--base-url",
+        help="benchmark a running server (start it with DEBUG=true to get "
+        "query counts); default: the app in-process",
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--page-size", type=int, default=20, help="items per listing page (max 100)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="bypass the response cache (in-process only)",
+    )
+    parser.add_argument(
+        "--sample", type=int, default=10000, help="rows sampled as request targets"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="JSON report file (default: stdout)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS) - set(WRITE_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+from app.core.config import settings
+from app.core.export import EXPORT_FORMATS, EXPORT_KINDS, iter_export
+from app.db.session import engine
+
+
+def export_data(kind, fmt, output, since=None, until=None, batch_size=None):
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    start = time.perf_counter()
+    written = 0
+    with engine.connect() as conn:
+        for chunk in iter_export(
+            conn, kind, fmt, since=since, until=until, batch_size=batch_size
+        ):
+            output.write(chunk)
+            written += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ Exported {kind} as {fmt}: {written} characters in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream articles or comments out of the database"
+    )
+    parser.add_argument("kind", choices=EXPORT_KINDS)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument(
+        "--since", type=datetime.fromisoformat, help="created at or after"
+    )
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created before")
+    parser.add_argument(
+        "--batch-size", type=int, help="rows per server-side cursor fetch"
+    )
+    parser.add_argument("--output", "-o", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "w", newline="") as output:
+            export_data(
+                args.kind, args.format, output, args.since, args.until, args.batch_size
+            )
+    else:
+        export_data(
+            args.kind, args.format, sys.stdout, args.since, args.until, args.batch_size
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,83 @@ from pathlib import Path
 root_dir = str(Path(__file__).parent.parent)
 sys.path.append(root_dir)
 
+from sqlalchemy import text
+
 from app.db.session import SessionLocal
-from app.models.article import Article
-from app.models.user import User
+
+# Each statement recomputes one counter for every row in a single pass and
+# only rewrites rows whose stored value has drifted. Counters count live rows
+# only: nothing of a removed user's, nothing on a removed article.
+RECONCILE_STATEMENTS = {
+    "users.article_count": """
+        UPDATE users
+        SET article_count = counts.actual
+        FROM (
+            SELECT users.id, COUNT(articles.id) AS actual
+            FROM users
+            LEFT JOIN articles
+              ON articles.author_id = users.id AND articles.deleted_at IS NULL
+            GROUP BY users.id
+        ) AS counts
+        WHERE users.id = counts.id
+          AND users.article_count IS DISTINCT FROM counts.actual
+    """,
+    "users.comment_count": """
+        UPDATE users
+        SET comment_count = counts.actual
+        FROM (
+            SELECT users.id, COUNT(live.id) AS actual
+            FROM users
+            LEFT JOIN (
+                SELECT comments.id, comments.author_id
+                FROM comments
+                JOIN articles ON articles.id = comments.article_id
+                WHERE articles.deleted_at IS NULL
+            ) AS live ON live.author_id = users.id
+            GROUP BY users.id
+        ) AS counts
+        WHERE users.id = counts.id
+          AND users.comment_count IS DISTINCT FROM counts.actual
+    """,
+    "articles.comment_count": """
+        UPDATE articles
+        SET comment_count = counts.actual
+        FROM (
+            SELECT articles.id, COUNT(live.id) AS actual
+            FROM articles
+            LEFT JOIN (
+                SELECT comments.id, comments.article_id
+                FROM comments
+                JOIN users ON users.id = comments.author_id
+                WHERE users.deleted_at IS NULL
+            ) AS live ON live.article_id = articles.id
+            GROUP BY articles.id
+        ) AS counts
+        WHERE articles.id = counts.id
+          AND articles.comment_count IS DISTINCT FROM counts.actual
+    """,
+    "tag_counts.article_count": """
+        INSERT INTO tag_counts (tag, status, article_count)
+        SELECT tags.tag, articles.status, COUNT(DISTINCT articles.id)
+        FROM articles, unnest(articles.tags) AS tags(tag)
+        WHERE articles.status IS NOT NULL AND articles.deleted_at IS NULL
+        GROUP BY tags.tag, articles.status
+        ON CONFLICT (tag, status) DO UPDATE
+        SET article_count = EXCLUDED.article_count
+        WHERE tag_counts.article_count IS DISTINCT FROM EXCLUDED.article_count
+    """,
+    "tag_counts (stale)": """
+        UPDATE tag_counts
+        SET article_count = 0
+        WHERE article_count <> 0
+          AND NOT EXISTS (
+              SELECT 1 FROM articles
+              WHERE articles.status = tag_counts.status
+                AND articles.deleted_at IS NULL
+                AND articles.tags @> ARRAY[tag_counts.tag]::varchar[]
+          )
+    """,
+}
 
 
 def fix_counts():
@@ -15,32 +89,9 @@ def fix_counts():
     try:
         print("Starting count fix...")
 
-        # Fix article counts
-        users = db.query(User).all()
-        print(f"Found {len(users)} users")
-
-        for user in users:
-            print(f"\nProcessing user {user.id}:")
-
-            article_count = (
-                db.query(Article).filter(Article.author_id == user.id).count()
-            )
-            print(f"- Articles: {article_count}")
-            user.article_count = article_count
-
-            comment_count = sum(len(article.comments) for article in user.articles)
-            print(f"- Comments: {comment_count}")
-            user.comment_count = comment_count
-
-        # Fix comment counts for articles
-        articles = db.query(Article).all()
-        print(f"\nFound {len(articles)} articles")
-
-        for article in articles:
-            old_count = article.comment_count
-            new_count = len(article.comments)
-            print(f"Article {article.id}: {old_count} -> {new_count} comments")
-            article.comment_count = new_count
+        for counter, statement in RECONCILE_STATEMENTS.items():
+            result = db.execute(text(statement))
+            print(f"- {counter}: {result.rowcount} rows corrected")
 
         db.commit()
         print("\nCounts fixed successfully!")
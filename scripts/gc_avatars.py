@@ -0,0 +1,84 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+from sqlalchemy import select
+
+from app.core.avatars import AVATAR_PREFIX
+from app.core.storage import storage
+from app.db.session import SessionLocal
+from app.models.user import User
+
+
+def referenced_files(db) -> set:
+    """
+    Avatar file names that some user's avatar_url or avatar_variants still
+    points at.
+    """
+    names = set()
+    rows = db.execute(
+        select(User.avatar_url, User.avatar_variants)
+        .where(User.avatar_url.isnot(None))
+        .execution_options(yield_per=1000)
+    )
+    for avatar_url, variants in rows:
+        names.add(avatar_url.rsplit("/", 1)[-1])
+        names.update(url.rsplit("/", 1)[-1] for url in (variants or {}).values())
+    return names
+
+
+def gc_avatars(grace: float, dry_run: bool = False):
+    # List the files before reading the references: anything uploaded after
+    # this point is not a candidate, and the grace period covers uploads
+    # whose row hadn't been updated yet when the references were read
+    cutoff = time.time() - grace
+    candidates = [
+        stored for stored in storage.list(AVATAR_PREFIX) if stored.modified < cutoff
+    ]
+
+    db = SessionLocal()
+    try:
+        referenced = referenced_files(db)
+    finally:
+        db.close()
+
+    removed = freed = 0
+    for stored in candidates:
+        if stored.key.rsplit("/", 1)[-1] in referenced:
+            continue
+        # Re-check: an upload of the same image refreshes the mtime
+        current = storage.stat(stored.key)
+        if current is None or current.modified >= cutoff:
+            continue
+        if not dry_run:
+            storage.delete(stored.key)
+        removed += 1
+        freed += current.size
+        print(f"- {stored.key}")
+
+    verb = "Would remove" if dry_run else "Removed"
+    print(f"\n{verb} {removed} of {len(candidates)} files, {freed} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Delete avatar files no user references any more"
+    )
+    parser.add_argument(
+        "--grace",
+        type=float,
+        default=3600,
+        help="seconds a file must be untouched before it can be removed",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    gc_avatars(args.grace, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
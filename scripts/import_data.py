@@ -0,0 +1,351 @@
+import argparse
+import csv
+import io
+import json
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+from sqlalchemy import text
+
+from app.core.security import get_password_hash
+from app.db.session import engine
+from scripts.fix_counts import RECONCILE_STATEMENTS
+
+# Staging columns per kind, and the input field each one is read from.
+# Input files use the same field names as scripts/export_data.py writes;
+# ids are the legacy system's and are only used to link rows together.
+STAGING_COLUMNS = {
+    "users": {
+        "legacy_id": "id",
+        "email": "email",
+        "full_name": "full_name",
+        "hashed_password": "hashed_password",
+        "created_at": "created_at",
+    },
+    "articles": {
+        "legacy_id": "id",
+        "author_legacy_id": "author_id",
+        "title": "title",
+        "content": "content",
+        "summary": "summary",
+        "status": "status",
+        "tags": "tags",
+        "created_at": "created_at",
+    },
+    "comments": {
+        "legacy_id": "id",
+        "article_legacy_id": "article_id",
+        "author_legacy_id": "author_id",
+        "content": "content",
+        "created_at": "created_at",
+    },
+}
+
+NULL_MARKER = "\\N"
+
+# UNLOGGED: staging rows are disposable, so skip the WAL
+CREATE_STAGING = """
+    DROP TABLE IF EXISTS import_users, import_articles, import_comments;
+    CREATE UNLOGGED TABLE import_users (
+        legacy_id BIGINT,
+        email VARCHAR,
+        full_name VARCHAR,
+        hashed_password VARCHAR,
+        created_at TIMESTAMPTZ,
+        new_id INTEGER
+    );
+    CREATE UNLOGGED TABLE import_articles (
+        legacy_id BIGINT,
+        author_legacy_id BIGINT,
+        title VARCHAR,
+        content TEXT,
+        summary VARCHAR,
+        status VARCHAR,
+        tags TEXT,
+        created_at TIMESTAMPTZ,
+        new_id INTEGER
+    );
+    CREATE UNLOGGED TABLE import_comments (
+        legacy_id BIGINT,
+        article_legacy_id BIGINT,
+        author_legacy_id BIGINT,
+        content TEXT,
+        created_at TIMESTAMPTZ
+    );
+"""
+
+DROP_STAGING = "DROP TABLE IF EXISTS import_users, import_articles, import_comments"
+
+# Staged rows that can't be resolved unambiguously, dropped before any are:
+# a user without an email has nothing to be matched or allocated an id by,
+# and a legacy id given twice could link children to either row. Children
+# of rejected rows are then skipped like any other orphan.
+REJECT_STATEMENTS = {
+    "users without an email": "DELETE FROM import_users WHERE email IS NULL",
+    "users with a duplicate id": """
+        DELETE FROM import_users
+        WHERE legacy_id IN (
+            SELECT legacy_id FROM import_users
+            GROUP BY legacy_id HAVING count(*) > 1
+        )
+    """,
+    "articles with a duplicate id": """
+        DELETE FROM import_articles
+        WHERE legacy_id IN (
+            SELECT legacy_id FROM import_articles
+            GROUP BY legacy_id HAVING count(*) > 1
+        )
+    """,
+}
+
+# Foreign keys are resolved with one statement per step over the whole
+# staging table. New ids are drawn from the real sequences up front, so
+# articles and comments can be joined to their parents before insertion.
+RESOLVE_STATEMENTS = {
+    "analyze staging": "ANALYZE import_users, import_articles, import_comments",
+    "match existing users": """
+        UPDATE import_users s
+        SET new_id = u.id
+        FROM users u
+        WHERE u.email = s.email
+    """,
+    "allocate user ids": """
+        UPDATE import_users s
+        SET new_id = fresh.id
+        FROM (
+            SELECT email, nextval('users_id_seq') AS id
+            FROM (
+                SELECT DISTINCT email FROM import_users WHERE new_id IS NULL
+            ) AS emails
+        ) AS fresh
+        WHERE s.email = fresh.email
+    """,
+    "insert users": """
+        INSERT INTO users (id, email, hashed_password, full_name, created_at)
+        SELECT DISTINCT ON (s.new_id)
+            s.new_id, s.email, COALESCE(s.hashed_password, :unusable_hash), s.full_name,
+            COALESCE(s.created_at, now())
+        FROM import_users s
+        LEFT JOIN users u ON u.id = s.new_id
+        WHERE u.id IS NULL
+        ORDER BY s.new_id, s.legacy_id
+    """,
+    "allocate article ids": """
+        UPDATE import_articles SET new_id = nextval('articles_id_seq')
+    """,
+    "insert articles": """
+        INSERT INTO articles (
+            id, title, content, summary, status, tags, author_id,
+            created_at, updated_at
+        )
+        SELECT
+            a.new_id, a.title, a.content, a.summary, COALESCE(a.status, 'draft'),
+            ARRAY(SELECT json_array_elements_text(COALESCE(a.tags, '[]')::json)),
+            u.new_id, COALESCE(a.created_at, now()), COALESCE(a.created_at, now())
+        FROM import_articles a
+        JOIN import_users u ON u.legacy_id = a.author_legacy_id
+    """,
+    "insert comments": """
+        INSERT INTO comments (content, article_id, author_id, created_at, updated_at)
+        SELECT
+            c.content, a.new_id, u.new_id,
+            COALESCE(c.created_at, now()), COALESCE(c.created_at, now())
+        FROM import_comments c
+        JOIN import_articles a ON a.legacy_id = c.article_legacy_id
+        JOIN import_users u ON u.legacy_id = c.author_legacy_id
+    """,
+}
+
+
+class Progress:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, rows):
+        with self._lock:
+            self.rows += rows
+            self.report()
+
+    def report(self, end="\r"):
+        rate = self.rows / max(time.perf_counter() - self.start, 1e-9)
+        print(
+            f"  {self.kind}: {self.rows} rows ({rate:,.0f} rows/s)",
+            end=end,
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def read_rows(path, fmt):
+    if fmt == "auto":
+        fmt = "csv" if path.endswith(".csv") else "ndjson"
+    with open(path, newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                # CSV has no NULL; treat empty cells as missing
+                yield {
+                    key: (value if value != "" else None) for key, value in row.items()
+                }
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def copy_batch(kind, batch):
+    """
+    COPY one batch into the staging table on its own connection. Missing
+    values are sent as a marker that FORCE_NULL turns into NULL, so an empty
+    string stays an empty string.
+    """
+    mapping = STAGING_COLUMNS[kind]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in batch:
+        values = []
+        for column, field in mapping.items():
+            value = row.get(field)
+            if column == "tags" and isinstance(value, list):
+                value = json.dumps(value)
+            values.append(NULL_MARKER if value is None else value)
+        writer.writerow(values)
+    buffer.seek(0)
+    columns = ", ".join(mapping)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY import_{kind} ({columns}) FROM STDIN WITH "
+                f"(FORMAT csv, NULL '{NULL_MARKER}', FORCE_NULL ({columns}))",
+                buffer,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    return len(batch)
+
+
+def load_staging(kind, rows, batch_size, workers):
+    progress = Progress(kind)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches(rows, batch_size):
+            # Bound read-ahead so the input is never held in memory
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress.add(future.result())
+            pending.add(executor.submit(copy_batch, kind, batch))
+        for future in pending:
+            progress.add(future.result())
+    progress.report(end="\n")
+
+
+def resolve():
+    """
+    Reject unresolvable staging rows, then resolve and insert the rest.
+    Returns how many rows were rejected.
+    """
+    rejected = 0
+    with engine.begin() as conn:
+        for reason, statement in REJECT_STATEMENTS.items():
+            rows = conn.execute(text(statement)).rowcount
+            if rows > 0:
+                rejected += rows
+                print(f"- rejected {reason}: {rows} rows", file=sys.stderr)
+        # Users imported without a hash get one for a password nobody knows
+        params = {"unusable_hash": get_password_hash(secrets.token_urlsafe())}
+        for step, statement in RESOLVE_STATEMENTS.items():
+            start = time.perf_counter()
+            result = conn.execute(text(statement), params)
+            rows = result.rowcount if result.rowcount >= 0 else 0
+            elapsed = time.perf_counter() - start
+            print(f"- {step}: {rows} rows in {elapsed:.1f}s", file=sys.stderr)
+        for counter, statement in RECONCILE_STATEMENTS.items():
+            result = conn.execute(text(statement))
+            print(f"- {counter}: {result.rowcount} rows recomputed", file=sys.stderr)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE users, articles, comments, tag_counts"))
+    return rejected
+
+
+def import_rows(rows, batch_size=10000, workers=4, keep_staging=False):
+    """
+    Import iterables of input rows, keyed by kind. Each is consumed lazily,
+    so generators of any size can be passed.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_STAGING))
+
+    print("Loading staging tables...", file=sys.stderr)
+    for kind in STAGING_COLUMNS:
+        if rows.get(kind) is not None:
+            load_staging(kind, rows[kind], batch_size, workers)
+
+    print("Resolving foreign keys...", file=sys.stderr)
+    try:
+        rejected = resolve()
+    finally:
+        if not keep_staging:
+            with engine.begin() as conn:
+                conn.execute(text(DROP_STAGING))
+    summary = f" ({rejected} rows rejected)" if rejected else ""
+    print(f"\n✅ Import finished{summary}", file=sys.stderr)
+
+
+def import_data(files, fmt="auto", batch_size=10000, workers=4, keep_staging=False):
+    rows = {kind: read_rows(path, fmt) for kind, path in files.items() if path}
+    import_rows(rows, batch_size, workers, keep_staging)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk-load users, articles and comments through COPY. "
+        "Rows are linked by the legacy ids in the input files; users without "
+        "an email and users or articles sharing an id are rejected, and "
+        "articles and comments whose author or article is missing are skipped."
+    )
+    parser.add_argument("--users", help="users file (id, email, full_name, ...)")
+    parser.add_argument("--articles", help="articles file (id, author_id, ...)")
+    parser.add_argument("--comments", help="comments file (id, article_id, ...)")
+    parser.add_argument("--format", choices=("auto", "ndjson", "csv"), default="auto")
+    parser.add_argument(
+        "--batch-size", type=int, default=10000, help="rows per COPY statement"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="parallel COPY connections"
+    )
+    parser.add_argument(
+        "--keep-staging",
+        action="store_true",
+        help="leave the import_* tables behind for inspection",
+    )
+    args = parser.parse_args()
+
+    files = {"users": args.users, "articles": args.articles, "comments": args.comments}
+    if not any(files.values()):
+        parser.error("nothing to import")
+    import_data(files, args.format, args.batch_size, args.workers, args.keep_staging)
+
+
+if __name__ == "__main__":
+    main()
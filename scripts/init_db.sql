@@ -1,4 +1,5 @@
 -- Drop tables if they exist (in correct order)
+DROP TABLE IF EXISTS tag_counts;
 DROP TABLE IF EXISTS comments;  -- Drop child tables first
 DROP TABLE IF EXISTS articles;
 DROP TABLE IF EXISTS users;
@@ -11,9 +12,12 @@ CREATE TABLE users (
     full_name VARCHAR(255),
     bio TEXT,
     avatar_url VARCHAR(255),
-    article_count INTEGER DEFAULT 0,
-    comment_count INTEGER DEFAULT 0,
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    avatar_status VARCHAR(16),
+    avatar_variants JSON,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    deleted_at TIMESTAMPTZ
 );
 
 -- Create articles table
@@ -24,23 +28,46 @@ CREATE TABLE articles (
     summary VARCHAR(500),
     status VARCHAR(20) DEFAULT 'draft',
     tags VARCHAR[],
-    comment_count INTEGER DEFAULT 0,
-    author_id INTEGER NOT NULL REFERENCES users(id),
-    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    author_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
+    deleted_at TIMESTAMPTZ,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
 );
 
 -- Create comments table
 CREATE TABLE comments (
     id SERIAL PRIMARY KEY,
     content TEXT NOT NULL,
-    article_id INTEGER NOT NULL REFERENCES articles(id),
-    author_id INTEGER NOT NULL REFERENCES users(id),
+    article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    author_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create tag counts table
+CREATE TABLE tag_counts (
+    tag VARCHAR NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tag, status)
+);
+
 -- Create index
 CREATE INDEX ix_articles_id ON articles(id);
 CREATE INDEX ix_articles_tags ON articles USING GIN (tags);
-CREATE INDEX ix_comments_article_id ON comments(article_id);
-CREATE INDEX ix_comments_author_id ON comments(author_id);
\ No newline at end of file
+CREATE INDEX ix_articles_created_at_id ON articles(created_at, id);
+CREATE INDEX ix_articles_published_created_at_id ON articles(created_at, id)
+    WHERE status = 'published';
+CREATE INDEX ix_articles_author_id_created_at_id ON articles(author_id, created_at, id);
+CREATE INDEX ix_articles_search_vector ON articles USING GIN (search_vector);
+CREATE INDEX ix_comments_article_id_created_at_id ON comments(article_id, created_at, id);
+CREATE INDEX ix_comments_author_id_created_at_id ON comments(author_id, created_at, id);
+CREATE INDEX ix_articles_deleted_at ON articles(deleted_at) WHERE deleted_at IS NOT NULL;
+CREATE INDEX ix_users_deleted_at ON users(deleted_at) WHERE deleted_at IS NOT NULL;
\ No newline at end of file
@@ -0,0 +1,39 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+root_dir = str(Path(__file__).parent.parent)
+sys.path.append(root_dir)
+
+from app.core.config import settings
+from app.core.purge import purge_removed
+from app.db.session import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Purge removed articles and users whose background purge "
+        "didn't finish"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.PURGE_BATCH_SIZE,
+        help="comments deleted per transaction",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        purged = purge_removed(db, args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"Purged {purged['users']} users and {purged['articles']} articles, "
+        f"{purged['comments']} comments"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import asyncio
+import csv
+import io
+import json
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.api.v1 import admin
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+# Admin endpoints refuse every request until a token is configured
+settings.INTERNAL_API_TOKEN = settings.INTERNAL_API_TOKEN or "test-internal-token"
+admin_headers = {"X-Internal-Token": settings.INTERNAL_API_TOKEN}
+
+
+async def export_unsent(kind: str) -> None:
+    """
+    Build an export response but never send its body, as when the client
+    goes away first; then run its background task, twice.
+    """
+    response = await admin.export_data(kind, format="ndjson", since=None, until=None)
+    await response.background()
+    await response.background()
+
+
+def test_export_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Admin Export:")
+
+    # 1. Register, login and create some articles
+    register_data = {
+        "email": "export_test@example.com",
+        "password": "secret123",
+        "full_name": "Export Tester",
+    }
+    client.post("/api/v1/auth/register", json=register_data)
+    login_data = {"email": "export_test@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    for i in range(3):
+        article_data = {"title": f"Export {i}", "content": "Line one,\nline two"}
+        response = client.post("/api/v1/articles", json=article_data, headers=headers)
+        comment_data = {"content": "Exported", "article_id": response.json()["id"]}
+        client.post("/api/v1/comments", json=comment_data, headers=headers)
+
+    # 2. Only with the internal token
+    for headers in ({}, {"X-Internal-Token": "wrong"}):
+        response = client.get("/api/v1/admin/export/articles", headers=headers)
+        if response.status_code != 403:
+            print("❌ Export should need the internal token:", response.status_code)
+            return False
+    print("✅ Export refused without the internal token")
+
+    # 3. NDJSON export
+    response = client.get("/api/v1/admin/export/articles", headers=admin_headers)
+    if response.status_code != 200:
+        print("❌ NDJSON export failed:", response.text)
+        return False
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    if [row["title"] for row in rows] != ["Export 0", "Export 1", "Export 2"]:
+        print("❌ NDJSON export returned unexpected rows")
+        return False
+    print("✅ NDJSON export working correctly")
+
+    # 4. CSV export
+    response = client.get(
+        "/api/v1/admin/export/articles?format=csv", headers=admin_headers
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+    if len(rows) != 4 or rows[1][rows[0].index("content")] != "Line one,\nline two":
+        print("❌ CSV export returned unexpected rows")
+        return False
+    print("✅ CSV export working correctly")
+
+    # 5. Time range filter
+    response = client.get(
+        "/api/v1/admin/export/comments?since=2100-01-01T00:00:00",
+        headers=admin_headers,
+    )
+    if response.status_code != 200 or response.text:
+        print("❌ Export time range filter failed")
+        return False
+    # Timezone-aware bounds, as clients send them
+    for query, expected in (
+        ("since=2000-01-01T00:00:00Z", 3),
+        ("until=2000-01-01T00:00:00%2B02:00", 0),
+    ):
+        response = client.get(
+            f"/api/v1/admin/export/comments?{query}", headers=admin_headers
+        )
+        if response.status_code != 200 or len(response.text.splitlines()) != expected:
+            print("❌ Export with a timezone-aware bound failed:", response.text)
+            return False
+    print("✅ Export time range filter working correctly")
+
+    # 6. The export's connection goes back to the pool, even unsent
+    asyncio.run(export_unsent("comments"))
+    stats = client.get("/api/v1/internal/stats", headers=admin_headers).json()
+    if stats["pools"]["async"]["checked_out"] != 0:
+        print("❌ Export connection leaked:", stats["pools"]["async"])
+        return False
+    print("✅ Export connections returned to the pool")
+
+    return True
+
+
+def test_bulk_delete_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Admin Bulk Delete:")
+
+    # 1. An author and a spammer
+    tokens = {}
+    for name in ("author", "spammer"):
+        register_data = {
+            "email": f"{name}@example.com",
+            "password": "secret123",
+            "full_name": name.title(),
+        }
+        client.post("/api/v1/auth/register", json=register_data)
+        login_data = {"email": f"{name}@example.com", "password": "secret123"}
+        response = client.post("/api/v1/auth/login", json=login_data)
+        tokens[name] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # 2. Spam on every article, next to one real comment each
+    article_ids = []
+    for i in range(3):
+        article_data = {"title": f"Bulk {i}", "content": "Content"}
+        response = client.post(
+            "/api/v1/articles", json=article_data, headers=tokens["author"]
+        )
+        article_ids.append(response.json()["id"])
+        for content, author in (
+            ("Spam", "spammer"),
+            ("Spam", "spammer"),
+            ("Real", "author"),
+        ):
+            comment_data = {"content": content, "article_id": article_ids[-1]}
+            client.post("/api/v1/comments", json=comment_data, headers=tokens[author])
+
+    # 3. Without a filter nothing is deleted
+    response = client.delete("/api/v1/admin/comments", headers=admin_headers)
+    if response.status_code != 400:
+        print("❌ Unfiltered bulk delete should be refused")
+        return False
+    print("✅ Unfiltered bulk delete refused")
+
+    # 4. Not for users, signed in or not
+    spammer = client.get("/api/v1/users/me", headers=tokens["spammer"]).json()
+    for headers in ({}, tokens["author"]):
+        response = client.delete(
+            f"/api/v1/admin/comments?author_id={spammer['id']}", headers=headers
+        )
+        if response.status_code != 403:
+            print("❌ Bulk delete should need the internal token")
+            return False
+    print("✅ Bulk delete refused without the internal token")
+
+    # 5. By author
+    response = client.delete(
+        f"/api/v1/admin/comments?author_id={spammer['id']}", headers=admin_headers
+    )
+    if response.status_code != 200 or response.json()["deleted"] != 6:
+        print("❌ Bulk delete by author failed:", response.json())
+        return False
+    for article_id in article_ids:
+        response = client.get(f"/api/v1/comments/article/{article_id}")
+        if [c["content"] for c in response.json()["items"]] != ["Real"]:
+            print("❌ Spam still listed after bulk delete")
+            return False
+        response = client.get(f"/api/v1/articles/{article_id}")
+        if response.json()["comment_count"] != 1:
+            print("❌ Article comment count not updated:", response.json())
+            return False
+    spammer = client.get(f"/api/v1/users/{spammer['id']}").json()
+    if spammer["comment_count"] != 0:
+        print("❌ Spammer comment count not updated:", spammer)
+        return False
+    print("✅ Bulk delete by author working correctly")
+
+    # 6. By article
+    response = client.delete(
+        f"/api/v1/admin/comments?article_id={article_ids[0]}", headers=admin_headers
+    )
+    if response.status_code != 200 or response.json()["deleted"] != 1:
+        print("❌ Bulk delete by article failed:", response.json())
+        return False
+    response = client.get(f"/api/v1/comments/article/{article_ids[0]}")
+    if response.json()["items"]:
+        print("❌ Comments still listed after bulk delete by article")
+        return False
+    print("✅ Bulk delete by article working correctly")
+
+    return True
+
+
+def test_delete_user_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Admin User Deletion:")
+
+    # 1. A troll who posted an article and commented on someone else's
+    tokens, ids = {}, {}
+    for name in ("author", "troll"):
+        register_data = {
+            "email": f"{name}@example.com",
+            "password": "secret123",
+            "full_name": name.title(),
+        }
+        response = client.post("/api/v1/auth/register", json=register_data)
+        ids[name] = response.json()["id"]
+        login_data = {"email": f"{name}@example.com", "password": "secret123"}
+        response = client.post("/api/v1/auth/login", json=login_data)
+        tokens[name] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    article_ids = {}
+    for name in ("author", "troll"):
+        article_data = {"title": f"By {name}", "content": "Content"}
+        response = client.post(
+            "/api/v1/articles", json=article_data, headers=tokens[name]
+        )
+        article_ids[name] = response.json()["id"]
+    for article_id, name in (
+        (article_ids["author"], "troll"),
+        (article_ids["troll"], "author"),
+    ):
+        comment_data = {"content": f"From {name}", "article_id": article_id}
+        client.post("/api/v1/comments", json=comment_data, headers=tokens[name])
+
+    # 2. Users can't delete each other, signed in or not
+    for headers in ({}, tokens["author"]):
+        response = client.delete(f"/api/v1/admin/users/{ids['troll']}", headers=headers)
+        if response.status_code != 403:
+            print("❌ User deletion should need the internal token")
+            return False
+    if client.get("/api/v1/users/me", headers=tokens["troll"]).status_code != 200:
+        print("❌ User deleted without the internal token")
+        return False
+    print("✅ User deletion refused without the internal token")
+
+    # 3. Delete the troll
+    response = client.delete(
+        f"/api/v1/admin/users/{ids['troll']}", headers=admin_headers
+    )
+    if response.status_code != 202:
+        print("❌ User deletion failed:", response.json())
+        return False
+    print("✅ User deleted")
+
+    # 4. Their account, article and comments are gone from reads and counts
+    if client.get("/api/v1/users/me", headers=tokens["troll"]).status_code != 401:
+        print("❌ Deleted user's token still accepted")
+        return False
+    if client.get(f"/api/v1/articles/{article_ids['troll']}").status_code != 404:
+        print("❌ Deleted user's article still readable")
+        return False
+    response = client.get(f"/api/v1/comments/article/{article_ids['author']}")
+    article = client.get(f"/api/v1/articles/{article_ids['author']}").json()
+    if response.json()["items"] or article["comment_count"] != 0:
+        print("❌ Deleted user's comments still shown or counted")
+        return False
+    author = client.get("/api/v1/users/me", headers=tokens["author"]).json()
+    if author["comment_count"] != 0:
+        print("❌ Comments on the deleted user's article still counted:", author)
+        return False
+    print("✅ Deleted user's content hidden and uncounted")
+
+    # 5. The purge ran after the response, freeing the email for a new account
+    register_data = {
+        "email": "troll@example.com",
+        "password": "secret123",
+        "full_name": "Reformed",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Deleted user not purged:", response.json())
+        return False
+    print("✅ Deleted user purged")
+
+    # 6. crud.user.remove takes the same path for scripts
+    reformed_id = response.json()["id"]
+    with SessionLocal() as db:
+        removed = crud.user.remove(db, id=reformed_id)
+        again = crud.user.remove(db, id=reformed_id)
+    if removed is None or removed.user.id != reformed_id or again is not None:
+        print("❌ crud.user.remove didn't remove the user once")
+        return False
+    if client.get(f"/api/v1/users/{reformed_id}").status_code != 404:
+        print("❌ User removed through the CRUD still readable")
+        return False
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ User removed through the CRUD not purged:", response.json())
+        return False
+    print("✅ crud.user.remove soft-deletes and purges")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_export_flow() and test_bulk_delete_flow() and test_delete_user_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
@@ -68,6 +68,16 @@ def test_article_flow():
         return False
     print("✅ Article retrieved successfully")
 
+    # Test conditional GET
+    etag = response.headers.get("etag")
+    response = client.get(
+        f"/api/v1/articles/{article_id}", headers={"If-None-Match": etag}
+    )
+    if not etag or response.status_code != 304:
+        print("❌ Conditional GET did not return 304")
+        return False
+    print("✅ Conditional GET working correctly")
+
     # 4. Update article
     update_data = {
         "title": "Updated Title",
@@ -123,9 +133,213 @@ def test_article_flow():
         return False
     print("✅ Pagination working correctly")
 
+    # Test cursor pagination
+    first_page_ids = [item["id"] for item in data["items"]]
+    response = client.get(data["next"])
+    if response.status_code != 200:
+        print("❌ Cursor page retrieval failed:", response.json())
+        return False
+    next_page = response.json()
+    next_page_ids = [item["id"] for item in next_page["items"]]
+    if not next_page_ids or set(first_page_ids) & set(next_page_ids):
+        print("❌ Cursor pagination returned overlapping pages")
+        return False
+    if next_page["total"] is not None or next_page["pages"] is not None:
+        print("❌ Cursor pages should skip the count:", next_page["total"])
+        return False
+
+    response = client.get(next_page["prev"])
+    if [item["id"] for item in response.json()["items"]] != first_page_ids:
+        print("❌ Previous cursor did not return the first page")
+        return False
+    print("✅ Cursor pagination working correctly")
+
+    # Oversized pages are rejected
+    response = client.get("/api/v1/articles?size=100000")
+    if response.status_code != 422:
+        print("❌ Page size limit not enforced")
+        return False
+    print("✅ Page size limit enforced")
+
+    # Test sparse card listing
+    response = client.get("/api/v1/articles?fields=title,author_name,comment_count")
+    if response.status_code != 200:
+        print("❌ Card listing failed:", response.json())
+        return False
+    card = response.json()["items"][0]
+    if set(card) != {"id", "title", "author_name", "comment_count"}:
+        print("❌ Card listing returned unexpected fields:", sorted(card))
+        return False
+    print("✅ Card listing working correctly")
+
+    # Test tag facets and filters
+    response = client.get("/api/v1/articles/tags")
+    if response.status_code != 200:
+        print("❌ Tag counts failed:", response.json())
+        return False
+    counts = {facet["tag"]: facet["count"] for facet in response.json()}
+    response = client.get("/api/v1/articles?tags=test&fields=tags,status")
+    data = response.json()
+    if data["total"] != counts.get("test") or any(
+        "test" not in item["tags"] or item["status"] != "published"
+        for item in data["items"]
+    ):
+        print("❌ Tag filter does not match tag counts")
+        return False
+    print("✅ Tag facets working correctly")
+
+    # Drafts are listed for their author only
+    article_data = {
+        "title": "Secret Draft",
+        "content": "Not yet",
+        "tags": ["secret"],
+        "status": "draft",
+    }
+    response = client.post("/api/v1/articles", json=article_data, headers=headers)
+    draft = response.json()
+    author_id = draft["author_id"]
+    for url, request_headers in (
+        ("/api/v1/articles?status=draft", {}),
+        (f"/api/v1/articles?status=draft&author_id={author_id}", {}),
+        (f"/api/v1/articles?status=draft&author_id={author_id + 1}", headers),
+        ("/api/v1/articles?status=draft", headers),
+        ("/api/v1/articles/tags?status=draft", {}),
+        ("/api/v1/articles/tags?status=draft", headers),
+        (f"/api/v1/articles/tags?status=draft&author_id={author_id}", {}),
+    ):
+        response = client.get(url, headers=request_headers)
+        if response.status_code != 403:
+            print("❌ Drafts listed for someone other than their author:", url)
+            return False
+    response = client.get(
+        f"/api/v1/articles?status=draft&author_id={author_id}", headers=headers
+    )
+    if response.status_code != 200 or [
+        item["id"] for item in response.json()["items"]
+    ] != [draft["id"]]:
+        print("❌ Author can't list their drafts:", response.json())
+        return False
+    response = client.get(
+        f"/api/v1/articles/tags?status=draft&author_id={author_id}", headers=headers
+    )
+    if response.status_code != 200 or response.json() != [
+        {"tag": "secret", "count": 1}
+    ]:
+        print("❌ Author can't see their draft tag counts:", response.json())
+        return False
+    print("✅ Drafts private to their author")
+
+    # Test full-text search
+    response = client.get("/api/v1/articles/search?q=content&size=5")
+    if response.status_code != 200:
+        print("❌ Article search failed:", response.json())
+        return False
+    data = response.json()
+    if len(data["items"]) != 5 or "<mark>" not in data["items"][0]["snippet"]:
+        print("❌ Article search returned unexpected results")
+        return False
+    response = client.get(data["next"])
+    search_ids = {item["id"] for item in data["items"]}
+    if search_ids & {item["id"] for item in response.json()["items"]}:
+        print("❌ Search pagination returned overlapping pages")
+        return False
+    print("✅ Article search working correctly")
+
+    return True
+
+
+def test_delete_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Article Deletion:")
+
+    # 1. An author and a commenter
+    tokens = {}
+    for name in ("author", "commenter"):
+        register_data = {
+            "email": f"{name}@example.com",
+            "password": "secret123",
+            "full_name": name.title(),
+        }
+        client.post("/api/v1/auth/register", json=register_data)
+        login_data = {"email": f"{name}@example.com", "password": "secret123"}
+        response = client.post("/api/v1/auth/login", json=login_data)
+        tokens[name] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # 2. A published article with a thread on it
+    article_data = {
+        "title": "Doomed",
+        "content": "Content",
+        "tags": ["doomed"],
+        "status": "published",
+    }
+    response = client.post(
+        "/api/v1/articles", json=article_data, headers=tokens["author"]
+    )
+    article_id = response.json()["id"]
+    for i in range(5):
+        comment_data = {"content": f"Comment {i}", "article_id": article_id}
+        client.post("/api/v1/comments", json=comment_data, headers=tokens["commenter"])
+
+    # 3. Only the author can delete it
+    response = client.delete(
+        f"/api/v1/articles/{article_id}", headers=tokens["commenter"]
+    )
+    if response.status_code != 403:
+        print("❌ Non-author should not be able to delete the article")
+        return False
+    response = client.delete(f"/api/v1/articles/{article_id}", headers=tokens["author"])
+    if response.status_code != 200 or response.json()["id"] != article_id:
+        print("❌ Article deletion failed:", response.json())
+        return False
+    print("✅ Article deleted")
+
+    # 4. Gone from reads and counters at once
+    if client.get(f"/api/v1/articles/{article_id}").status_code != 404:
+        print("❌ Deleted article still readable")
+        return False
+    if client.get(f"/api/v1/comments/article/{article_id}").status_code != 404:
+        print("❌ Deleted article's comments still listed")
+        return False
+    response = client.get("/api/v1/articles")
+    if any(item["id"] == article_id for item in response.json()["items"]):
+        print("❌ Deleted article still in the listing")
+        return False
+    author = client.get("/api/v1/users/me", headers=tokens["author"]).json()
+    commenter = client.get("/api/v1/users/me", headers=tokens["commenter"]).json()
+    if author["article_count"] != 0 or commenter["comment_count"] != 0:
+        print("❌ User counts not updated:", author, commenter)
+        return False
+    response = client.get("/api/v1/articles/tags")
+    if any(facet["tag"] == "doomed" for facet in response.json()):
+        print("❌ Tag counts not updated:", response.json())
+        return False
+    print("✅ Deleted article hidden and uncounted")
+
+    # 5. It takes no new comments and can't be deleted twice
+    comment_data = {"content": "Too late", "article_id": article_id}
+    response = client.post(
+        "/api/v1/comments", json=comment_data, headers=tokens["commenter"]
+    )
+    if response.status_code != 404:
+        print("❌ Comment accepted on a deleted article")
+        return False
+    response = client.delete(f"/api/v1/articles/{article_id}", headers=tokens["author"])
+    if response.status_code != 404:
+        print("❌ Article deleted twice")
+        return False
+    print("✅ Deleted article closed to writes")
+
     return True
 
 
 if __name__ == "__main__":
-    success = test_article_flow()
+    success = test_article_flow() and test_delete_flow()
     print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
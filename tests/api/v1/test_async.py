@@ -0,0 +1,216 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, response_cache
+from app.main import app
+
+client = TestClient(app)
+
+# /internal/stats refuses every request until a token is configured
+settings.INTERNAL_API_TOKEN = settings.INTERNAL_API_TOKEN or "test-internal-token"
+internal_headers = {"X-Internal-Token": settings.INTERNAL_API_TOKEN}
+
+CONCURRENT_REQUESTS = 20
+COMMENT_FIELDS = {"id", "content", "article_id", "author", "created_at", "updated_at"}
+
+
+async def burst(article_id: int, headers: dict) -> tuple:
+    """
+    Post CONCURRENT_REQUESTS comments while reading the article as many
+    times, all on one event loop.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        writes = [
+            ac.post(
+                "/api/v1/comments",
+                json={"content": f"Concurrent comment {i}", "article_id": article_id},
+                headers=headers,
+            )
+            for i in range(CONCURRENT_REQUESTS)
+        ]
+        reads = [
+            ac.get(f"/api/v1/articles/{article_id}") for _ in range(CONCURRENT_REQUESTS)
+        ]
+        responses = await asyncio.gather(*writes, *reads)
+    return responses[:CONCURRENT_REQUESTS], responses[CONCURRENT_REQUESTS:]
+
+
+async def cancel_leader(key: str) -> tuple:
+    """
+    Fetch `key` three times at once and cancel the first fetch, whose load
+    the other two are waiting on. Returns the first fetch's task, the other
+    two's results and how many loads ran.
+    """
+    started = asyncio.Event()
+    release = asyncio.Event()
+    loads = []
+
+    async def loader():
+        loads.append(len(loads))
+        started.set()
+        await release.wait()
+        return CachedResponse(None, f"load {len(loads)}".encode())
+
+    leader = asyncio.create_task(response_cache.fetch(key, "", loader))
+    await started.wait()
+    waiters = [
+        asyncio.create_task(response_cache.fetch(key, "", loader)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    leader.cancel()
+    # Hold the load that took over open until both waiters are back
+    for _ in range(10):
+        await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.gather(leader, return_exceptions=True)
+    await response_cache.invalidate(key)
+    return leader, results, len(loads)
+
+
+def test_concurrent_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Concurrent Requests:")
+
+    # 1. Register, login and create an article
+    register_data = {
+        "email": "async_test@example.com",
+        "password": "secret123",
+        "full_name": "Async Tester",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    user_id = response.json()["id"]
+    login_data = {"email": "async_test@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Login failed:", response.json())
+        return False
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    article_data = {
+        "title": "Concurrent Article",
+        "content": "Read and commented on at the same time.",
+        "tags": ["async"],
+        "status": "published",
+    }
+    response = client.post("/api/v1/articles", json=article_data, headers=headers)
+    if response.status_code != 200:
+        print("❌ Article creation failed:", response.json())
+        return False
+    article_id = response.json()["id"]
+    print("✅ Article created successfully")
+
+    # 2. Concurrent writes and reads all succeed
+    stats = client.get("/api/v1/internal/stats", headers=internal_headers).json()
+    checkouts = stats["pools"]["async"]["checkouts"]
+    writes, reads = asyncio.run(burst(article_id, headers))
+    failed = [r.status_code for r in writes + reads if r.status_code != 200]
+    if failed:
+        print("❌ Concurrent requests failed:", failed)
+        return False
+    if any(set(r.json()) != COMMENT_FIELDS for r in writes):
+        print("❌ Unexpected comment shape:", writes[0].json())
+        return False
+    if len({r.json()["id"] for r in writes}) != CONCURRENT_REQUESTS:
+        print("❌ Concurrent comments didn't get distinct ids")
+        return False
+    if any(r.json()["id"] != article_id for r in reads):
+        print("❌ Concurrent reads returned the wrong article")
+        return False
+    print("✅ Concurrent writes and reads succeeded")
+
+    # 3. No comment was lost from the counters or the listing
+    response = client.get(f"/api/v1/articles/{article_id}")
+    if response.json()["comment_count"] != CONCURRENT_REQUESTS:
+        print("❌ Comments lost from comment_count:", response.json())
+        return False
+    response = client.get(f"/api/v1/comments/article/{article_id}")
+    if response.status_code != 200 or response.json()["total"] != CONCURRENT_REQUESTS:
+        print("❌ Comments missing from the listing:", response.json())
+        return False
+    response = client.get(f"/api/v1/users/{user_id}")
+    if response.json()["comment_count"] != CONCURRENT_REQUESTS:
+        print("❌ Comments lost from the author's comment_count")
+        return False
+    print("✅ Counters consistent after concurrent writes")
+
+    # 4. Every connection went back to the async pool
+    stats = client.get("/api/v1/internal/stats", headers=internal_headers).json()
+    pool = stats["pools"]["async"]
+    if pool["checked_out"] != 0 or pool["checkouts"] <= checkouts:
+        print("❌ Async pool not used or connections leaked:", pool)
+        return False
+    print("✅ Requests served from the async pool")
+
+    # 5. With DEBUG on, responses report their SQL statements
+    debug = settings.DEBUG
+    settings.DEBUG = True
+    try:
+        response = client.post(
+            "/api/v1/comments",
+            json={"content": "Counted statements", "article_id": article_id},
+            headers=headers,
+        )
+    finally:
+        settings.DEBUG = debug
+    if response.status_code != 200:
+        print("❌ Comment creation failed:", response.json())
+        return False
+    if int(response.headers.get("x-db-query-count", 0)) < 1:
+        print("❌ Query count header missing:", dict(response.headers))
+        return False
+    if not response.headers.get("server-timing", "").startswith("db;dur="):
+        print("❌ Server-Timing header missing:", dict(response.headers))
+        return False
+    if not debug:
+        response = client.get(f"/api/v1/articles/{article_id}")
+        if "x-db-query-count" in response.headers:
+            print("❌ Query headers sent with DEBUG off")
+            return False
+    print("✅ Query stats headers follow DEBUG")
+
+    return True
+
+
+def test_cancelled_load_flow():
+    print("\nTesting Cancelled Cache Loads:")
+
+    # A cancelled request doesn't cancel the requests coalesced onto its load
+    if not response_cache.enabled:
+        print("✅ Response cache disabled, nothing to coalesce")
+        return True
+    leader, results, loads = asyncio.run(cancel_leader("test:cancelled-leader"))
+    if not leader.cancelled():
+        print("❌ Cancelled fetch wasn't cancelled:", leader)
+        return False
+    if results != [CachedResponse(None, b"load 2")] * 2 or loads != 2:
+        print("❌ Waiters didn't take over the load:", results, loads)
+        return False
+    print("✅ Waiters take over a cancelled load")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_concurrent_flow() and test_cancelled_load_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
@@ -0,0 +1,116 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.security import password_hasher, pwd_context
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.user import User
+
+client = TestClient(app)
+
+# /internal/stats refuses every request until a token is configured
+settings.INTERNAL_API_TOKEN = settings.INTERNAL_API_TOKEN or "test-internal-token"
+internal_headers = {"X-Internal-Token": settings.INTERNAL_API_TOKEN}
+
+
+def stored_hash(email: str) -> str:
+    with SessionLocal() as db:
+        return db.scalar(select(User.hashed_password).where(User.email == email))
+
+
+def test_password_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Password Hashing:")
+
+    # 1. Register
+    register_data = {
+        "email": "hash_test@example.com",
+        "password": "secret123",
+        "full_name": "Hash Tester",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    login_data = {"email": "hash_test@example.com", "password": "secret123"}
+    print("✅ User registered successfully")
+
+    # 2. A hash at an outdated cost is replaced on the next login
+    rounds = settings.BCRYPT_ROUNDS - 1 if settings.BCRYPT_ROUNDS > 4 else 5
+    outdated = bcrypt.using(rounds=rounds).hash("secret123")
+    with SessionLocal() as db:
+        db.execute(
+            update(User)
+            .where(User.email == login_data["email"])
+            .values(hashed_password=outdated)
+        )
+        db.commit()
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Login with an outdated hash failed:", response.json())
+        return False
+    rehashed = stored_hash(login_data["email"])
+    if rehashed == outdated or pwd_context.needs_update(rehashed):
+        print("❌ Outdated hash was not upgraded on login")
+        return False
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200 or stored_hash(login_data["email"]) != rehashed:
+        print("❌ Up-to-date hash was rewritten on login")
+        return False
+    print("✅ Outdated hash upgraded on login")
+
+    # 3. A wrong password doesn't touch the hash
+    wrong_login = {**login_data, "password": "wrong"}
+    response = client.post("/api/v1/auth/login", json=wrong_login)
+    if response.status_code != 400 or stored_hash(login_data["email"]) != rehashed:
+        print("❌ Wrong password handled incorrectly:", response.status_code)
+        return False
+    print("✅ Wrong password rejected")
+
+    # 4. With the hashing pool full, logins are turned away with a 503
+    stats = client.get("/api/v1/internal/stats", headers=internal_headers).json()
+    rejected = stats["password_hasher"]["rejected"]
+    max_pending = password_hasher.max_pending
+    password_hasher.max_pending = password_hasher.pending
+    try:
+        response = client.post("/api/v1/auth/login", json=login_data)
+    finally:
+        password_hasher.max_pending = max_pending
+    if response.status_code != 503 or response.headers.get("retry-after") != str(
+        settings.PASSWORD_HASH_RETRY_AFTER
+    ):
+        print("❌ Full hashing pool didn't answer 503 with Retry-After")
+        return False
+    stats = client.get("/api/v1/internal/stats", headers=internal_headers).json()
+    if stats["password_hasher"]["rejected"] != rejected + 1:
+        print("❌ Rejected hash job not counted:", stats["password_hasher"])
+        return False
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Login failed once the pool had room again:", response.json())
+        return False
+    print("✅ Full hashing pool answers 503 with Retry-After")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_password_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
@@ -61,6 +61,9 @@ def test_comment_flow():
     article_id = response.json()["id"]
     print("✅ Article created successfully")
 
+    # Warm the cached article page so the comment below has to invalidate it
+    client.get(f"/api/v1/articles/{article_id}")
+
     # 3. Create a comment
     comment_data = {
         "content": "This is a test comment",
@@ -73,6 +76,12 @@ def test_comment_flow():
     comment_id = response.json()["id"]
     print("✅ Comment created successfully")
 
+    response = client.get(f"/api/v1/articles/{article_id}")
+    if response.json()["comment_count"] != 1:
+        print("❌ Cached article was not invalidated by the new comment")
+        return False
+    print("✅ Cached article invalidated")
+
     # 4. List article comments
     response = client.get(f"/api/v1/comments/article/{article_id}")
     if response.status_code != 200:
@@ -120,6 +129,18 @@ def test_comment_flow():
         return False
     print("✅ Comment pagination working correctly")
 
+    # Article detail embeds only the newest comments
+    response = client.get(f"/api/v1/articles/{article_id}?comments_limit=5")
+    article = response.json()
+    newest = [comment["id"] for comment in data["items"][:5]]
+    if [comment["id"] for comment in article["comments"]] != newest:
+        print("❌ Article did not embed the newest comments")
+        return False
+    if article["comment_count"] != data["total"]:
+        print("❌ Article comment_count does not match the comment total")
+        return False
+    print("✅ Latest comments embedded correctly")
+
     # Create a comment for testing permissions
     comment_data = {
         "content": "Comment for permission test",
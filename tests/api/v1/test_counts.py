@@ -0,0 +1,283 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app import crud, schemas
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.article import Article
+from app.models.tag_count import TagCount
+from app.models.user import User
+
+client = TestClient(app)
+
+
+def register_and_login(email: str) -> tuple:
+    register_data = {"email": email, "password": "secret123", "full_name": email}
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return None, None
+    user_id = response.json()["id"]
+    login_data = {"email": email, "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Login failed:", response.json())
+        return None, None
+    token = response.json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def counts(user_id: int) -> tuple:
+    response = client.get(f"/api/v1/users/{user_id}")
+    if response.status_code != 200:
+        print("❌ Profile fetch failed:", response.json())
+        return None
+    profile = response.json()
+    return profile["article_count"], profile["comment_count"]
+
+
+def stored_counts(user_id: int, tag: str) -> tuple:
+    """
+    The user's counters and the tag's counts per status, read from the
+    database: the bulk CRUD methods write behind the response cache.
+    """
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        tag_counts = dict(
+            db.execute(
+                select(TagCount.status, TagCount.article_count).where(
+                    TagCount.tag == tag, TagCount.article_count != 0
+                )
+            ).all()
+        )
+        return user.article_count, user.comment_count, tag_counts
+
+
+def test_counter_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Stored Counters:")
+
+    # 1. Register an author and a commenter
+    author_id, author_headers = register_and_login("counts_author@example.com")
+    commenter_id, commenter_headers = register_and_login("counts_reader@example.com")
+    if author_headers is None or commenter_headers is None:
+        return False
+    if counts(author_id) != (0, 0) or counts(commenter_id) != (0, 0):
+        print("❌ New users don't start at zero")
+        return False
+    print("✅ Users registered with zero counts")
+
+    # 2. Articles count towards their author
+    article_ids = []
+    for i in range(2):
+        article_data = {
+            "title": f"Counted Article {i}",
+            "content": "Counted content.",
+            "tags": ["counts"],
+            "status": "published",
+        }
+        response = client.post(
+            "/api/v1/articles", json=article_data, headers=author_headers
+        )
+        if response.status_code != 200:
+            print("❌ Article creation failed:", response.json())
+            return False
+        if response.json()["comment_count"] != 0:
+            print("❌ New article doesn't start at zero comments")
+            return False
+        article_ids.append(response.json()["id"])
+    if counts(author_id) != (2, 0):
+        print("❌ Author's article_count not updated:", counts(author_id))
+        return False
+    print("✅ Article counts maintained on create")
+
+    # 3. Comments count towards the article and their author
+    comment_ids = []
+    for headers in (commenter_headers, commenter_headers, author_headers):
+        comment_data = {"content": "Counted comment", "article_id": article_ids[0]}
+        response = client.post("/api/v1/comments", json=comment_data, headers=headers)
+        if response.status_code != 200:
+            print("❌ Comment creation failed:", response.json())
+            return False
+        comment_ids.append(response.json()["id"])
+    response = client.get(f"/api/v1/articles/{article_ids[0]}")
+    if response.status_code != 200 or response.json()["comment_count"] != 3:
+        print("❌ Article comment_count not updated:", response.json())
+        return False
+    if counts(commenter_id) != (0, 2) or counts(author_id) != (2, 1):
+        print("❌ User comment_count not updated")
+        return False
+    print("✅ Comment counts maintained on create")
+
+    # 4. Deleting a comment and an article takes them off the counters
+    response = client.delete(
+        f"/api/v1/comments/{comment_ids[0]}", headers=commenter_headers
+    )
+    if response.status_code != 200:
+        print("❌ Comment deletion failed:", response.json())
+        return False
+    response = client.get(f"/api/v1/articles/{article_ids[0]}")
+    if response.json()["comment_count"] != 2 or counts(commenter_id) != (0, 1):
+        print("❌ Counters not updated on comment delete")
+        return False
+    response = client.delete(
+        f"/api/v1/articles/{article_ids[1]}", headers=author_headers
+    )
+    if response.status_code != 200:
+        print("❌ Article deletion failed:", response.json())
+        return False
+    if counts(author_id) != (1, 1):
+        print("❌ Counters not updated on article delete:", counts(author_id))
+        return False
+    print("✅ Counters maintained on delete")
+
+    # 5. fix_counts puts drifted counters back
+    with SessionLocal() as db:
+        db.execute(update(User).values(article_count=7, comment_count=7))
+        db.execute(update(Article).values(comment_count=7))
+        db.commit()
+    result = subprocess.run(
+        ["python", "scripts/fix_counts.py"], capture_output=True, text=True
+    )
+    if result.returncode != 0 or "Counts fixed successfully" not in result.stdout:
+        print("❌ fix_counts failed:", result.stdout, result.stderr)
+        return False
+    with SessionLocal() as db:
+        user_counts = {
+            row.id: (row.article_count, row.comment_count)
+            for row in db.execute(
+                select(User.id, User.article_count, User.comment_count)
+            )
+        }
+        article_count = db.scalar(
+            select(Article.comment_count).where(Article.id == article_ids[0])
+        )
+    if user_counts != {author_id: (1, 1), commenter_id: (0, 1)} or article_count != 2:
+        print("❌ fix_counts didn't restore counters:", user_counts, article_count)
+        return False
+    print("✅ fix_counts restored drifted counters")
+
+    return True
+
+
+def test_bulk_counter_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Bulk CRUD Counters:")
+
+    # 1. An author with two articles, one to be removed later
+    author_id, headers = register_and_login("bulk_author@example.com")
+    if headers is None:
+        return False
+    article_ids = []
+    for i in range(2):
+        article_data = {"title": f"Single {i}", "content": "x", "status": "published"}
+        response = client.post("/api/v1/articles", json=article_data, headers=headers)
+        if response.status_code != 200:
+            print("❌ Article creation failed:", response.json())
+            return False
+        article_ids.append(response.json()["id"])
+    live_id, removed_id = article_ids
+    print("✅ Author has two articles")
+
+    # 2. create_many counts the articles on their author and tags
+    objs_in = [
+        schemas.ArticleCreate(
+            title=f"Bulk {i}", content="x", tags=["bulk"], status="published"
+        )
+        for i in range(3)
+    ]
+    with SessionLocal() as db:
+        bulk_ids = [
+            article.id
+            for article in crud.article.create_many(
+                db, objs_in=objs_in, author_id=author_id
+            )
+        ]
+    if stored_counts(author_id, "bulk") != (5, 0, {"published": 3}):
+        print("❌ create_many counters:", stored_counts(author_id, "bulk"))
+        return False
+    response = client.delete(f"/api/v1/articles/{removed_id}", headers=headers)
+    if response.status_code != 200:
+        print("❌ Article deletion failed:", response.json())
+        return False
+    print("✅ create_many maintains the counters")
+
+    # 3. update_where moves the tag counts with the status
+    with SessionLocal() as db:
+        updated = crud.article.update_where(
+            db, Article.id.in_(bulk_ids[:2]), obj_in={"status": "draft"}
+        )
+        statuses = [article.status for article in updated]
+    if statuses != ["draft", "draft"]:
+        print("❌ update_where didn't update the articles")
+        return False
+    if stored_counts(author_id, "bulk") != (4, 0, {"published": 1, "draft": 2}):
+        print("❌ update_where counters:", stored_counts(author_id, "bulk"))
+        return False
+    print("✅ update_where maintains the counters")
+
+    # 4. comment create_many leaves out comments on removed articles
+    objs_in = [
+        schemas.CommentCreate(content="Bulk comment", article_id=article_id)
+        for article_id in (live_id, bulk_ids[0], removed_id, 999999)
+    ]
+    with SessionLocal() as db:
+        comments = crud.comment.create_many(db, objs_in=objs_in, author_id=author_id)
+        commented = sorted(comment.article_id for comment in comments)
+    if commented != sorted([live_id, bulk_ids[0]]):
+        print("❌ Comments added to missing or removed articles:", commented)
+        return False
+    if stored_counts(author_id, "bulk")[1] != 2:
+        print("❌ comment create_many counters:", stored_counts(author_id, "bulk"))
+        return False
+    print("✅ comment create_many skips removed articles")
+
+    # 5. remove_where soft-deletes and takes the articles off the counters
+    with SessionLocal() as db:
+        removed = crud.article.remove_where(db, Article.id.in_(bulk_ids))
+        removed_ids = sorted(item.article.id for item in removed)
+        commenters = {item.article.id: item.commenter_ids for item in removed}
+    if removed_ids != sorted(bulk_ids) or commenters[bulk_ids[0]] != [author_id]:
+        print("❌ remove_where returned:", removed_ids, commenters)
+        return False
+    if stored_counts(author_id, "bulk") != (1, 1, {}):
+        print("❌ remove_where counters:", stored_counts(author_id, "bulk"))
+        return False
+    if client.get(f"/api/v1/articles/{bulk_ids[2]}").status_code != 404:
+        print("❌ Article removed in bulk still readable")
+        return False
+    with SessionLocal() as db:
+        if crud.article.remove_where(db, Article.id.in_(bulk_ids)):
+            print("❌ remove_where removed articles twice")
+            return False
+    print("✅ remove_where soft-deletes and maintains the counters")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_counter_flow() and test_bulk_counter_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
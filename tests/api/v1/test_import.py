@@ -0,0 +1,216 @@
+import asyncio
+import csv
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+
+from app.core.response_cache import ARTICLE_LIST_KEY, response_cache, user_key
+from app.core.security import get_password_hash
+from app.main import app
+
+client = TestClient(app)
+
+ARTICLE_FIELDS = {
+    "id",
+    "title",
+    "content",
+    "summary",
+    "tags",
+    "status",
+    "author_id",
+    "author",
+    "comment_count",
+    "created_at",
+    "comments",
+}
+
+
+def forget(*keys: str) -> None:
+    # The import writes straight to the database, behind the response cache
+    asyncio.run(response_cache.invalidate(*keys))
+
+
+def write_ndjson(path: Path, rows: list) -> str:
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return str(path)
+
+
+def write_csv(path: Path, rows: list) -> str:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_import_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Bulk Import:")
+
+    # 1. A user that already exists is matched by email, not duplicated
+    register_data = {
+        "email": "existing@example.com",
+        "password": "secret123",
+        "full_name": "Existing User",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    existing_id = response.json()["id"]
+    print("✅ Existing user registered")
+
+    # 2. Import users and articles as NDJSON, comments as CSV, with legacy ids
+    users = [
+        {
+            "id": 501,
+            "email": "imported@example.com",
+            "full_name": "Imported User",
+            "hashed_password": get_password_hash("secret123"),
+            "created_at": "2020-01-01T00:00:00+00:00",
+        },
+        {"id": 502, "email": "existing@example.com", "full_name": "Renamed"},
+        # Rejected: no email, and an id given twice
+        {"id": 503, "email": None, "full_name": "No Email"},
+        {"id": 504, "email": "twin-a@example.com", "full_name": "Twin A"},
+        {"id": 504, "email": "twin-b@example.com", "full_name": "Twin B"},
+    ]
+    articles = [
+        {
+            "id": 9001,
+            "author_id": 501,
+            "title": "Imported Article",
+            "content": "Imported content.",
+            "summary": "",
+            "status": "published",
+            "tags": ["imported", "legacy"],
+            "created_at": "2020-01-02T00:00:00+00:00",
+        },
+        {"id": 9002, "author_id": 501, "title": "Imported Draft", "content": "x"},
+        # Its author isn't in the import, so it is skipped
+        {"id": 9003, "author_id": 999, "title": "Orphan", "content": "x"},
+        # Its author was rejected, so it is skipped too
+        {"id": 9004, "author_id": 504, "title": "Twin Article", "content": "x"},
+    ]
+    comments = [
+        {"id": 1, "article_id": 9001, "author_id": 502, "content": "From existing"},
+        {"id": 2, "article_id": 9001, "author_id": 501, "content": "From imported"},
+        {"id": 3, "article_id": 9003, "author_id": 501, "content": "On the orphan"},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run(
+            [
+                "python",
+                "scripts/import_data.py",
+                "--users",
+                write_ndjson(Path(tmp) / "users.ndjson", users),
+                "--articles",
+                write_ndjson(Path(tmp) / "articles.ndjson", articles),
+                "--comments",
+                write_csv(Path(tmp) / "comments.csv", comments),
+                "--batch-size",
+                "1",
+                "--workers",
+                "2",
+            ],
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0 or "Import finished" not in result.stderr:
+        print("❌ Import failed:", result.stdout, result.stderr)
+        return False
+    if "(3 rows rejected)" not in result.stderr:
+        print("❌ Unresolvable users not rejected:", result.stderr)
+        return False
+    forget(ARTICLE_LIST_KEY, user_key(existing_id))
+    print("✅ Import finished")
+
+    # 3. Imported users can log in; the existing one keeps their account
+    login_data = {"email": "imported@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Imported user can't log in:", response.json())
+        return False
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    login_data = {"email": "existing@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Existing user lost their password:", response.json())
+        return False
+    response = client.get(f"/api/v1/users/{existing_id}")
+    if response.status_code != 200 or response.json()["comment_count"] != 1:
+        print("❌ Existing user's comments not linked:", response.json())
+        return False
+    print("✅ Users imported and matched by email")
+
+    # 4. Articles are linked to their author, with tags and counters
+    response = client.get("/api/v1/articles", params={"tags": "imported"})
+    if response.status_code != 200:
+        print("❌ Article listing failed:", response.json())
+        return False
+    items = response.json()["items"]
+    if len(items) != 1 or set(items[0]) != ARTICLE_FIELDS:
+        print("❌ Unexpected imported articles:", items)
+        return False
+    article = items[0]
+    if (
+        article["title"] != "Imported Article"
+        or article["summary"] != ""
+        or sorted(article["tags"]) != ["imported", "legacy"]
+        or article["comment_count"] != 2
+        or not article["created_at"].startswith("2020-01-02")
+    ):
+        print("❌ Imported article doesn't match its input:", article)
+        return False
+    author_id = article["author_id"]
+    forget(user_key(author_id))
+    response = client.get(f"/api/v1/users/{author_id}")
+    profile = response.json()
+    if profile["article_count"] != 2 or profile["comment_count"] != 1:
+        print("❌ Imported author's counters not reconciled:", profile)
+        return False
+    print("✅ Articles imported with tags and counters")
+
+    # 5. Articles without a status come in as drafts; orphans are skipped
+    response = client.get(
+        "/api/v1/articles",
+        params={"status": "draft", "author_id": author_id},
+        headers=headers,
+    )
+    if response.status_code != 200:
+        print("❌ Draft listing failed:", response.json())
+        return False
+    drafts = [item["title"] for item in response.json()["items"]]
+    if drafts != ["Imported Draft"]:
+        print("❌ Unexpected imported drafts:", drafts)
+        return False
+    for title in ("Orphan", "Twin"):
+        response = client.get("/api/v1/articles/search", params={"q": title})
+        if response.status_code != 200 or response.json()["items"]:
+            print("❌ Article with an unknown author was imported:", title)
+            return False
+    print("✅ Drafts imported, rejected rows and orphans skipped")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_import_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
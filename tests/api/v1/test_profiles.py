@@ -1,16 +1,42 @@
+import base64
+import hashlib
+import io
+import os
+import pickle
+import socket
 import sys
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
 # Add project root to Python path
 project_root = str(Path(__file__).parent.parent.parent.parent)
 sys.path.insert(0, project_root)
 
+import httpx
 from fastapi.testclient import TestClient
+from moto.server import ThreadedMotoServer
+from PIL import Image
 
+from app.api.v1 import users
+from app.core import avatars
+from app.core.avatars import avatar_key, avatar_processor
+from app.core.config import settings
+from app.core.storage import S3Storage
 from app.main import app
 
 client = TestClient(app)
 
+# The storage the app was configured with, put back after the S3 flow
+storage = users.storage
+
+
+def _http(method, url, **kwargs):
+    # Presigned and avatar URLs point at the app itself with local storage
+    # and at the store with STORAGE_BACKEND=s3 (e.g. MinIO or moto_server)
+    if url.startswith("http://testserver"):
+        return client.request(method, url, **kwargs)
+    return httpx.request(method, url, **kwargs)
+
 
 def test_profile_flow():
     # Reset database using subprocess directly
@@ -66,6 +92,18 @@ def test_profile_flow():
     print("✅ Profile updated successfully")
 
     # 4. Get detailed profile with activity
+    article_data = {
+        "title": "Profile Article",
+        "content": "Body",
+        "status": "published",
+    }
+    response = client.post("/api/v1/articles", json=article_data, headers=headers)
+    article_id = response.json()["id"]
+    client.post(
+        "/api/v1/comments",
+        json={"content": "Own comment", "article_id": article_id},
+        headers=headers,
+    )
     response = client.get(f"/api/v1/users/{user_id}")
     if response.status_code != 200:
         print("❌ Detailed profile retrieval failed:", response.json())
@@ -74,8 +112,114 @@ def test_profile_flow():
     if "recent_articles" not in profile or "recent_comments" not in profile:
         print("❌ Profile activity missing")
         return False
+    recent_article = profile["recent_articles"][0]
+    if recent_article["id"] != article_id or "comments" in recent_article:
+        print("❌ Recent articles not in the slim shape:", recent_article)
+        return False
+    if profile["recent_comments"][0]["author"]["id"] != user_id:
+        print("❌ Recent comment author missing")
+        return False
     print("✅ Detailed profile retrieved successfully")
 
+    # 5. Upload an avatar; variants are generated after the response
+    png = (
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08"
+        b"\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\xcf\xc0"
+        b"\xf0\x1f\x00\x05\x00\x01\xff\x89\x99=\x1d\x00\x00\x00\x00IEND\xaeB`\x82"
+    )
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar",
+        files={"file": ("avatar.png", png, "image/png")},
+        headers=headers,
+    )
+    if response.status_code != 200 or response.json()["avatar_status"] != "pending":
+        print("❌ Avatar upload failed:", response.json())
+        return False
+    print("✅ Avatar uploaded successfully")
+
+    # The same image again reuses the stored blob and its variants
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar",
+        files={"file": ("copy.png", png, "image/png")},
+        headers=headers,
+    )
+    avatar_url = response.json()["avatar_url"]
+    if response.json()["avatar_status"] != "ready":
+        print("❌ Re-uploaded avatar was not deduplicated:", response.json())
+        return False
+    response = _http("GET", avatar_url)
+    if "immutable" not in response.headers.get("cache-control", ""):
+        print("❌ Avatar not served as immutable:", response.headers)
+        return False
+    print("✅ Avatar deduplicated and served as immutable")
+
+    # Upload straight to storage with a presigned PUT, then confirm it
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), "green").save(buffer, "PNG")
+    image = buffer.getvalue()
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar/upload-url",
+        json={
+            "sha256": hashlib.sha256(image).hexdigest(),
+            "content_type": "image/png",
+            "size": len(image),
+        },
+        headers=headers,
+    )
+    ticket = response.json()
+    if response.status_code != 200 or ticket["exists"]:
+        print("❌ Presigned upload URL failed:", ticket)
+        return False
+    response = _http("PUT", ticket["url"], content=image, headers=ticket["headers"])
+    if response.status_code not in (200, 204):
+        print("❌ Presigned PUT failed:", response.text)
+        return False
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar/confirm",
+        json={"key": ticket["key"]},
+        headers=headers,
+    )
+    if (
+        response.status_code != 200
+        or ticket["key"] not in response.json()["avatar_url"]
+    ):
+        print("❌ Avatar upload confirmation failed:", response.json())
+        return False
+    print("✅ Avatar uploaded through a presigned URL")
+
+    # Content is sniffed, so a mislabelled file is rejected
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar",
+        files={"file": ("avatar.png", b"not an image", "image/png")},
+        headers=headers,
+    )
+    if response.status_code != 400:
+        print("❌ Non-image avatar was accepted")
+        return False
+    print("✅ Non-image avatar rejected")
+
+    # Oversized uploads are refused on their Content-Length, before the body
+    # is read, and so are uploads that don't declare one
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar",
+        files={
+            "file": ("big.png", png + bytes(settings.AVATAR_MAX_BYTES), "image/png")
+        },
+        headers=headers,
+    )
+    if response.status_code != 413:
+        print("❌ Oversized avatar was not rejected:", response.status_code)
+        return False
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar",
+        content=iter([png]),
+        headers={**headers, "Content-Type": "multipart/form-data; boundary=x"},
+    )
+    if response.status_code != 411:
+        print("❌ Avatar upload without Content-Length was accepted")
+        return False
+    print("✅ Oversized avatar rejected up front")
+
     # Test error handling
     # 1. Try to get non-existent user profile
     response = client.get("/api/v1/users/99999")
@@ -97,6 +241,158 @@ def test_profile_flow():
     return True
 
 
+def start_s3() -> tuple:
+    """
+    A local moto_server, standing in for S3; returns it and its endpoint.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def test_s3_storage_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting S3 Storage:")
+
+    # Credentials for the stand-in; the avatar workers inherit them
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "testing")
+    server, endpoint = start_s3()
+    s3 = S3Storage("avatars", endpoint_url=endpoint, region="us-east-1")
+    s3.client.create_bucket(Bucket="avatars")
+    try:
+        return _s3_storage_flow(s3, endpoint)
+    finally:
+        users.storage = avatars.storage = storage
+        # Workers hold no storage of their own, but drop the ones used here
+        avatar_processor.shutdown()
+        server.stop()
+
+
+def _s3_storage_flow(s3: S3Storage, endpoint: str) -> bool:
+    # 1. The storage pickles without its client, for the avatar workers
+    copy = pickle.loads(pickle.dumps(s3))
+    if copy._client is not None or copy.url("k", "") != f"{endpoint}/avatars/k":
+        print("❌ S3Storage didn't pickle cleanly")
+        return False
+    print("✅ S3Storage pickles for the worker processes")
+
+    # 2. A presigned PUT signs the checksum, and stores the upload
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), "purple").save(buffer, "PNG")
+    image = buffer.getvalue()
+    sha256 = hashlib.sha256(image).hexdigest()
+    key = avatar_key(sha256, ".png")
+    presigned = s3.presign_put(
+        key, content_type="image/png", sha256=sha256, base_url="http://testserver"
+    )
+    query = parse_qs(urlsplit(presigned["url"]).query)
+    signed = query.get("X-Amz-SignedHeaders", [""])[0].split(";")
+    checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+    if (
+        "x-amz-checksum-sha256" not in signed
+        or presigned["headers"]["x-amz-checksum-sha256"] != checksum
+    ):
+        print("❌ Checksum not signed into the presigned URL:", presigned)
+        return False
+    response = httpx.put(presigned["url"], content=image, headers=presigned["headers"])
+    if response.status_code != 200:
+        print("❌ Presigned PUT to S3 failed:", response.text)
+        return False
+    stored = copy.stat(key)
+    if not copy.exists(key) or stored is None or stored.size != len(image):
+        print("❌ Uploaded object not found in S3:", stored)
+        return False
+    print("✅ Presigned PUT signs the checksum and stores the object")
+
+    # 3. Through the API, with the app's storage pointed at the bucket
+    users.storage = avatars.storage = s3
+    avatar_processor.shutdown()
+    register_data = {
+        "email": "s3_test@example.com",
+        "password": "secret123",
+        "full_name": "S3 Tester",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    user_id = response.json()["id"]
+    login_data = {"email": "s3_test@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (200, 300), "orange").save(buffer, "PNG")
+    image = buffer.getvalue()
+    upload_in = {
+        "sha256": hashlib.sha256(image).hexdigest(),
+        "content_type": "image/png",
+        "size": len(image),
+    }
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar/upload-url", json=upload_in, headers=headers
+    )
+    ticket = response.json()
+    if (
+        response.status_code != 200
+        or ticket["exists"]
+        or not ticket["url"].startswith(f"{endpoint}/avatars/")
+    ):
+        print("❌ Presigned S3 upload URL failed:", ticket)
+        return False
+    response = httpx.put(ticket["url"], content=image, headers=ticket["headers"])
+    if response.status_code != 200:
+        print("❌ Presigned PUT to S3 failed:", response.text)
+        return False
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar/confirm",
+        json={"key": ticket["key"]},
+        headers=headers,
+    )
+    profile = response.json()
+    if response.status_code != 200 or profile["avatar_url"] != s3.url(
+        ticket["key"], ""
+    ):
+        print("❌ S3 upload confirmation failed:", profile)
+        return False
+    print("✅ Avatar uploaded to S3 and confirmed")
+
+    # 4. The worker processes resized it from S3 and stored the variants there
+    profile = client.get(f"/api/v1/users/{user_id}").json()
+    variants = profile["avatar_variants"] or {}
+    if profile["avatar_status"] != "ready" or sorted(variants, key=int) != [
+        str(size) for size in avatar_processor.sizes
+    ]:
+        print("❌ Avatar not resized from S3:", profile)
+        return False
+    prefix = f"{s3.public_url}/"
+    for url in variants.values():
+        if not url.startswith(prefix) or not s3.exists(url[len(prefix) :]):
+            print("❌ Avatar variant missing from S3:", url)
+            return False
+    response = client.post(
+        f"/api/v1/users/{user_id}/avatar/upload-url", json=upload_in, headers=headers
+    )
+    if response.status_code != 200 or not response.json()["exists"]:
+        print("❌ Stored S3 avatar not recognised:", response.json())
+        return False
+    print("✅ Avatar resized in the worker processes and stored in S3")
+
+    return True
+
+
 if __name__ == "__main__":
-    success = test_profile_flow()
+    success = test_profile_flow() and test_s3_storage_flow()
     print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+
+from app.db.query_stats import capture_queries
+from app.main import app
+
+client = TestClient(app)
+
+# Statements each endpoint may run on a response cache miss, however many
+# articles and comments there are, and that each write may run
+BUDGETS = {
+    "list_articles": 3,
+    "list_article_cards": 2,
+    "get_article": 3,
+    "list_comments": 3,
+    "get_profile": 2,
+    "create_article": 3,
+    "create_comment": 3,
+    "register": 1,
+}
+
+
+def within_budget(name: str, url: str, method: str = "GET", **kwargs) -> bool:
+    with capture_queries() as queries:
+        response = client.request(method, url, **kwargs)
+    if response.status_code != 200:
+        print(f"❌ {name} failed:", response.json())
+        return False
+    if queries.count > BUDGETS[name] or queries.repeated():
+        print(f"❌ {name} over its budget of {BUDGETS[name]}:\n{queries.describe()}")
+        return False
+    print(f"✅ {name} ran {queries.count} queries")
+    return True
+
+
+def test_query_budget_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Query Budgets:")
+
+    # 1. Register and login
+    register_data = {
+        "email": "budget_test@example.com",
+        "password": "secret123",
+        "full_name": "Budget Tester",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    login_data = {"email": "budget_test@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    token = response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    print("✅ Login successful")
+
+    # 2. Enough articles and comments that per-row loading would show up
+    article_ids = []
+    for i in range(6):
+        article_data = {
+            "title": f"Budget Article {i}",
+            "content": "Content",
+            "tags": ["budget"],
+            "status": "published",
+        }
+        response = client.post("/api/v1/articles", json=article_data, headers=headers)
+        article_ids.append(response.json()["id"])
+        for j in range(3):
+            comment_data = {"content": f"Comment {j}", "article_id": article_ids[-1]}
+            client.post("/api/v1/comments", json=comment_data, headers=headers)
+    print("✅ Articles and comments created")
+
+    # 3. Each endpoint stays within its budget on a cold cache
+    checks = [
+        ("list_articles", "/api/v1/articles?include=comments"),
+        ("list_article_cards", "/api/v1/articles?fields=title,author_name"),
+        ("get_article", f"/api/v1/articles/{article_ids[0]}"),
+        ("list_comments", f"/api/v1/comments/article/{article_ids[0]}"),
+        ("get_profile", f"/api/v1/users/{user_id}"),
+    ]
+    for name, url in checks:
+        if not within_budget(name, url):
+            return False
+
+    # 4. Writes come back hydrated from RETURNING, in one transaction
+    article_data = {"title": "Budget Write", "content": "Content", "tags": ["budget"]}
+    comment_data = {"content": "Budget Comment", "article_id": article_ids[0]}
+    register_data = {
+        "email": "budget_writer@example.com",
+        "password": "secret123",
+        "full_name": "Budget Writer",
+    }
+    writes = [
+        ("create_article", "/api/v1/articles", article_data),
+        ("create_comment", "/api/v1/comments", comment_data),
+        ("register", "/api/v1/auth/register", register_data),
+    ]
+    for name, url, data in writes:
+        if not within_budget(name, url, "POST", json=data, headers=headers):
+            return False
+
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 400:
+        print("❌ Registering a taken email should fail:", response.json())
+        return False
+    print("✅ Taken email refused")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_query_budget_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")
@@ -0,0 +1,242 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy import update
+
+from app import schemas
+from app.core.pagination import Page
+from app.core.response_cache import ARTICLE_LIST_KEY, article_key, response_cache
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.article import Article
+from app.schemas.base import UserBase
+from app.schemas.user import UserProfileDetail
+
+client = TestClient(app)
+
+ARTICLE_FIELDS = set(schemas.ArticleResponse.model_fields)
+COMMENT_FIELDS = set(schemas.CommentResponse.model_fields)
+AUTHOR_FIELDS = set(UserBase.model_fields)
+PAGE_FIELDS = set(Page.model_fields)
+
+
+def check_shape(body, model, fields) -> bool:
+    """
+    `body` has exactly the schema's fields and validates against it.
+    """
+    if set(body) != fields:
+        print(f"❌ {model.__name__} fields differ:", set(body) ^ fields)
+        return False
+    try:
+        model.model_validate(body)
+    except ValidationError as e:
+        print(f"❌ {model.__name__} doesn't validate:", e)
+        return False
+    return True
+
+
+def check_conditional(path: str) -> str:
+    """
+    GET `path` twice, the second time with its ETag; returns the ETag if the
+    second answer was an empty 304.
+    """
+    response = client.get(path)
+    etag = response.headers.get("etag")
+    if response.status_code != 200 or not etag:
+        print(f"❌ {path} returned no ETag:", response.status_code)
+        return None
+    response = client.get(path, headers={"If-None-Match": etag})
+    if response.status_code != 304 or response.content:
+        print(f"❌ {path} didn't answer If-None-Match with 304")
+        return None
+    if response.headers.get("etag") != etag:
+        print(f"❌ {path} 304 carries a different ETag")
+        return None
+    return etag
+
+
+def test_response_flow():
+    # Reset database using subprocess directly
+    import subprocess
+
+    try:
+        subprocess.run(["python", "scripts/setup_db.py"], check=True)
+    except subprocess.CalledProcessError:
+        print("❌ Failed to reset database")
+        return False
+
+    print("\nTesting Response Shapes:")
+
+    # 1. Register, login, and create an article with comments
+    register_data = {
+        "email": "shapes@example.com",
+        "password": "secret123",
+        "full_name": "Shape Tester",
+    }
+    response = client.post("/api/v1/auth/register", json=register_data)
+    if response.status_code != 200:
+        print("❌ Registration failed:", response.json())
+        return False
+    user_id = response.json()["id"]
+    login_data = {"email": "shapes@example.com", "password": "secret123"}
+    response = client.post("/api/v1/auth/login", json=login_data)
+    if response.status_code != 200:
+        print("❌ Login failed:", response.json())
+        return False
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    article_data = {
+        "title": "Shaped Article",
+        "content": "Serialized from Core rows.",
+        "summary": None,
+        "tags": ["shapes"],
+        "status": "published",
+    }
+    response = client.post("/api/v1/articles", json=article_data, headers=headers)
+    if response.status_code != 200:
+        print("❌ Article creation failed:", response.json())
+        return False
+    article_id = response.json()["id"]
+    for i in range(2):
+        comment_data = {"content": f"Shaped comment {i}", "article_id": article_id}
+        response = client.post("/api/v1/comments", json=comment_data, headers=headers)
+        if response.status_code != 200:
+            print("❌ Comment creation failed:", response.json())
+            return False
+    print("✅ Article and comments created")
+
+    # 2. Article detail, with and without embedded comments
+    response = client.get(f"/api/v1/articles/{article_id}")
+    if response.status_code != 200:
+        print("❌ Article fetch failed:", response.json())
+        return False
+    if not response.headers["content-type"].startswith("application/json"):
+        print("❌ Unexpected content type:", response.headers["content-type"])
+        return False
+    article = response.json()
+    if not check_shape(article, schemas.ArticleResponse, ARTICLE_FIELDS):
+        return False
+    if not check_shape(article["author"], UserBase, AUTHOR_FIELDS):
+        return False
+    if article["summary"] is not None or article["comment_count"] != 2:
+        print("❌ Unexpected article values:", article)
+        return False
+    comments = article["comments"]
+    if [c["content"] for c in comments] != ["Shaped comment 1", "Shaped comment 0"]:
+        print("❌ Embedded comments missing:", comments)
+        return False
+    if not all(
+        check_shape(c, schemas.CommentResponse, COMMENT_FIELDS) for c in comments
+    ):
+        return False
+    response = client.get(f"/api/v1/articles/{article_id}", params={"include": ""})
+    if response.status_code != 200 or response.json()["comments"] != []:
+        print("❌ Comments embedded without include:", response.json())
+        return False
+    print("✅ Article detail matches ArticleResponse")
+
+    # 3. Listing pages and cards
+    response = client.get("/api/v1/articles")
+    page = response.json()
+    if response.status_code != 200 or not set(page) <= PAGE_FIELDS:
+        print("❌ Unexpected article page:", page)
+        return False
+    if len(page["items"]) != 1:
+        print("❌ Unexpected article page items:", page["items"])
+        return False
+    if not check_shape(page["items"][0], schemas.ArticleResponse, ARTICLE_FIELDS):
+        return False
+    response = client.get("/api/v1/articles", params={"fields": "title,author_name"})
+    card = response.json()["items"][0]
+    if response.status_code != 200 or card != {
+        "id": article_id,
+        "title": "Shaped Article",
+        "author_name": "Shape Tester",
+    }:
+        print("❌ Unexpected article card:", card)
+        return False
+    response = client.get("/api/v1/articles", params={"fields": "bogus"})
+    if response.status_code != 400:
+        print("❌ Unknown card field not rejected:", response.status_code)
+        return False
+    print("✅ Article pages match ArticleResponse and ArticleCard")
+
+    # 4. Comment pages
+    response = client.get(f"/api/v1/comments/article/{article_id}")
+    page = response.json()
+    if response.status_code != 200 or not set(page) <= PAGE_FIELDS:
+        print("❌ Unexpected comment page:", page)
+        return False
+    if page["total"] != 2 or not all(
+        check_shape(c, schemas.CommentResponse, COMMENT_FIELDS) for c in page["items"]
+    ):
+        print("❌ Unexpected comment page items:", page["items"])
+        return False
+    response = client.get("/api/v1/comments/article/999999")
+    if response.status_code != 404:
+        print("❌ Comments of a missing article:", response.status_code)
+        return False
+    print("✅ Comment pages match CommentResponse")
+
+    # 5. Comments and profiles answer If-None-Match, until they change
+    comments_path = f"/api/v1/comments/article/{article_id}"
+    profile_path = f"/api/v1/users/{user_id}"
+    comments_etag = check_conditional(comments_path)
+    profile_etag = check_conditional(profile_path)
+    if not comments_etag or not profile_etag:
+        return False
+    # Articles and comment lists embed authors' counters, which their ETags
+    # don't cover; profiles are versioned in full
+    article_etag = check_conditional(f"/api/v1/articles/{article_id}")
+    if not article_etag:
+        return False
+    if not (
+        article_etag.startswith("W/")
+        and comments_etag.startswith("W/")
+        and not profile_etag.startswith("W/")
+    ):
+        print("❌ Unexpected ETag strength:", article_etag, comments_etag, profile_etag)
+        return False
+    profile = client.get(profile_path).json()
+    if not check_shape(profile, UserProfileDetail, set(UserProfileDetail.model_fields)):
+        return False
+    comment_data = {"content": "Changes the ETags", "article_id": article_id}
+    response = client.post("/api/v1/comments", json=comment_data, headers=headers)
+    if response.status_code != 200:
+        print("❌ Comment creation failed:", response.json())
+        return False
+    for path, etag in ((comments_path, comments_etag), (profile_path, profile_etag)):
+        response = client.get(path, headers={"If-None-Match": etag})
+        if response.status_code != 200 or response.headers.get("etag") == etag:
+            print(f"❌ {path} still 304 after a new comment")
+            return False
+    print("✅ Comments and profiles honor If-None-Match")
+
+    # 6. Articles stored without tags are served with an empty list
+    with SessionLocal() as db:
+        db.execute(update(Article).where(Article.id == article_id).values(tags=None))
+        db.commit()
+    # Written straight to the database, behind the response cache
+    asyncio.run(response_cache.invalidate(article_key(article_id), ARTICLE_LIST_KEY))
+    response = client.get(f"/api/v1/articles/{article_id}")
+    if response.status_code != 200 or response.json()["tags"] != []:
+        print("❌ NULL tags not served as a list:", response.json())
+        return False
+    response = client.get("/api/v1/articles")
+    if response.status_code != 200 or response.json()["items"][0]["tags"] != []:
+        print("❌ NULL tags not served as a list:", response.json())
+        return False
+    print("✅ Articles without tags serialize as ArticleResponse")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = test_response_flow()
+    print("\n🔍 Final Result:", "Success! ✨" if success else "Failed ❌")